@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import networkx as nx
+import numpy as np
+
+import pyboltzmann as pybo
+
+
+class CompactGraph(object):
+    """
+    Array representation of a graph with a rotation system (embedding).
+
+    This is the format in which sampled graphs are transferred between
+    processes, pickling it only copies a few int32 buffers instead of a
+    pointer structure of half-edges or a networkx graph.
+
+    Nodes are referred to by their index in `nodes`.
+
+    Parameters
+    ----------
+    nodes : ndarray of int32, shape (n,)
+        The node labels.
+    offsets : ndarray of int32, shape (n + 1,)
+        The neighbours of node i are neighbours[offsets[i]:offsets[i + 1]].
+    neighbours : ndarray of int32, shape (2m,)
+        The neighbours of each node in ccw order around the node.
+    edges : ndarray of int32, shape (m, 2), optional (default=from rotations)
+        The endpoints of each edge.
+    """
+
+    __slots__ = 'nodes', 'offsets', 'neighbours', 'edges'
+
+    def __init__(self, nodes, offsets, neighbours, edges=None):
+        self.nodes = nodes
+        self.offsets = offsets
+        self.neighbours = neighbours
+        if edges is None:
+            sources = np.repeat(np.arange(len(nodes), dtype=np.int32),
+                                np.diff(offsets))
+            # Each edge appears once in the rotation of both endpoints.
+            is_first = sources < neighbours
+            edges = np.stack([sources[is_first], neighbours[is_first]], axis=1)
+        self.edges = edges
+
+    @staticmethod
+    def from_node_dict(nodes):
+        """Encodes a graph given by the result of `HalfEdge.node_dict`.
+
+        Unpaired half-edges are ignored.
+
+        Parameters
+        ----------
+        nodes : dict
+            Maps node numbers to the incident half-edges in ccw order.
+
+        Returns
+        -------
+        CompactGraph
+        """
+        index = {node: i for i, node in enumerate(nodes)}
+        neighbours = []
+        offsets = [0]
+        for half_edges in nodes.values():
+            neighbours.extend([index[he.opposite.node_nr]
+                               for he in half_edges if he.opposite is not None])
+            offsets.append(len(neighbours))
+        return CompactGraph(np.array(list(nodes), dtype=np.int32),
+                            np.array(offsets, dtype=np.int32),
+                            np.array(neighbours, dtype=np.int32))
+
+    @staticmethod
+    def disjoint_union(graphs):
+        """Puts several graphs with distinct node labels into one.
+
+        Parameters
+        ----------
+        graphs : list of CompactGraph
+
+        Returns
+        -------
+        CompactGraph
+        """
+        graphs = list(graphs)
+        if not graphs:
+            empty = np.zeros(0, dtype=np.int32)
+            return CompactGraph(empty, np.zeros(1, dtype=np.int32), empty)
+        node_shifts = np.cumsum([0] + [len(g.nodes) for g in graphs[:-1]])
+        offset_shifts = np.cumsum(
+            [0] + [len(g.neighbours) for g in graphs[:-1]])
+        nodes = np.concatenate([g.nodes for g in graphs])
+        offsets = np.concatenate(
+            [[0]] + [g.offsets[1:] + shift
+                     for g, shift in zip(graphs, offset_shifts)])
+        neighbours = np.concatenate(
+            [g.neighbours + shift for g, shift in zip(graphs, node_shifts)])
+        edges = np.concatenate(
+            [g.edges + shift for g, shift in zip(graphs, node_shifts)])
+        return CompactGraph(nodes, offsets.astype(np.int32),
+                            neighbours.astype(np.int32),
+                            edges.astype(np.int32).reshape(-1, 2))
+
+    @staticmethod
+    def max_nbytes(max_nodes):
+        """Upper bound of `nbytes` for simple planar graphs.
+
+        Parameters
+        ----------
+        max_nodes : int
+
+        Returns
+        -------
+        int
+        """
+        # At most 3n edges, each is stored 4 times.
+        return 4 * (2 * max_nodes + 1 + 12 * max_nodes)
+
+    @property
+    def nbytes(self):
+        """Number of bytes written by `write_to`."""
+        return 4 * (len(self.nodes) + len(self.offsets)
+                    + len(self.neighbours) + self.edges.size)
+
+    def write_to(self, buffer, offset=0):
+        """Copies the arrays into a buffer.
+
+        Parameters
+        ----------
+        buffer : writable buffer
+        offset : int, optional (default=0)
+            Offset in bytes.
+
+        Returns
+        -------
+        header : tuple
+            Needed by `from_buffer`.
+        """
+        n = len(self.nodes)
+        num_neighbours = len(self.neighbours)
+        m = len(self.edges)
+        data = np.ndarray(self.nbytes // 4, dtype=np.int32, buffer=buffer,
+                          offset=offset)
+        data[:n] = self.nodes
+        data[n:2 * n + 1] = self.offsets
+        data[2 * n + 1:2 * n + 1 + num_neighbours] = self.neighbours
+        data[2 * n + 1 + num_neighbours:] = self.edges.ravel()
+        return n, num_neighbours, m
+
+    @staticmethod
+    def from_buffer(buffer, offset, header):
+        """Graph whose arrays are views into a buffer written by `write_to`,
+        no data is copied.
+
+        Parameters
+        ----------
+        buffer : buffer
+        offset : int
+            Offset in bytes.
+        header : tuple
+            As returned by `write_to`.
+
+        Returns
+        -------
+        CompactGraph
+        """
+        n, num_neighbours, m = header
+        data = np.ndarray(2 * n + 1 + num_neighbours + 2 * m, dtype=np.int32,
+                          buffer=buffer, offset=offset)
+        return CompactGraph(data[:n], data[n:2 * n + 1],
+                            data[2 * n + 1:2 * n + 1 + num_neighbours],
+                            data[2 * n + 1 + num_neighbours:].reshape(m, 2))
+
+    def copy(self):
+        """Copy that does not share any buffers with this graph."""
+        return CompactGraph(self.nodes.copy(), self.offsets.copy(),
+                            self.neighbours.copy(), self.edges.copy())
+
+    @property
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def number_of_edges(self):
+        return len(self.edges)
+
+    def _labels(self, relabel):
+        """The node labels as a list, random labels from 0 to n-1 if
+        relabel is set."""
+        if relabel:
+            labels = list(range(len(self.nodes)))
+            pybo.get_building_random_source().shuffle(labels)
+            return labels
+        return self.nodes.tolist()
+
+    def to_networkx_graph(self, relabel=True):
+        """Decodes to nx.Graph.
+
+        Parameters
+        ----------
+        relabel : bool, optional (default=True)
+            Relabel the nodes randomly with integers from 0 to n-1.
+
+        Returns
+        -------
+        Graph
+        """
+        labels = self._labels(relabel)
+        G = nx.Graph()
+        G.add_nodes_from(labels)
+        G.add_edges_from((labels[u], labels[v])
+                         for u, v in self.edges.tolist())
+        return G
+
+    def to_planar_embedding(self, relabel=True):
+        """Decodes to nx.PlanarEmbedding.
+
+        Parameters
+        ----------
+        relabel : bool, optional (default=True)
+            Relabel the nodes randomly with integers from 0 to n-1.
+
+        Returns
+        -------
+        PlanarEmbedding
+        """
+        labels = self._labels(relabel)
+        offsets = self.offsets.tolist()
+        neighbours = self.neighbours.tolist()
+        embedding = nx.PlanarEmbedding()
+        for i, node in enumerate(labels):
+            embedding.add_node(node)
+            # Add the half-edges in ccw order around the node.
+            reference_neighbour = None
+            for j in neighbours[offsets[i]:offsets[i + 1]]:
+                embedding.add_half_edge_ccw(node, labels[j],
+                                            reference_neighbour)
+                reference_neighbour = labels[j]
+        return embedding
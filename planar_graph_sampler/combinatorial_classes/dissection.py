@@ -12,11 +12,12 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
-import random
 from collections import deque
 
 import networkx as nx
 
+import pyboltzmann as pybo
+
 from planar_graph_sampler.combinatorial_classes.half_edge_graph import HalfEdgeGraph
 
 
@@ -62,7 +63,7 @@ class IrreducibleDissection(HalfEdgeGraph):
 
     def root_at_random_hexagonal_edge(self):
         """Selects a random hexagonal half-edge and makes it the root."""
-        self.half_edge = random.choice(self.hexagonal_edges)
+        self.half_edge = pybo.get_random_source().choice(self.hexagonal_edges)
         # self.is_rooted = True
 
     @property
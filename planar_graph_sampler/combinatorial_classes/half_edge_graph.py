@@ -12,13 +12,13 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
-import random
-
 import networkx as nx
 
+import pyboltzmann as pybo
 from pyboltzmann.generic_classes import CombinatorialClass
 
 from planar_graph_sampler.grammar.grammar_utils import Counter
+from planar_graph_sampler.combinatorial_classes.compact_graph import CompactGraph
 from planar_graph_sampler.combinatorial_classes.halfedge import HalfEdge
 from planar_graph_sampler.operations.misc import relabel_networkx
 
@@ -68,13 +68,14 @@ class HalfEdgeGraph(CombinatorialClass):
         This is not the same as choosing a random half-edge!
         """
         nodes = self.half_edge.node_dict()
-        if count is 1:
-            random_node = random.choice(list(nodes.keys()))
+        choice = pybo.get_building_random_source().choice
+        if count == 1:
+            random_node = choice(list(nodes.keys()))
             return nodes[random_node][0]
         else:
             res = []
             for _ in range(count):
-                random_node = random.choice(list(nodes.keys()))
+                random_node = choice(list(nodes.keys()))
                 res.append(nodes[random_node][0])
                 nodes.pop(random_node)
         return res
@@ -159,6 +160,21 @@ class HalfEdgeGraph(CombinatorialClass):
         connectivity_dict = nx.k_components(self.to_networkx_graph())
         return len(connectivity_dict[k][0]) == self.number_of_nodes
 
+    def to_compact(self):
+        """Encodes the graph into the array format used for transfers between
+        processes.
+
+        Returns
+        -------
+        CompactGraph
+        """
+        if self.half_edge.is_trivial:
+            # The one-node graph.
+            if self.half_edge.node_nr is None:
+                self.half_edge.node_nr = next(Counter())
+            return CompactGraph.from_node_dict({self.half_edge.node_nr: []})
+        return CompactGraph.from_node_dict(self.half_edge.node_dict())
+
     def to_planar_embedding(self, relabel=True):
         """Converts to nx.PlanarEmbedding.
 
@@ -166,21 +182,7 @@ class HalfEdgeGraph(CombinatorialClass):
         -------
         PlanarEmbedding
         """
-        nodes = self.half_edge.node_dict()
-        embedding = nx.PlanarEmbedding()
-        # Loop over all nodes in the graph (node_nr).
-        for node in nodes:
-            embedding.add_node(node)
-            # Loop over all half-edges incident the the current node, in ccw order around the node.
-            reference_neighbour = None
-            for he in nodes[node]:
-                if he.opposite is None:
-                    continue
-                embedding.add_half_edge_ccw(node, he.opposite.node_nr, reference_neighbour)
-                reference_neighbour = he.opposite.node_nr
-        if relabel:
-            relabel_networkx(embedding)
-        return embedding
+        return self.to_compact().to_planar_embedding(relabel)
 
     def to_networkx_graph(self, include_unpaired=False, relabel=True):
         """Transforms the graph into a networkx graph.
@@ -193,6 +195,8 @@ class HalfEdgeGraph(CombinatorialClass):
         relabel : bool, optional (default=True)
             Relabel nodes from 1 to n.
         """
+        if not include_unpaired:
+            return self.to_compact().to_networkx_graph(relabel)
         # Get the counter in case we have to create nodes for unpaired half-edges.
         counter = Counter()
         # If this graph consists of only one unpaired half-edge we interpret this as the one-node graph.
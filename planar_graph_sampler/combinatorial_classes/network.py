@@ -12,6 +12,8 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
+import pyboltzmann as pybo
+
 from planar_graph_sampler.combinatorial_classes.half_edge_graph import HalfEdgeGraph
 
 class Network(HalfEdgeGraph):
@@ -89,3 +91,24 @@ class Network(HalfEdgeGraph):
             link = self.half_edge
             g.remove_edge(link.node_nr, link.opposite.node_nr)
         return g
+
+
+class DummyNetwork(pybo.DummyClass):
+    """
+    Dummy of a network, only tracks the sizes and whether the poles are linked.
+
+    Parameters
+    ----------
+    l_size : int
+    u_size : int
+    is_linked : bool
+    """
+
+    __slots__ = 'is_linked'
+
+    def __init__(self, l_size, u_size, is_linked):
+        super(DummyNetwork, self).__init__(l_size, u_size)
+        self.is_linked = is_linked
+
+    def __str__(self):
+        return "Dummy network (l: {}, u: {}, linked: {})".format(self.l_size, self.u_size, self.is_linked)
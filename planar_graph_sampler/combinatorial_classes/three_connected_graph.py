@@ -12,7 +12,7 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
-import random
+import pyboltzmann as pybo
 
 from planar_graph_sampler.operations.networks import substitute_edge_by_network
 from planar_graph_sampler.combinatorial_classes.half_edge_graph import HalfEdgeGraph
@@ -57,16 +57,16 @@ class EdgeRootedThreeConnectedPlanarGraph(HalfEdgeGraph):
         possible_edges = self.root_half_edge.get_all_half_edges(include_unpaired=False)
         possible_edges.remove(self.root_half_edge)
         possible_edges.remove(self.root_half_edge.opposite)
-        return random.choice(list(possible_edges))
+        return pybo.get_building_random_source().choice(list(possible_edges))
 
     def two_random_u_atoms(self):
         possible_edges = self.root_half_edge.get_all_half_edges(include_unpaired=False)
         possible_edges.remove(self.root_half_edge)
         possible_edges.remove(self.root_half_edge.opposite)
-        he1 = random.choice(possible_edges)
+        he1 = pybo.get_building_random_source().choice(possible_edges)
         possible_edges.remove(he1)
         possible_edges.remove(he1.opposite)
-        he2 = random.choice(possible_edges)
+        he2 = pybo.get_building_random_source().choice(possible_edges)
         return he1, he2
 
     def replace_u_atoms(self, sampler, exceptions=None):
@@ -84,8 +84,8 @@ class EdgeRootedThreeConnectedPlanarGraph(HalfEdgeGraph):
                 #except KeyError:
                 except ValueError:
                     edges_for_subs.remove(excp.opposite)
-        # Substitute the edges with a newly sampled network one by one.
-        for edge_for_substitution in edges_for_subs:
-            network = sampler.sample()
+        # Substitute the edges with newly sampled networks one by one.
+        networks = sampler.sample_batch(len(edges_for_subs))
+        for edge_for_substitution, network in zip(edges_for_subs, networks):
             substitute_edge_by_network(edge_for_substitution, network)
         return self
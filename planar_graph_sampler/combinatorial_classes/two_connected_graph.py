@@ -43,12 +43,16 @@ class TwoConnectedPlanarGraph(HalfEdgeGraph):
 
     def replace_l_atoms(self, sampler, exceptions=None):
         nodes = self.half_edge.node_dict()
-        # Sample a graph and merge it with all remaining nodes.
-        for node in nodes:
-            if exceptions and node in [he.node_nr for he in exceptions]:
-                continue
-            # Sampler is for L * G_1_dx
-            plug_in = sampler.sample().second.marked_atom # base_class_object.half_edge
+        if exceptions:
+            excluded = [he.node_nr for he in exceptions]
+            nodes_for_subs = [node for node in nodes if node not in excluded]
+        else:
+            nodes_for_subs = list(nodes)
+        # Sample a graph for each remaining node and merge them.
+        # Sampler is for L * G_1_dx
+        plug_ins = sampler.sample_batch(len(nodes_for_subs))
+        for node, plug_in in zip(nodes_for_subs, plug_ins):
+            plug_in = plug_in.second.marked_atom # base_class_object.half_edge
             if not plug_in.is_trivial:
                 # Get an arbitrary half-edge incident to the current node.
                 he = nodes[node][0]
@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""Numerical evaluation of the generating functions of planar graphs.
+
+Computes the oracle tables of the planar graph grammar for any x below the
+singularity, see also evaluations/evals-notebook.ipynb. The generating
+functions are evaluated as truncated Taylor series in the perturbation of
+their first argument, which gives the derivatives without finite
+differences:
+
+- The rooted binary trees R_w, R_b, u, v and the networks D, S, P, H are the
+  smallest solutions of their equations, computed by Newton iteration.
+- K and G_3_arrow have closed forms in the binary trees.
+- G_2 is the integral of d/dy G_2 = x^2/2 (1 + D) / (1 + y) over y.
+- G_1 is obtained from the inverse of x*G_1_dx = x exp(G_2_dx(x*G_1_dx)).
+"""
+
+from __future__ import division
+
+import json
+import math
+import os
+
+import pyboltzmann as pybo
+
+__all__ = ['DEFAULT_CACHE_DIR',
+           'planar_graph_singularity',
+           'planar_graph_x_for_size',
+           'compute_planar_graph_evals',
+           'planar_graph_evals_for_size',
+           'ORACLE_BANK_SIZES',
+           'build_planar_graph_oracle_bank']
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser('~'), '.cache', 'planar_graph_sampler')
+
+# Bump this when the computed keys or values change to invalidate the cache.
+_CACHE_VERSION = 1
+
+# The sizes of the tables in evaluations_planar_graph.bank, 5 to 10^6 in
+# steps of about 25%.
+ORACLE_BANK_SIZES = sorted(set(int(round(5 * 1.25 ** k)) for k in range(56)))
+
+# Gauss-Legendre nodes per interval of the integration over y.
+_QUADRATURE_NODES = 12
+
+
+class _Jet(object):
+    """Truncated Taylor series c[0] + c[1]*e + ... + c[k]*e^k."""
+
+    __slots__ = ['c']
+
+    def __init__(self, coeffs):
+        self.c = list(coeffs)
+
+    @property
+    def order(self):
+        return len(self.c) - 1
+
+    def _lift(self, other):
+        if isinstance(other, _Jet):
+            return other
+        return _Jet([other] + [0.0] * self.order)
+
+    def __add__(self, other):
+        other = self._lift(other)
+        return _Jet([a + b for a, b in zip(self.c, other.c)])
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Jet([-a for a in self.c])
+
+    def __sub__(self, other):
+        return self + (-self._lift(other))
+
+    def __rsub__(self, other):
+        return self._lift(other) - self
+
+    def __mul__(self, other):
+        if not isinstance(other, _Jet):
+            return _Jet([a * other for a in self.c])
+        return _Jet([sum(self.c[i] * other.c[k - i] for i in range(k + 1))
+                     for k in range(len(self.c))])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if not isinstance(other, _Jet):
+            return _Jet([a / other for a in self.c])
+        q = []
+        for k in range(len(self.c)):
+            s = self.c[k] - sum(q[i] * other.c[k - i] for i in range(k))
+            q.append(s / other.c[0])
+        return _Jet(q)
+
+    def __rtruediv__(self, other):
+        return self._lift(other) / self
+
+    def __pow__(self, n):
+        res = self._lift(1.0)
+        for _ in range(n):
+            res = res * self
+        return res
+
+    def exp(self):
+        e = [math.exp(self.c[0])]
+        for k in range(1, len(self.c)):
+            e.append(sum(i * self.c[i] * e[k - i]
+                         for i in range(1, k + 1)) / k)
+        return _Jet(e)
+
+    def log(self):
+        l = [math.log(self.c[0])]
+        for k in range(1, len(self.c)):
+            s = k * self.c[k] - sum(i * l[i] * self.c[k - i]
+                                    for i in range(1, k))
+            l.append(s / (k * self.c[0]))
+        return _Jet(l)
+
+    def derivatives(self):
+        """The derivatives of order 0, 1, ..., k."""
+        return [a * math.factorial(k) for k, a in enumerate(self.c)]
+
+
+def _exp(a):
+    return a.exp() if isinstance(a, _Jet) else math.exp(a)
+
+
+def _const(a):
+    return a.c[0] if isinstance(a, _Jet) else a
+
+
+def _variable(value, order, direction=1.0):
+    """The jet value + direction*e."""
+    return _Jet([value, direction] + [0.0] * (order - 1))
+
+
+def _fixed_point(f, args, start=0.0):
+    """Smallest solution of v = f(v, *args).
+
+    f must be convex and increasing in v (true for generating functions) and
+    start must be below the solution, then the Newton iteration approaches
+    the solution monotonically from below. If some of the args are jets the
+    result is the jet of the implicit function.
+    """
+    order = max([a.order for a in args if isinstance(a, _Jet)] or [0])
+    const_args = [_const(a) for a in args]
+    v = start
+    for _ in range(200):
+        f_v = f(_variable(v, 1), *const_args)
+        if f_v.c[1] >= 1 or v > 1e10:
+            raise pybo.PyBoltzmannError(
+                "No solution, the point is beyond the singularity")
+        step = (f_v.c[0] - v) / (1 - f_v.c[1])
+        if step <= 1e-15 * abs(v):
+            break
+        v += step
+    else:
+        raise pybo.PyBoltzmannError("Newton iteration does not converge")
+    if order == 0:
+        return v
+    # Each step with the constant derivative fixes one more coefficient.
+    slope = 1 - f(_variable(v, 1), *const_args).c[1]
+    res = _Jet([v] + [0.0] * order)
+    for _ in range(order + 1):
+        res = res + (f(res, *args) - res) / slope
+    return res
+
+
+def _inverse(jet):
+    """The series e(d) with jet(e(d)) = jet.c[0] + d."""
+    a = jet.c
+    d = _Jet([0.0, 1.0] + [0.0] * (jet.order - 1))
+    e = d / a[1]
+    for _ in range(jet.order):
+        e = (d - sum(a[k] * e ** k for k in range(2, len(a)))) / a[1]
+    return e
+
+
+def _compose(jet, inner):
+    """jet(inner), where inner has no constant term."""
+    return sum((a * inner ** k for k, a in enumerate(jet.c)),
+               _Jet([0.0] * len(jet.c)))
+
+
+def _binary_trees(x, y):
+    """R_w = (y + R_b)^2, R_b = x (y + R_w)^2."""
+    R_b = _fixed_point(lambda R_b, x, y: x * (y + (y + R_b) ** 2) ** 2, [x, y])
+    return (y + R_b) ** 2, R_b
+
+
+def _three_connected(x, y):
+    """G_3_arrow(x,y), the closed form of Mullin and Schellenberg."""
+    u = _fixed_point(lambda u, x, y: x * y * (1 + y * (1 + u) ** 2) ** 2,
+                     [x, y])
+    v = y * (1 + u) ** 2
+    return y / 2 * (1 / (1 + x * y) + 1 / (1 + y) - 1
+                    - (1 + u) ** 2 * (1 + v) ** 2 / (1 + u + v) ** 3)
+
+
+def _networks(x, y, start=None):
+    """Returns D, S, P, H at (x,y)."""
+
+    def series_and_parallel(D, x, y):
+        H = _three_connected(x, D)
+        S = _fixed_point(
+            lambda S, x, y, D, H:
+            (y + y * (_exp(S + H) - 1) + _exp(S + H) - 1 - S) * x * D,
+            [x, y, D, H])
+        P = y * (_exp(S + H) - 1) + _exp(S + H) - 1 - (S + H)
+        return S, P, H
+
+    def phi(D, x, y):
+        S, P, H = series_and_parallel(D, x, y)
+        return y + S + P + H
+
+    if start is None:
+        start = _const(y)
+    D = _fixed_point(phi, [x, y], start)
+    return (D,) + series_and_parallel(D, x, y)
+
+
+def _legendre(num_nodes):
+    import numpy as np
+    nodes, weights = np.polynomial.legendre.leggauss(num_nodes)
+    return [float(t) for t in nodes], [float(w) for w in weights]
+
+
+def _two_connected(x, y, gap):
+    """G_2(x,y) = int_0^y x^2/2 (1 + D(x,t)) / (1 + t) dt.
+
+    The integrand has a singularity just above t = y, at a distance of the
+    order of gap, the intervals are refined geometrically towards y.
+    """
+    levels = int(math.ceil(math.log(64 / gap, 2)))
+    edges = [0.0] + [y * (1 - 2.0 ** -k) for k in range(1, levels)] + [y]
+    nodes, weights = _legendre(_QUADRATURE_NODES)
+    res = 0.0
+    D_start = 0.0
+    for a, b in zip(edges[:-1], edges[1:]):
+        for node, weight in zip(nodes, weights):
+            t = (a + b) / 2 + (b - a) / 2 * node
+            # D is increasing in t, so the last value is a valid start.
+            D = _networks(x, t, max(D_start, t))[0]
+            D_start = _const(D)
+            res = res + weight * (b - a) / 2 * x ** 2 * (1 + D) / (2 * (1 + t))
+    return res
+
+
+def planar_graph_singularity(y=1.0):
+    """The dominant singularity rho(y) of the generating function G(x,y) of
+    planar graphs.
+
+    Uses the parametrization of Gimenez and Noy: y = Y(t) determines t, and
+    rho is an explicit function of t.
+    """
+
+    def y_of_t(t):
+        h = (t ** 2 * (1 - t) * (18 + 36 * t + 5 * t ** 2)
+             / (2 * (3 + t) * (1 + 2 * t) * (1 + 3 * t) ** 2))
+        return (1 + 2 * t) * math.exp(-h) / ((1 + 3 * t) * (1 - t)) - 1
+
+    if y <= 0:
+        raise pybo.PyBoltzmannError("y must be positive")
+    # Y is increasing from Y(0) = 0 to infinity.
+    lower, upper = 0.0, 1.0
+    for _ in range(200):
+        t = (lower + upper) / 2
+        if y_of_t(t) < y:
+            lower = t
+        else:
+            upper = t
+    t = (lower + upper) / 2
+    exponent = (math.log(1 + t) * (3 * t - 1) * (1 + t) ** 3 / (16 * t ** 3)
+                - math.log(1 + 2 * t) * (1 + 3 * t) * (t - 1) ** 3
+                / (32 * t ** 3)
+                - (t - 1) * (185 * t ** 4 + 698 * t ** 3 - 217 * t ** 2
+                             - 160 * t + 6)
+                / (64 * t * (1 + 3 * t) ** 2 * (3 + t)))
+    return (-math.sqrt(1 + 3 * t) * (t - 1) ** 3 * math.exp(exponent)
+            / (16 * t ** 3))
+
+
+def planar_graph_x_for_size(n, y=1.0):
+    """The x for sampling planar graphs with about n nodes.
+
+    This is x = rho (1 - 1/(2n)), the choice of the tables in
+    evaluations_planar_graph.py. The tri-derived classes sampled by
+    `PlanarGraphGenerator` have a singularity of type (1 - x/rho)^(-1/2), the
+    objects of size about n have a large share of the probability there.
+    """
+    return planar_graph_singularity(y) * (1 - 1 / (2 * n))
+
+
+def _suffixes(name, derivatives, suffix='_dx'):
+    return dict((name + suffix * k, value)
+                for k, value in enumerate(derivatives))
+
+
+def _evals(x, y):
+    rho = planar_graph_singularity(y)
+    if not 0 < x < rho:
+        raise pybo.PyBoltzmannError(
+            "x must be in the interval (0, {})".format(rho))
+    gap = 1 - x / rho
+
+    # Find z = x*G_1_dx(x,y) from x = z exp(-G_2_dx(z,y)). The right hand
+    # side is concave and increasing, so Newton's method from below stays
+    # below the solution.
+    z = x
+    for _ in range(100):
+        G_2 = _two_connected(_variable(z, 2), y, gap)
+        G_2_dx = G_2.derivatives()[1:]
+        f = z * math.exp(-G_2_dx[0])
+        f_dx = math.exp(-G_2_dx[0]) * (1 - z * G_2_dx[1])
+        step = (x - f) / f_dx
+        z += step
+        if step <= 1e-15 * z:
+            break
+    else:
+        raise pybo.PyBoltzmannError("Newton iteration does not converge")
+
+    evals = {'x': x, 'y': y, 'x*G_1_dx(x,y)': z}
+    values = {}
+
+    # Networks and 2-connected graphs, as series in z.
+    Z = _variable(z, 3)
+    G_2 = _two_connected(Z, y, gap)
+    for name, jet in zip(['D', 'S', 'P', 'H'], _networks(Z, y)):
+        values.update(_suffixes(name, jet.derivatives()[:3]))
+    values.update(_suffixes('G_2', G_2.derivatives()))
+    values['G_2_arrow'] = (1 + values['D']) / (1 + y)
+    values['G_2_arrow_dx'] = values['D_dx'] / (1 + y)
+    for name, value in values.items():
+        evals['{}(x*G_1_dx(x,y),y)'.format(name)] = value
+
+    # 3-connected graphs, dissections and binary trees, as series in z and
+    # D(z,y) in the directions (1,0), (0,1) and (1,1).
+    D = values['D']
+    values = {}
+    G_3_dx = _three_connected(_variable(z, 2), D).derivatives()
+    G_3_dy = _three_connected(z, _variable(D, 2)).derivatives()
+    G_3_both = _three_connected(_variable(z, 2), _variable(D, 2)).derivatives()
+    values.update(_suffixes('G_3_arrow', G_3_dx))
+    values['G_3_arrow_dy'] = G_3_dy[1]
+    values['G_3_arrow_dy_dy'] = G_3_dy[2]
+    values['G_3_arrow_dx_dy'] = (G_3_both[2] - G_3_dx[2] - G_3_dy[2]) / 2
+    values['G_3_arrow_dy_dx'] = values['G_3_arrow_dx_dy']
+    values.update(_suffixes('J_a', [2 * value for value in G_3_dx]))
+    R_w, R_b = _binary_trees(_variable(z, 2), D)
+    values.update(_suffixes('R_w', R_w.derivatives()))
+    values.update(_suffixes('R_b', R_b.derivatives()))
+    # See the notebook: K_dy counts the trees whether they are asymmetric
+    # or not and subtracts the symmetric ones, the same for K_snake.
+    Z = _variable(z, 2)
+    K_dy = R_w + R_b - Z * D ** 2 - D ** 2 - 2 * Z * D ** 5
+    K_snake = R_w * R_b - Z * D ** 6
+    K = (D * K_dy - K_snake) / 3
+    values.update(_suffixes('K', K.derivatives()))
+    values.update(_suffixes('K_dy', K_dy.derivatives()))
+    # I is isomorphic to K and J = 3*L*U*I.
+    values.update(_suffixes('I', K.derivatives()))
+    values.update(_suffixes('J', (3 * Z * D * K).derivatives()))
+    for name, value in values.items():
+        evals['{}(x*G_1_dx(x,y),D(x*G_1_dx(x,y),y))'.format(name)] = value
+
+    # Connected and general planar graphs, as series in x.
+    G_2_dx = _Jet([k * c for k, c in enumerate(G_2.c)][1:])
+    x_of_z = _Jet([z, 1.0, 0.0]) * _exp(-G_2_dx)
+    G_1_dx = _compose(_exp(G_2_dx), _inverse(x_of_z))
+    # G_1 = z (1 - G_2_dx(z)) + G_2(z), see the notebook.
+    G_1 = _Jet([z * (1 - G_2_dx.c[0]) + G_2.c[0]] + [
+        c / k for k, c in enumerate(G_1_dx.c, 1)])
+    values = _suffixes('G_1', G_1.derivatives())
+    values.update(_suffixes('G', _exp(G_1).derivatives()))
+    for name, value in values.items():
+        evals['{}(x,y)'.format(name)] = value
+    return evals
+
+
+def _cache_file(cache_dir, x, y):
+    return os.path.join(cache_dir,
+                        'planar_graph_evals_{!r}_{!r}.json'.format(x, y))
+
+
+def compute_planar_graph_evals(x, y=1.0, cache=True,
+                               cache_dir=DEFAULT_CACHE_DIR):
+    """Computes the evaluations needed by the planar graph grammar.
+
+    Parameters
+    ----------
+    x : float
+        Must be below the singularity, see `planar_graph_singularity`.
+    y : float, optional (default=1.0)
+    cache : bool, optional (default=True)
+        Reads and writes the results in cache_dir, one json file per point.
+    cache_dir : str, optional (default=DEFAULT_CACHE_DIR)
+
+    Returns
+    -------
+    dict
+        The evaluations, with the same keys as the tables in
+        evaluations_planar_graph.py.
+
+    Notes
+    -----
+    Computations are done in double precision, the values agree with the
+    tables from the worksheets to about 10 digits for n up to 10000.
+    """
+    x, y = float(x), float(y)
+    if cache:
+        path = _cache_file(cache_dir, x, y)
+        try:
+            with open(path) as f:
+                content = json.load(f)
+            if content['version'] == _CACHE_VERSION:
+                return content['evals']
+        except (IOError, OSError, ValueError, KeyError):
+            pass
+    evals = _evals(x, y)
+    if cache:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Replace the file atomically, other processes may be reading it.
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': _CACHE_VERSION, 'evals': evals}, f,
+                      indent=0, sort_keys=True)
+        os.rename(tmp_path, path)
+    return evals
+
+
+def planar_graph_evals_for_size(n, y=1.0, cache=True,
+                                cache_dir=DEFAULT_CACHE_DIR):
+    """Computes the evaluations for sampling planar graphs with about n
+    nodes, see `planar_graph_x_for_size` and `compute_planar_graph_evals`.
+    """
+    return compute_planar_graph_evals(planar_graph_x_for_size(n, y), y,
+                                      cache, cache_dir)
+
+
+def build_planar_graph_oracle_bank(path, sizes=ORACLE_BANK_SIZES, y=1.0):
+    """Computes the evaluations for the given sizes and writes them to a file
+    for `pybo.OracleBank`, see `planar_graph_evals_for_size`."""
+    tables = dict((n, planar_graph_evals_for_size(n, y, cache=False))
+                  for n in sizes)
+    pybo.OracleBank.write(path, tables)
+
+
+if __name__ == '__main__':
+    # Rebuilds the oracle bank shipped with the package.
+    build_planar_graph_oracle_bank(os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        'evaluations_planar_graph.bank'))
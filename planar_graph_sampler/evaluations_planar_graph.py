@@ -1,3 +1,7 @@
+import os
+
+import pyboltzmann as pybo
+
 # Evals for N=10000, from maple and the old sage worksheet.
 reference_evals_10000 = {
     'D(x*G_1_dx(x,y),y)': 1.09416749105326839436361139331519184699,
@@ -307,3 +311,18 @@ my_evals_10000 = {
     'K_dx(x*G_1_dx(x,y),D(x*G_1_dx(x,y),y))': 18.462969459803365888397738940951942650392705612949,
     'K_dx_dx(x*G_1_dx(x,y),D(x*G_1_dx(x,y),y))': 70657.409259074574910312830524839969026895138706317,
     'K_dy_dx_dx(x*G_1_dx(x,y),D(x*G_1_dx(x,y),y))': 1189665324.5724589153274044265264320500515761729396}
+
+# The tables from the worksheets by size, see
+# EvaluationOracle.get_best_oracle_for_size.
+planar_graph_evals = {
+    10: my_evals_10,
+    100: my_evals_100,
+    1000: my_evals_1000,
+    10000: my_evals_10000,
+}
+
+# Tables for the sizes in evaluation_solver.ORACLE_BANK_SIZES, computed by
+# evaluation_solver.build_planar_graph_oracle_bank. Loaded on first access.
+planar_graph_oracle_bank = pybo.OracleBank(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'evaluations_planar_graph.bank'))
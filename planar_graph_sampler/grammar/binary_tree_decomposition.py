@@ -16,7 +16,7 @@ from __future__ import division
 
 import pyboltzmann as pybo
 
-from planar_graph_sampler.grammar.grammar_utils import underive, Counter
+from planar_graph_sampler.grammar.grammar_utils import underive, Counter, add_atoms_to_dummy
 from planar_graph_sampler.combinatorial_classes import BinaryTree
 from planar_graph_sampler.combinatorial_classes.binary_tree import Leaf
 
@@ -59,6 +59,21 @@ class BinaryTreeBuilder(pybo.DefaultBuilder):
                 EarlyRejectionControl.grammar.restart_sampler()
         return Leaf()
 
+    def dummy_builder(self):
+        return BinaryTreeDummyBuilder()
+
+
+class BinaryTreeDummyBuilder(pybo.DummyBuilder):
+    """Builds dummies of binary trees, keeps the early rejection of the BinaryTreeBuilder."""
+
+    def u_atom(self):
+        if EarlyRejectionControl.rejection_activated:
+            EarlyRejectionControl.L += 1
+            L = EarlyRejectionControl.L
+            if L > 1 and not pybo.bern(L / (L + 1)):
+                EarlyRejectionControl.grammar.restart_sampler()
+        return pybo.DummyClass(u_size=1)
+
 
 class WhiteRootedBinaryTreeBuilder(BinaryTreeBuilder):
     """Builds white-rooted binary trees (rules 'R_w', 'R_w_head', 'R_w_as', 'R_b_head_help')."""
@@ -167,7 +182,8 @@ def binary_tree_grammar():
             Hook(
                 Trans(
                     K_dy,
-                    underive
+                    underive,
+                    dummy_f=add_atoms_to_dummy(u_atoms=1)
                 ),
                 before=EarlyRejectionControl.activate_rejection,
                 after=EarlyRejectionControl.deactivate_rejection
@@ -12,7 +12,7 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
-from pyboltzmann.generic_classes import UDerivedClass, LDerivedClass
+from pyboltzmann.generic_classes import UDerivedClass, LDerivedClass, DummyClass
 
 
 def underive(obj):
@@ -30,6 +30,18 @@ def to_u_derived_class(obj):
     return UDerivedClass(obj)
 
 
+def add_atoms_to_dummy(l_atoms=0, u_atoms=0):
+    """Returns a transformation of dummies that adds the given numbers of atoms.
+
+    To be used as the dummy counterpart of transformations which change the
+    sizes of the objects (in terms of the generating functions).
+    """
+    def add_atoms(dummy):
+        return DummyClass(dummy.l_size + l_atoms, dummy.u_size + u_atoms)
+
+    return add_atoms
+
+
 def divide_by_2(evl, x, y):
     """Divides the given evaluation by 2. Needed for several samplers."""
     return 0.5 * evl
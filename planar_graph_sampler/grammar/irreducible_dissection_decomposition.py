@@ -16,6 +16,7 @@ import pyboltzmann as pybo
 
 from planar_graph_sampler.operations.closure import Closure
 from planar_graph_sampler.grammar.binary_tree_decomposition import binary_tree_grammar, EarlyRejectionControl
+from planar_graph_sampler.grammar.grammar_utils import add_atoms_to_dummy
 
 
 def closure(binary_tree):
@@ -54,6 +55,16 @@ def is_admissible(dissection):
     return dissection.is_admissible
 
 
+def is_admissible_dummy(dissection):
+    """Approximate admissibility check for dummies.
+
+    Only the sizes of a dummy are known, so small dissections (which cannot be
+    admissible) are rejected and all others are accepted. This overestimates
+    the acceptance rate.
+    """
+    return dissection.u_size > 5
+
+
 def irreducible_dissection_grammar():
     """Builds the dissection grammar. Must still be initialized with init().
 
@@ -91,9 +102,9 @@ def irreducible_dissection_grammar():
 
         # We drop the 3*L*U factor here.
         # This bijection does not preserve l-size/u-size.
-        'J': Bij(I, add_random_root_edge),
+        'J': Bij(I, add_random_root_edge, dummy_f=add_atoms_to_dummy(1, 1)),
 
-        'J_a': Rej(J, is_admissible),
+        'J_a': Rej(J, is_admissible, dummy_f=is_admissible_dummy),
 
         # Derived dissections.
 
@@ -102,9 +113,9 @@ def irreducible_dissection_grammar():
 
         # We drop the factor 3*U.
         # This bijection does not preserve l-size/u-size.
-        'J_dx': Bij(I + L() * I_dx, add_random_root_edge),
+        'J_dx': Bij(I + L() * I_dx, add_random_root_edge, dummy_f=add_atoms_to_dummy(u_atoms=1)),
 
-        'J_a_dx': Rej(J_dx, is_admissible),
+        'J_a_dx': Rej(J_dx, is_admissible, dummy_f=is_admissible_dummy),
 
         # Bi-derived dissections.
 
@@ -112,9 +123,9 @@ def irreducible_dissection_grammar():
         'I_dx_dx': Bij(K_dx_dx, closure),
 
         # We dropped a factor.
-        'J_dx_dx': Bij(2 * I_dx + L() * I_dx_dx, add_random_root_edge),
+        'J_dx_dx': Bij(2 * I_dx + L() * I_dx_dx, add_random_root_edge, dummy_f=add_atoms_to_dummy(u_atoms=1)),
 
-        'J_a_dx_dx': Rej(J_dx_dx, is_admissible)
+        'J_a_dx_dx': Rej(J_dx_dx, is_admissible, dummy_f=is_admissible_dummy)
 
     })
     return grammar
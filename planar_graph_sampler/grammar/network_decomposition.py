@@ -19,7 +19,7 @@ from planar_graph_sampler.grammar.grammar_utils import Counter
 from planar_graph_sampler.operations.networks import merge_networks_in_parallel, merge_networks_in_series, \
     substitute_edge_by_network
 from planar_graph_sampler.combinatorial_classes.halfedge import HalfEdge
-from planar_graph_sampler.combinatorial_classes.network import Network
+from planar_graph_sampler.combinatorial_classes.network import Network, DummyNetwork
 from planar_graph_sampler.grammar.three_connected_decomposition import three_connected_graph_grammar
 
 
@@ -47,6 +47,9 @@ class NetworkBuilder(pybo.DefaultBuilder):
         res = Network(root_half_edge, is_linked=True, l_size=0, u_size=1)
         return res
 
+    def dummy_builder(self):
+        return NetworkDummyBuilder()
+
 
 class SNetworkBuilder(NetworkBuilder):
     """Builds S-networks."""
@@ -65,6 +68,9 @@ class SNetworkBuilder(NetworkBuilder):
         assert not res.is_linked
         return res
 
+    def dummy_builder(self):
+        return SNetworkDummyBuilder()
+
 
 class PNetworkBuilder(NetworkBuilder):
     """Builds P-networks."""
@@ -91,6 +97,44 @@ class PNetworkBuilder(NetworkBuilder):
         assert isinstance(n1, Network) and isinstance(n2, Network), n2
         return self.set([n1, n2])
 
+    def dummy_builder(self):
+        return PNetworkDummyBuilder()
+
+
+def is_linked_dummy(dummy):
+    """Checks if the given dummy is a network with linked poles."""
+    return isinstance(dummy, DummyNetwork) and dummy.is_linked
+
+
+class NetworkDummyBuilder(pybo.DummyBuilder):
+    """Builds dummies of networks."""
+
+    def u_atom(self):
+        # The link network.
+        return DummyNetwork(0, 1, is_linked=True)
+
+
+class SNetworkDummyBuilder(NetworkDummyBuilder):
+    """Builds dummies of S-networks."""
+
+    def product(self, lhs, rhs):
+        # Series composition, the l-atom counts for the new vertex.
+        return DummyNetwork(lhs.l_size + rhs.l_size, lhs.u_size + rhs.u_size, is_linked=False)
+
+
+class PNetworkDummyBuilder(NetworkDummyBuilder):
+    """Builds dummies of P-networks."""
+
+    def set(self, networks):
+        if len(networks) == 0:
+            return pybo.DummyClass()
+        return DummyNetwork(sum(nw.l_size for nw in networks),
+                            sum(nw.u_size for nw in networks),
+                            any(is_linked_dummy(nw) for nw in networks))
+
+    def product(self, n1, n2):
+        return self.set([n1, n2])
+
 
 def g_3_arrow_to_network(decomp):
     """To be used as a bijection in the rules H, H_dx and H_dx_dx."""
@@ -121,6 +165,11 @@ def g_3_arrow_to_network(decomp):
     return res
 
 
+def g_3_arrow_to_network_dummy(decomp):
+    """Dummy counterpart of g_3_arrow_to_network."""
+    return DummyNetwork(decomp.l_size, decomp.u_size, is_linked=False)
+
+
 def network_grammar():
     """Constructs the grammar for networks.
 
@@ -168,7 +217,7 @@ def network_grammar():
 
         'P': U() * Set(1, S + H) + Set(2, S + H),
 
-        'H': Bij(USubs(G_3_arrow, D), g_3_arrow_to_network),
+        'H': Bij(USubs(G_3_arrow, D), g_3_arrow_to_network, dummy_f=g_3_arrow_to_network_dummy),
 
         # l-derived networks
 
@@ -186,7 +235,8 @@ def network_grammar():
         'H_dx':
             Bij(
                 USubs(G_3_arrow_dx, D) + D_dx * USubs(G_3_arrow_dy, D),
-                g_3_arrow_to_network
+                g_3_arrow_to_network,
+                dummy_f=g_3_arrow_to_network_dummy
             ),
 
         # bi-l-derived networks
@@ -213,7 +263,8 @@ def network_grammar():
                 + 2 * D_dx * USubs(G_3_arrow_dx_dy, D)
                 + D_dx_dx * USubs(G_3_arrow_dy, D)
                 + D_dx ** 2 * USubs(G_3_arrow_dy_dy, D),
-                g_3_arrow_to_network
+                g_3_arrow_to_network,
+                dummy_f=g_3_arrow_to_network_dummy
             ),
 
     })
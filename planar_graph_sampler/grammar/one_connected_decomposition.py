@@ -16,7 +16,7 @@ import pyboltzmann as pybo
 
 from planar_graph_sampler.combinatorial_classes.one_connected_graph import OneConnectedPlanarGraph
 from planar_graph_sampler.grammar.binary_tree_decomposition import EarlyRejectionControl
-from planar_graph_sampler.grammar.grammar_utils import underive
+from planar_graph_sampler.grammar.grammar_utils import underive, add_atoms_to_dummy
 from planar_graph_sampler.grammar.two_connected_decomposition import two_connected_graph_grammar
 
 
@@ -120,7 +120,8 @@ def one_connected_graph_grammar():
                     G_1_dx,
                     rej_to_G_1  # See lemma 15.
                 ),
-                underive
+                underive,
+                dummy_f=add_atoms_to_dummy(l_atoms=1)
             ),
 
         'G_1_dx':
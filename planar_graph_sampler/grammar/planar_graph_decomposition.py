@@ -16,33 +16,26 @@ import networkx as nx
 
 import pyboltzmann as pybo
 
+from planar_graph_sampler.combinatorial_classes.compact_graph import CompactGraph
 from planar_graph_sampler.grammar.binary_tree_decomposition import EarlyRejectionControl
 from planar_graph_sampler.grammar.one_connected_decomposition import one_connected_graph_grammar
-from planar_graph_sampler.operations.misc import relabel_networkx
+
+
+def comps_to_compact(components):
+    """Set of connected planar graphs (possibly derived) to CompactGraph."""
+    return CompactGraph.disjoint_union(
+        g.underive_all().to_compact() for g in components)
 
 
 def comps_to_nx_planar_embedding(components):
     """Set of connected planar graphs (possibly derived) to nx.PlanarEmbedding."""
-    res = nx.PlanarEmbedding()
-    for g in components:
-        g = g.underive_all()
-        g = g.to_planar_embedding(relabel=False)
-        res = nx.PlanarEmbedding(nx.compose(res, g))
-    # Relabel once all the components are in the same graph.
-    # relabel_networkx(res)
-    return res
+    return comps_to_compact(components).to_planar_embedding(relabel=False)
 
 
 def comps_to_nx_graph(components):
     """Set of connected planar graphs (possibly derived) to nx.Graph."""
-    res = nx.Graph()
-    for g in components:
-        g = g.underive_all()
-        g = g.to_networkx_graph(relabel=False)
-        res = nx.compose(res, g)
     # Relabel once all the components are in the same graph.
-    relabel_networkx(res)
-    return res
+    return comps_to_compact(components).to_networkx_graph(relabel=True)
 
 
 class PlanarGraphBuilder(pybo.DefaultBuilder):
@@ -16,7 +16,7 @@ import pyboltzmann as pybo
 
 from planar_graph_sampler.combinatorial_classes.half_edge_graph import HalfEdgeGraph
 from planar_graph_sampler.grammar.binary_tree_decomposition import EarlyRejectionControl
-from planar_graph_sampler.grammar.grammar_utils import to_l_derived_class, divide_by_2
+from planar_graph_sampler.grammar.grammar_utils import to_l_derived_class, divide_by_2, add_atoms_to_dummy
 from planar_graph_sampler.grammar.irreducible_dissection_decomposition import irreducible_dissection_grammar
 from planar_graph_sampler.operations.primal_map import PrimalMap
 from planar_graph_sampler.combinatorial_classes.three_connected_graph import EdgeRootedThreeConnectedPlanarGraph
@@ -32,6 +32,27 @@ def primal_map(dissection):
     return res
 
 
+# The admissibility check of dissections needs their structure, so these rules
+# stay real in the dummy sampling mode used for two-phase sampling.
+REAL_DISSECTION_RULES = ['J_a', 'J_a_dx', 'J_a_dx_dx']
+
+
+def primal_map_dummy(derivation_order):
+    """Returns the dummy counterpart of the primal map bijection.
+
+    Dummy dissections already have the sizes of the resulting maps. Real
+    dissections (when sampling with `REAL_DISSECTION_RULES`) have the sizes of
+    the underived dissection and are turned into dummies of the map.
+    """
+    def to_dummy(dissection):
+        if isinstance(dissection, pybo.DummyClass):
+            return dissection
+        return pybo.DummyClass(dissection.l_size + 1 - derivation_order,
+                               int(dissection.u_size) + 1)
+
+    return to_dummy
+
+
 def to_bi_l_derived_class(obj):
     return to_l_derived_class(to_l_derived_class(obj))
 
@@ -84,15 +105,21 @@ def three_connected_graph_grammar():
 
         # Non-derived 3-connected rooted planar maps/graphs.
 
-        'M_3_arrow': Bij(J_a, primal_map),
+        'M_3_arrow': Bij(J_a, primal_map, dummy_f=primal_map_dummy(0)),
 
         'G_3_arrow': Trans(M_3_arrow, eval_transform=divide_by_2),  # See 4.1.9.
 
         # Derived 3-connected rooted planar maps/graphs.
 
-        'M_3_arrow_dx': Bij(J_a_dx, primal_map),
+        'M_3_arrow_dx': Bij(J_a_dx, primal_map, dummy_f=primal_map_dummy(1)),
 
-        'G_3_arrow_dx': Trans(M_3_arrow_dx, to_l_derived_class, eval_transform=divide_by_2),
+        'G_3_arrow_dx':
+            Trans(
+                M_3_arrow_dx,
+                to_l_derived_class,
+                eval_transform=divide_by_2,
+                dummy_f=add_atoms_to_dummy()
+            ),
 
         'G_3_arrow_dy':
             Bij(
@@ -102,9 +129,15 @@ def three_connected_graph_grammar():
 
         # Bi-derived 3-connected rooted planar maps/graphs.
 
-        'M_3_arrow_dx_dx': Bij(J_a_dx_dx, primal_map),
+        'M_3_arrow_dx_dx': Bij(J_a_dx_dx, primal_map, dummy_f=primal_map_dummy(2)),
 
-        'G_3_arrow_dx_dx': Trans(M_3_arrow_dx_dx, to_bi_l_derived_class, eval_transform=divide_by_2),
+        'G_3_arrow_dx_dx':
+            Trans(
+                M_3_arrow_dx_dx,
+                to_bi_l_derived_class,
+                eval_transform=divide_by_2,
+                dummy_f=add_atoms_to_dummy()
+            ),
 
         'G_3_arrow_dx_dy':
             Bij(
@@ -130,9 +163,11 @@ def three_connected_graph_grammar():
             Bij(
                 Rej(
                     G_3_arrow,
-                    lambda g: pybo.bern(1 / g.number_of_edges)
+                    lambda g: pybo.bern(1 / g.number_of_edges),
+                    dummy_f=lambda g: pybo.bern(1 / (g.u_size + 1))
                 ),
-                lambda g: HalfEdgeGraph(g.half_edge)
+                lambda g: HalfEdgeGraph(g.half_edge),
+                dummy_f=add_atoms_to_dummy(2, 1)  # The root edge and its end points count.
             ),
 
     })
@@ -17,11 +17,12 @@ from __future__ import division
 import pyboltzmann as pybo
 
 from planar_graph_sampler.grammar.binary_tree_decomposition import EarlyRejectionControl
-from planar_graph_sampler.grammar.grammar_utils import Counter, divide_by_2, to_u_derived_class
+from planar_graph_sampler.grammar.grammar_utils import Counter, divide_by_2, to_u_derived_class, \
+    add_atoms_to_dummy
 from planar_graph_sampler.combinatorial_classes.halfedge import HalfEdge
 from planar_graph_sampler.combinatorial_classes.two_connected_graph import EdgeRootedTwoConnectedPlanarGraph, \
     TwoConnectedPlanarGraph
-from planar_graph_sampler.grammar.network_decomposition import network_grammar
+from planar_graph_sampler.grammar.network_decomposition import network_grammar, is_linked_dummy
 
 
 class ZeroAtomGraphBuilder(pybo.DefaultBuilder):
@@ -78,6 +79,12 @@ def to_G_2_arrow_dx_dx(network):
     return pybo.LDerivedClass(to_G_2_arrow_dx(network))
 
 
+def to_G_2_arrow_dummy(network):
+    """Dummy counterpart of to_G_2_arrow and its derived versions."""
+    # The link edge of a linked network becomes the root edge which does not count.
+    return pybo.DummyClass(network.l_size, network.u_size - is_linked_dummy(network))
+
+
 def divide_by_1_plus_y(evl, x, y):
     """Needed as an eval-transform for rules G_2_arrow and G_2_arrow_dx."""
     return evl / (1 + pybo.BoltzmannSamplerBase.oracle.get(y))
@@ -139,11 +146,23 @@ def two_connected_graph_grammar():
 
         # two connected
 
-        'G_2_arrow': Trans(Z() + D, to_G_2_arrow, eval_transform=divide_by_1_plus_y),  # see 5.5
+        'G_2_arrow':
+            Trans(
+                Z() + D,
+                to_G_2_arrow,
+                eval_transform=divide_by_1_plus_y,
+                dummy_f=to_G_2_arrow_dummy
+            ),  # see 5.5
 
         'F': Bij(L() ** 2 * G_2_arrow, to_G_2),
 
-        'G_2_dy': Trans(F, to_u_derived_class, eval_transform=divide_by_2),
+        'G_2_dy':
+            Trans(
+                F,
+                to_u_derived_class,
+                eval_transform=divide_by_2,
+                dummy_f=add_atoms_to_dummy()
+            ),
 
         'G_2_dx':
             Bij(
@@ -153,11 +172,23 @@ def two_connected_graph_grammar():
 
         # l-derived two connected
 
-        'G_2_arrow_dx': Trans(D_dx, to_G_2_arrow_dx, eval_transform=divide_by_1_plus_y),
+        'G_2_arrow_dx':
+            Trans(
+                D_dx,
+                to_G_2_arrow_dx,
+                eval_transform=divide_by_1_plus_y,
+                dummy_f=to_G_2_arrow_dummy
+            ),
 
         'F_dx': Bij(L() ** 2 * G_2_arrow_dx + 2 * L() * G_2_arrow, to_G_2_dx),
 
-        'G_2_dx_dy': Trans(F_dx, to_u_derived_class, eval_transform=divide_by_2),
+        'G_2_dx_dy':
+            Trans(
+                F_dx,
+                to_u_derived_class,
+                eval_transform=divide_by_2,
+                dummy_f=add_atoms_to_dummy()
+            ),
 
         'G_2_dx_dx':
             Bij(
@@ -167,11 +198,23 @@ def two_connected_graph_grammar():
 
         # bi-l-derived two connected
 
-        'G_2_arrow_dx_dx': Trans(D_dx_dx, to_G_2_arrow_dx_dx, eval_transform=divide_by_1_plus_y),
+        'G_2_arrow_dx_dx':
+            Trans(
+                D_dx_dx,
+                to_G_2_arrow_dx_dx,
+                eval_transform=divide_by_1_plus_y,
+                dummy_f=to_G_2_arrow_dummy
+            ),
 
         'F_dx_dx': Bij(L() ** 2 * G_2_arrow_dx_dx + 4 * L() * G_2_arrow_dx + 2 * G_2_arrow, to_G_2_dx_dx),
 
-        'G_2_dx_dx_dy': Trans(F_dx_dx, to_u_derived_class, eval_transform=divide_by_2),
+        'G_2_dx_dx_dy':
+            Trans(
+                F_dx_dx,
+                to_u_derived_class,
+                eval_transform=divide_by_2,
+                dummy_f=add_atoms_to_dummy()
+            ),
 
         'G_2_dx_dx_dx':
             Bij(
@@ -1,12 +1,12 @@
-import random
-
 import networkx as nx
 
+import pyboltzmann as pybo
+
 
 def relabel_networkx(G):
     """Relabels nodes of `G` *randomly* with integers from 1 to n, the number of nodes in `G`."""
     new_labels = list(range(0, G.number_of_nodes()))
-    random.shuffle(new_labels)
+    pybo.get_building_random_source().shuffle(new_labels)
     relabel_dict = dict(zip(G.nodes, new_labels))
     nx.relabel_nodes(G, relabel_dict, copy=False)
 
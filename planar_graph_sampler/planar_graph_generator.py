@@ -12,11 +12,22 @@
 #           Rudi Floren <rudi.floren@gmail.com>
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
+import collections
 import math
 import multiprocessing as multiproc
+import queue
+
+import pyboltzmann as pybo
 
 from planar_graph_sampler.grammar.planar_graph_decomposition import \
-    planar_graph_grammar, comps_to_nx_planar_embedding, comps_to_nx_graph
+    planar_graph_grammar, comps_to_compact
+from planar_graph_sampler.grammar.three_connected_decomposition import \
+    REAL_DISSECTION_RULES
+from planar_graph_sampler.combinatorial_classes.compact_graph import \
+    CompactGraph
+from planar_graph_sampler.evaluation_solver import \
+    planar_graph_evals_for_size
+from planar_graph_sampler.shared_memory_ring import SharedMemoryRing
 from pyboltzmann.evaluation_oracle import EvaluationOracle
 from pyboltzmann.generic_samplers import BoltzmannSamplerBase
 from pyboltzmann.generic_classes import SetClass
@@ -29,10 +40,12 @@ __all__ = ['random_planar_graph',
 
 
 def random_planar_graph(n, epsilon=0.1, require_connected=True,
-                        with_embedding=True, allow_multiproc=False):
+                        with_embedding=True, allow_multiproc=False,
+                        two_phase=True, shared_memory=False):
     """See PlanarGraphGenerator."""
     return PlanarGraphGenerator(n, epsilon, require_connected,
-                                with_embedding, allow_multiproc).sample()
+                                with_embedding, allow_multiproc,
+                                two_phase, shared_memory).sample()
 
 
 class PlanarGraphGenerator(object):
@@ -55,7 +68,15 @@ class PlanarGraphGenerator(object):
         planar embedding represented as an nx.PlanarEmbedding object.
         Otherwise an nx.Graph object is returned.
     allow_multiproc : bool, optional (default=False)
-        Allows usage of the multiprocessing module for parallel sampling.
+        Allows usage of the multiprocessing module for parallel sampling, see
+        `sample_many`.
+    two_phase : bool, optional (default=True)
+        Decides on the number of nodes with size-only (dummy) samples and only
+        builds the accepted graph by replaying the random decisions of its
+        dummy. The distribution of the generated graphs is not affected.
+    shared_memory : bool, optional (default=False)
+        The worker processes of the parallel sampling pass the graphs to this
+        process through a ring buffer in shared memory instead of pipes.
 
     Returns
     -------
@@ -67,6 +88,9 @@ class PlanarGraphGenerator(object):
 
     Notes
     -----
+    The evaluations for n are computed by `planar_graph_evals_for_size` and
+    cached on disk, the first generator for a new n takes a few seconds to
+    set up.
     Expected running time is O(n/eps).
     In particular, the expected time for exact size sampling is O(n²).
 
@@ -77,7 +101,8 @@ class PlanarGraphGenerator(object):
     """
 
     def __init__(self, n, epsilon=0.1, require_connected=True,
-                 with_embedding=True, allow_multiproc=False):
+                 with_embedding=True, allow_multiproc=False, two_phase=True,
+                 shared_memory=False):
         # Handle invalid arguments.
         if n < 3:
             raise ValueError("n must be an integer greater or equal than 3")
@@ -93,69 +118,279 @@ class PlanarGraphGenerator(object):
         self._require_connected = require_connected
         self._with_embedding = with_embedding
         self._allow_parallel = allow_multiproc
+        self._two_phase = two_phase
+        self._shared_memory = shared_memory
+        # The worker pool of the parallel sampling, created on first use.
+        self._pool = None
+        self._pool_size = None
+        self._ring = None
+        self._pending = collections.deque()
         if allow_multiproc:
             self.sample = self._sample_multiproc
         else:
             self.sample = self._sample_single_proc
 
-        # Set up the oracle and grammar for sampling.
-        # BoltzmannSamplerBase.oracle = \
-        #    EvaluationOracle.get_best_oracle_for_size(n, planar_graph_evals)
-        # TODO Implement the choice of values.
-        BoltzmannSamplerBase.oracle = EvaluationOracle(my_evals_1000)
+        # Set up the oracle and grammar for sampling. The evaluations are
+        # tuned to n and cached on disk after the first computation.
+        BoltzmannSamplerBase.oracle = EvaluationOracle(
+            planar_graph_evals_for_size(n))
         self._grammar = planar_graph_grammar()
-        self._grammar.init()
-        self._grammar._precompute_evals('G_dx_dx_dx', 'x', 'y')
+        self._grammar.init('G_dx_dx_dx', compiled=True)
+        # Abort attempts as soon as they get too large. The l-size does not
+        # count the 3 marked nodes, which leaves room for the derivations
+        # that decrease the l-size of a partial object.
+        self._grammar.set_size_limits(max_l_size=self._upper)
 
     def sample(self):
         """Invokes the random generator once."""
         # This method is set in __init__.
         pass
 
+    def predict_cost(self, acceptance_probabilities=None):
+        """Predicts the rejection loop of `sample` from the evaluations,
+        without sampling.
+
+        The cost is given in visits of the program nodes (see
+        `GrammarAnalysis`), the sampling time is roughly proportional to it.
+        This allows to compare choices of epsilon before sampling. The
+        prediction is for the plain rejection loop, the attempts aborted due
+        to the size limits on intermediate objects make the real number of
+        attempts larger.
+
+        Parameters
+        ----------
+        acceptance_probabilities : dict, optional (default=None)
+            See `GrammarAnalysis`.
+
+        Returns
+        -------
+        dict
+            See `GrammarAnalysis.rejection_cost`.
+        """
+        if self._require_connected:
+            alias = 'G_1_dx_dx_dx'
+        else:
+            alias = 'G_dx_dx_dx'
+        analysis = self._grammar.analyze(acceptance_probabilities)
+        # The l-size does not count the 3 marked nodes.
+        return analysis.rejection_cost(alias, self._lower - 3, self._upper - 3,
+                                       max_l_size=self._upper)
+
+    def _is_acceptable(self, dummy):
+        # The three marked nodes of the tri-derived classes are not counted.
+        return self._lower <= dummy.l_size + 3 <= self._upper
+
     def _sample_single_proc(self):
+        return self._decode(self._sample_compact())
+
+    def _decode(self, compact_graph):
+        if self._with_embedding:
+            return compact_graph.to_planar_embedding(relabel=False)
+        else:
+            return compact_graph.to_networkx_graph(relabel=True)
+
+    def _sample_compact(self):
+        """Samples a graph in the format used for transfers between
+        processes."""
         if self._require_connected:
-            while True:
-                half_edge_graph = self._grammar.sample_iterative(
-                    'G_1_dx_dx_dx').underive_all()
-                if self._lower <= half_edge_graph.number_of_nodes <= self._upper:
-                    if self._with_embedding:
-                        return half_edge_graph.to_planar_embedding(relabel=False)
-                    else:
-                        return half_edge_graph.to_networkx_graph(relabel=True)
+            if self._two_phase:
+                half_edge_graph = self._grammar.sample_two_phase(
+                    'G_1_dx_dx_dx', self._is_acceptable, REAL_DISSECTION_RULES
+                ).underive_all()
+            else:
+                while True:
+                    half_edge_graph = self._grammar.sample_iterative(
+                        'G_1_dx_dx_dx').underive_all()
+                    if self._lower <= half_edge_graph.number_of_nodes <= self._upper:
+                        break
+            return half_edge_graph.to_compact()
         else:
-            while True:
-                generic_set = self._grammar.sample_iterative(
-                    'G_dx_dx_dx')
-                if self._lower <= generic_set.l_size + 3 <= self._upper:
-                    if self._with_embedding:
-                        return comps_to_nx_planar_embedding(generic_set)
-                    else:
-                        return comps_to_nx_graph(generic_set)
+            if self._two_phase:
+                generic_set = self._grammar.sample_two_phase(
+                    'G_dx_dx_dx', self._is_acceptable, REAL_DISSECTION_RULES)
+            else:
+                while True:
+                    generic_set = self._grammar.sample_iterative('G_dx_dx_dx')
+                    if self._lower <= generic_set.l_size + 3 <= self._upper:
+                        break
+            return comps_to_compact(generic_set)
 
     def _sample_multiproc(self):
-        cpu_count = multiproc.cpu_count()
-        processes_queue = multiproc.Queue()
-
-        def multiproc_target_func(self, queue):
-            res = self._sample_single_proc()
-            queue.put(res)
-
-        processes = [
-            multiproc.Process(
-                target=multiproc_target_func,
-                args=(self, processes_queue))
-            for _ in range(cpu_count)]
-
-        for p in processes:
-            p.daemon = True
-            p.start()
-
-        # Wait for the first result.
-        result = processes_queue.get()
-        # Terminate the other processes and return result.
-        for p in processes:
-            p.terminate()
-        return result
+        # The results are returned in the order of submission, so the
+        # distribution is not biased towards graphs that are sampled fast.
+        pool = self._get_pool(None)
+        while len(self._pending) < self._pool_size:
+            slot = self._acquire_slot()
+            self._pending.append(
+                (slot, pool.apply_async(_sample_in_worker, (slot,))))
+        slot, async_result = self._pending.popleft()
+        try:
+            return self._decode(self._receive(async_result.get()))
+        finally:
+            self._release_slot(slot)
+
+    def sample_many(self, k, n_jobs=None, compact=False):
+        """Samples k graphs in parallel by a pool of worker processes.
+
+        The pool is started on first use and kept until `close` is called.
+        Each worker holds its own grammar and an independent random stream.
+
+        Parameters
+        ----------
+        k : int
+            Number of graphs.
+        n_jobs : int, optional (default=number of CPUs)
+            Number of worker processes.
+        compact : bool, optional (default=False)
+            Yield the graphs as `CompactGraph` objects. With shared memory
+            transport, their arrays are views into the ring buffer which are
+            overwritten once n_jobs further graphs have been taken from the
+            pool, use `CompactGraph.copy` to keep them.
+
+        Yields
+        ------
+        G : Graph
+            The graphs in the order in which the workers finish them. Only
+            the complete set of k graphs is uniformly distributed, stopping
+            early favours graphs that are faster to sample.
+        """
+        pool = self._get_pool(n_jobs)
+        results = queue.Queue()
+        # Slots of the graphs handed out as views into the ring buffer.
+        handed_out = collections.deque()
+
+        def submit():
+            slot = self._acquire_slot()
+            pool.apply_async(_sample_in_worker, (slot,),
+                             callback=lambda res: results.put((slot, res)),
+                             error_callback=lambda e: results.put((slot, e)))
+
+        submitted = 0
+        received = 0
+        try:
+            # Keep each worker busy with one graph.
+            while submitted < min(k, self._pool_size):
+                submit()
+                submitted += 1
+            while received < k:
+                slot, res = results.get()
+                received += 1
+                if isinstance(res, BaseException):
+                    self._release_slot(slot)
+                    raise res
+                graph = self._receive(res)
+                if compact:
+                    handed_out.append(slot)
+                    if len(handed_out) > self._pool_size:
+                        self._release_slot(handed_out.popleft())
+                else:
+                    graph = self._decode(graph)
+                    self._release_slot(slot)
+                if submitted < k:
+                    submit()
+                    submitted += 1
+                yield graph
+        finally:
+            # Wait for the graphs still being sampled, so that their slots
+            # can be reused.
+            while received < submitted:
+                slot, _ = results.get()
+                received += 1
+                self._release_slot(slot)
+            for slot in handed_out:
+                self._release_slot(slot)
+
+    def _acquire_slot(self):
+        if self._ring is None:
+            return None
+        return self._ring.acquire()
+
+    def _release_slot(self, slot):
+        if slot is not None:
+            self._ring.release(slot)
+
+    def _receive(self, res):
+        """Turns the result of a worker into a CompactGraph."""
+        if isinstance(res, CompactGraph):
+            # Sent through the pipe.
+            return res
+        slot, header = res
+        return self._ring.read(slot, header)
+
+    def _get_pool(self, n_jobs):
+        if n_jobs is None:
+            n_jobs = multiproc.cpu_count() if self._pool is None \
+                else self._pool_size
+        if self._pool is not None and n_jobs != self._pool_size:
+            self.close()
+        if self._pool is None:
+            # Independent seeds of the workers, derived from the active
+            # random source so that pybo.seed makes them reproducible.
+            base_seed = pybo.get_random_source().randrange(2 ** 31)
+            args = dict(n=self._n, epsilon=self._eps,
+                        require_connected=self._require_connected,
+                        with_embedding=self._with_embedding,
+                        two_phase=self._two_phase)
+            ring_args = None
+            if self._shared_memory:
+                # n_jobs slots are being written, n_jobs are handed out.
+                self._ring = SharedMemoryRing(
+                    2 * n_jobs, CompactGraph.max_nbytes(self._upper))
+                ring_args = (self._ring.num_slots, self._ring.slot_nbytes,
+                             self._ring.name)
+            self._pool = multiproc.Pool(
+                n_jobs, initializer=_init_worker,
+                initargs=(args, base_seed, multiproc.Value('i', 0),
+                          ring_args))
+            self._pool_size = n_jobs
+        return self._pool
+
+    def close(self):
+        """Shuts down the worker pool after the running samples are done."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = None
+            self._pending.clear()
+        if self._ring is not None:
+            self._ring.close(unlink=True)
+            self._ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+# The generator and ring buffer of a worker process, see
+# `PlanarGraphGenerator._get_pool`.
+_worker_generator = None
+_worker_ring = None
+
+
+def _init_worker(kwargs, base_seed, counter, ring_args):
+    global _worker_generator, _worker_ring
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    # pybo.seed(s) also uses s + 1 for the building random source.
+    pybo.seed(base_seed + 2 * index)
+    _worker_generator = PlanarGraphGenerator(**kwargs)
+    if ring_args is not None:
+        num_slots, slot_nbytes, name = ring_args
+        _worker_ring = SharedMemoryRing(num_slots, slot_nbytes, name)
+
+
+def _sample_in_worker(slot):
+    # Only the compact format is sent back to the parent process.
+    graph = _worker_generator._sample_compact()
+    if slot is not None:
+        header = _worker_ring.write(slot, graph)
+        if header is not None:
+            return slot, header
+    return graph
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Transport of sampled graphs from worker processes to the parent process
+through shared memory.
+"""
+
+import collections
+from multiprocessing import shared_memory
+
+from planar_graph_sampler.combinatorial_classes.compact_graph import CompactGraph
+
+__all__ = ['SharedMemoryRing']
+
+
+class SharedMemoryRing(object):
+    """
+    Ring buffer of fixed size slots in shared memory holding `CompactGraph`
+    objects.
+
+    The parent process creates the ring and assigns a free slot to each task,
+    the worker writes the graph into the slot and only sends back the small
+    header. The parent then reads the graph as views into the slot.
+
+    Parameters
+    ----------
+    num_slots : int
+    slot_nbytes : int
+        Size of a slot in bytes.
+    name : str, optional (default=None)
+        Attaches to the ring with this name, creates a new ring if not given.
+    """
+
+    def __init__(self, num_slots, slot_nbytes, name=None):
+        self.num_slots = num_slots
+        self.slot_nbytes = slot_nbytes
+        if name is None:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=num_slots * slot_nbytes)
+            self._free = collections.deque(range(num_slots))
+        else:
+            # Workers share the resource tracker of the parent process, where
+            # the memory is registered already, so attaching does not make
+            # the tracker unlink it when a worker exits.
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._free = None
+
+    @property
+    def name(self):
+        """Name under which workers attach to the ring."""
+        return self._shm.name
+
+    def acquire(self):
+        """Takes a free slot.
+
+        Returns
+        -------
+        int or None
+            The slot, None if there is no free slot.
+        """
+        if self._free:
+            return self._free.popleft()
+        return None
+
+    def release(self, slot):
+        """Gives a slot back, graphs read from it become invalid once the
+        slot is written again."""
+        self._free.append(slot)
+
+    def write(self, slot, graph):
+        """Writes a graph into a slot.
+
+        Parameters
+        ----------
+        slot : int
+        graph : CompactGraph
+
+        Returns
+        -------
+        tuple or None
+            The header for `read`, None if the graph does not fit into a slot.
+        """
+        if graph.nbytes > self.slot_nbytes:
+            return None
+        return graph.write_to(self._shm.buf, slot * self.slot_nbytes)
+
+    def read(self, slot, header):
+        """Reads a graph from a slot without copying.
+
+        Parameters
+        ----------
+        slot : int
+        header : tuple
+            As returned by `write`.
+
+        Returns
+        -------
+        CompactGraph
+        """
+        return CompactGraph.from_buffer(self._shm.buf,
+                                        slot * self.slot_nbytes, header)
+
+    def close(self, unlink=False):
+        """Detaches from the shared memory.
+
+        Parameters
+        ----------
+        unlink : bool, optional (default=False)
+            Also frees the shared memory, only for the creator of the ring.
+        """
+        try:
+            self._shm.close()
+        except BufferError:
+            # Graphs read from the ring are still alive, the memory is
+            # unmapped when they are gone.
+            pass
+        if unlink:
+            self._shm.unlink()
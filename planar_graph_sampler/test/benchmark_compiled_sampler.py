@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Compares the sampling speed of the compiled sampling program with the
+iterative sampler for each layer of the planar graph grammar.
+
+For every layer the same random seeds are used for both engines, so the script
+also checks that the sampled objects have the same sizes.
+"""
+
+from __future__ import division, print_function
+
+import sys
+from timeit import default_timer as timer
+
+import pyboltzmann as pybo
+from planar_graph_sampler.evaluations_planar_graph import *
+from planar_graph_sampler.grammar.binary_tree_decomposition import \
+    binary_tree_grammar
+from planar_graph_sampler.grammar.irreducible_dissection_decomposition \
+    import irreducible_dissection_grammar
+from planar_graph_sampler.grammar.three_connected_decomposition import \
+    three_connected_graph_grammar
+from planar_graph_sampler.grammar.network_decomposition import \
+    network_grammar
+from planar_graph_sampler.grammar.two_connected_decomposition import \
+    two_connected_graph_grammar
+from planar_graph_sampler.grammar.one_connected_decomposition import \
+    one_connected_graph_grammar
+from planar_graph_sampler.grammar.planar_graph_decomposition import \
+    planar_graph_grammar
+
+LAYERS = [
+    # (name, grammar, sampled class, symbolic x, symbolic y)
+    ('binary trees', binary_tree_grammar, 'K',
+     'x*G_1_dx(x,y)', 'D(x*G_1_dx(x,y),y)'),
+    ('irreducible dissections', irreducible_dissection_grammar, 'J_a',
+     'x*G_1_dx(x,y)', 'D(x*G_1_dx(x,y),y)'),
+    ('three-connected', three_connected_graph_grammar, 'G_3_arrow',
+     'x*G_1_dx(x,y)', 'D(x*G_1_dx(x,y),y)'),
+    ('networks', network_grammar, 'D', 'x*G_1_dx(x,y)', 'y'),
+    ('two-connected', two_connected_graph_grammar, 'G_2_dx',
+     'x*G_1_dx(x,y)', 'y'),
+    ('one-connected', one_connected_graph_grammar, 'G_1_dx_dx_dx', 'x', 'y'),
+    ('planar', planar_graph_grammar, 'G_dx_dx_dx', 'x', 'y'),
+]
+
+
+def run(grammar, sampled_class, num_samples, seed):
+    pybo.seed(seed)
+    start = timer()
+    sizes = [(obj.l_size, obj.u_size) for obj in
+             (grammar.sample_iterative(sampled_class)
+              for _ in range(num_samples))]
+    return timer() - start, sizes
+
+
+def benchmark_layer(grammar_factory, sampled_class, symbolic_x, symbolic_y,
+                    num_samples, seed=0):
+    # Each grammar factory registers the created grammar for early rejection,
+    # so the grammar must be used right after its creation.
+    grammar = grammar_factory()
+    grammar.init(sampled_class, symbolic_x, symbolic_y)
+    time_iterative, sizes_iterative = run(
+        grammar, sampled_class, num_samples, seed)
+    start = timer()
+    grammar.init(sampled_class, symbolic_x, symbolic_y, compiled=True)
+    time_compile = timer() - start
+    time_compiled, sizes_compiled = run(
+        grammar, sampled_class, num_samples, seed)
+    if sizes_compiled != sizes_iterative:
+        raise pybo.PyBoltzmannError(
+            "{}: compiled program samples different objects".format(
+                sampled_class))
+    return time_iterative, time_compiled, time_compile, len(grammar.program)
+
+
+def main(num_samples=100, evals=my_evals_100):
+    pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(evals)
+    print("{:24s} {:>12s} {:>8s} {:>10s} {:>10s} {:>8s}".format(
+        'layer', 'class', 'nodes', 'iterative', 'compiled', 'speedup'))
+    for name, grammar_factory, sampled_class, x, y in LAYERS:
+        time_iterative, time_compiled, _, size = benchmark_layer(
+            grammar_factory, sampled_class, x, y, num_samples)
+        print("{:24s} {:>12s} {:>8d} {:>9.3f}s {:>9.3f}s {:>7.2f}x".format(
+            name, sampled_class, size, time_iterative, time_compiled,
+            time_iterative / time_compiled))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Compares the strategies for approximate-size sampling of planar graphs with
+n(1-eps) to n(1+eps) nodes: plain rejection, the size limits (anticipated
+rejection) and two-phase sampling.
+
+Usage: benchmark_planar_graph_generator.py [100|1000] [num_samples]
+"""
+
+from __future__ import division, print_function
+
+import sys
+from timeit import default_timer as timer
+
+import pyboltzmann as pybo
+from planar_graph_sampler.evaluations_planar_graph import my_evals_100, \
+    my_evals_1000
+from planar_graph_sampler.grammar.planar_graph_decomposition import \
+    planar_graph_grammar
+from planar_graph_sampler.grammar.three_connected_decomposition import \
+    REAL_DISSECTION_RULES
+
+
+def sample_plain(grammar, alias, is_acceptable):
+    while True:
+        obj = grammar.sample_iterative(alias)
+        if is_acceptable(obj):
+            return obj
+
+
+def sample_two_phase(grammar, alias, is_acceptable):
+    return grammar.sample_two_phase(alias, is_acceptable,
+                                    REAL_DISSECTION_RULES)
+
+
+def main(n=100, num_samples=20, epsilon=0.1, seed=0):
+    evals = my_evals_100 if n <= 100 else my_evals_1000
+    pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(evals)
+    lower, upper = n * (1 - epsilon), n * (1 + epsilon)
+    grammar = planar_graph_grammar()
+    grammar.init('G_dx_dx_dx', compiled=True)
+
+    def is_acceptable(obj):
+        return lower <= obj.l_size + 3 <= upper
+
+    print("{:14s} {:12s} {:>12s} {:>12s}".format(
+        'class', 'strategy', 'no limits', 'size limits'))
+    for alias in ['G_1_dx_dx_dx', 'G_dx_dx_dx']:
+        for name, sample in [('plain', sample_plain),
+                             ('two-phase', sample_two_phase)]:
+            times = []
+            for limit in [None, upper]:
+                grammar.set_size_limits(limit)
+                pybo.seed(seed)
+                start = timer()
+                for _ in range(num_samples):
+                    sample(grammar, alias, is_acceptable)
+                times.append((timer() - start) / num_samples)
+            grammar.set_size_limits()
+            print("{:14s} {:12s} {:>11.3f}s {:>11.3f}s".format(
+                alias, name, *times))
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
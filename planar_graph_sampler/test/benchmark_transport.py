@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Compares the transport of graphs from worker processes to the parent process
+through pipes with the shared-memory ring buffer.
+
+The workers send a fixed triangulated grid instead of sampled graphs, so that
+only the transport is measured. The parent touches every neighbour of each
+received graph.
+"""
+
+from __future__ import division, print_function
+
+import multiprocessing as multiproc
+import sys
+from timeit import default_timer as timer
+
+import numpy as np
+
+from planar_graph_sampler.combinatorial_classes.compact_graph import \
+    CompactGraph
+from planar_graph_sampler.shared_memory_ring import SharedMemoryRing
+
+SIZES = [10 ** 4, 10 ** 5, 10 ** 6]
+
+_grid = None
+_ring = None
+
+
+def triangulated_grid(n):
+    """Planar grid graph with about n nodes and a diagonal in each square."""
+    k = int(np.sqrt(n))
+    nodes = np.arange(k * k, dtype=np.int32)
+    rows, cols = np.divmod(nodes, k)
+    # The neighbours in ccw order.
+    directions = [(0, 1), (-1, 1), (-1, 0), (0, -1), (1, -1), (1, 0)]
+    rotations = []
+    for dr, dc in directions:
+        r, c = rows + dr, cols + dc
+        valid = (0 <= r) & (r < k) & (0 <= c) & (c < k)
+        rotations.append(np.where(valid, r * k + c, -1))
+    rotations = np.stack(rotations, axis=1)
+    valid = rotations >= 0
+    offsets = np.concatenate([[0], np.cumsum(valid.sum(axis=1))])
+    return CompactGraph(nodes, offsets.astype(np.int32),
+                        rotations[valid].astype(np.int32))
+
+
+def _init_worker(n, ring_args):
+    global _grid, _ring
+    _grid = triangulated_grid(n)
+    if ring_args is not None:
+        _ring = SharedMemoryRing(*ring_args)
+
+
+def _send(slot):
+    if slot is None:
+        return _grid
+    return slot, _ring.write(slot, _grid)
+
+
+def run(n, k, n_jobs, shared_memory):
+    ring = None
+    ring_args = None
+    if shared_memory:
+        ring = SharedMemoryRing(2 * n_jobs, CompactGraph.max_nbytes(n))
+        ring_args = ring.num_slots, ring.slot_nbytes, ring.name
+    pool = multiproc.Pool(n_jobs, _init_worker, (n, ring_args))
+    # Wait for the workers to build the grid.
+    pool.map(_send, [None] * n_jobs)
+    start = timer()
+    pending = []
+    checksum = 0
+    for i in range(k + n_jobs):
+        if i >= n_jobs:
+            slot, async_result = pending.pop(0)
+            res = async_result.get()
+            graph = ring.read(*res) if shared_memory else res
+            checksum += int(graph.neighbours.sum())
+            del graph
+            if shared_memory:
+                ring.release(slot)
+        if i < k:
+            slot = ring.acquire() if shared_memory else None
+            pending.append((slot, pool.apply_async(_send, (slot,))))
+    elapsed = timer() - start
+    pool.close()
+    pool.join()
+    if ring is not None:
+        ring.close(unlink=True)
+    return elapsed, checksum
+
+
+def main(k=20, n_jobs=2):
+    for n in SIZES:
+        pipe, checksum_pipe = run(n, k, n_jobs, False)
+        shm, checksum_shm = run(n, k, n_jobs, True)
+        assert checksum_pipe == checksum_shm
+        print("n={:>8} pipe {:.4f}s/graph shared memory {:.4f}s/graph "
+              "speedup {:.1f}x".format(n, pipe / k, shm / k, pipe / shm))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
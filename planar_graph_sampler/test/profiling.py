@@ -1,60 +1,65 @@
-import cProfile
-import pstats
-import random
+"""
+Profiles the sampling of planar graphs.
+
+Usage: python profiling.py [trace|cprofile]
 
-from planar_graph_sampler.grammar.binary_tree_decomposition import binary_tree_grammar
-from planar_graph_sampler.grammar.irreducible_dissection_decomposition import irreducible_dissection_grammar
+trace (default)
+    Records the call tree of the grammar rules and transformations while a
+    graph with about 1000 nodes is sampled. Writes sampling.folded (collapsed
+    stacks for flamegraph.pl, inferno or speedscope) and sampling_trace.json
+    (for chrome://tracing or Perfetto).
+cprofile
+    Runs cProfile and writes the statistics to restats.
+"""
 
-# random.seed(2)
+import cProfile
+import pstats
+import sys
 
+import pyboltzmann as pybo
 from pyboltzmann.evaluation_oracle import EvaluationOracle
 from pyboltzmann.generic_samplers import BoltzmannSamplerBase
-from pyboltzmann.utils import boltzmann_framework_random_gen
 from planar_graph_sampler.evaluations_planar_graph import *
-
-from planar_graph_sampler.grammar.one_connected_decomposition import one_connected_graph_grammar
-
-import sys
-
 from planar_graph_sampler.grammar.planar_graph_decomposition import planar_graph_grammar
+from planar_graph_sampler.grammar.three_connected_decomposition import REAL_DISSECTION_RULES
 
 
-def run_profiler():
-    oracle = EvaluationOracle(my_evals_10000)
-    BoltzmannSamplerBase.oracle = oracle
-    BoltzmannSamplerBase.debug_mode = False
+def run_profiler(instrumentation=None, n=1000, epsilon=0.1):
+    """Samples a graph like `PlanarGraphGenerator(n, epsilon)`, the trace
+    contains the rejected dummy attempts of the first phase."""
+    BoltzmannSamplerBase.oracle = EvaluationOracle(my_evals_1000)
 
     grammar = planar_graph_grammar()
-    grammar.init()
-    symbolic_x = 'x'
-    symbolic_y = 'y'
-    sampled_class = 'G_dx_dx_dx'
-    # symbolic_x = 'x*G_1_dx(x,y)'
-    # symbolic_y = 'D(x*G_1_dx(x,y),y)'
-    # sampled_class = 'K_dx_dx'
-    # print(grammar.collect_oracle_queries(sampled_class, symbolic_x, symbolic_y))
-    grammar._precompute_evals(sampled_class, symbolic_x, symbolic_y)
-
-    # random.seed(0)
-    # boltzmann_framework_random_gen.seed(13)
-
-    l_sizes = []
-    i = 0
-    samples = 1
-    while i < samples:
-        obj = grammar.sample_iterative(sampled_class, symbolic_x, symbolic_y)
-        l_sizes.append(obj.l_size)
-        print(obj.l_size)
-        i += 1
-    print()
-    print("avg. size: {}".format(sum(l_sizes) / len(l_sizes)))
+    grammar.init('G_dx_dx_dx', compiled=True)
+    grammar.instrumentation = instrumentation
+    lower = n * (1 - epsilon)
+    upper = n * (1 + epsilon)
+    grammar.set_size_limits(max_l_size=upper)
+
+    def is_acceptable(dummy):
+        return lower <= dummy.l_size + 3 <= upper
+
+    obj = grammar.sample_two_phase('G_dx_dx_dx', is_acceptable,
+                                   REAL_DISSECTION_RULES)
+    print("l-size: {}".format(obj.l_size))
 
 
 if __name__ == "__main__":
-    # random.seed(1)
-    # run_profiler()
-    stats = {}
-    cProfile.run('run_profiler()', 'restats')
-    p = pstats.Stats('restats')
-    # p.strip_dirs().sort_stats('time').print_stats(50)
-    # p.strip_dirs().sort_stats('cumtime').print_stats(50)
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'trace'
+    if mode == 'trace':
+        trace = pybo.SamplingTrace()
+        run_profiler(trace)
+        trace.write_collapsed_stacks('sampling.folded')
+        trace.write_chrome_trace('sampling_trace.json')
+        # The rules and transformations with the largest self time.
+        self_times = {}
+        for stack, self_time in trace.collapsed_stacks().items():
+            label = stack.rsplit(';', 1)[-1]
+            self_times[label] = self_times.get(label, 0.0) + self_time
+        for label, self_time in sorted(self_times.items(),
+                                       key=lambda item: -item[1])[:20]:
+            print("{:8.4f}s {}".format(self_time, label))
+    else:
+        cProfile.run('run_profiler()', 'restats')
+        p = pstats.Stats('restats')
+        p.strip_dirs().sort_stats('cumtime').print_stats(50)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import pickle
+
+import networkx as nx
+
+import pyboltzmann as pybo
+from planar_graph_sampler.combinatorial_classes.compact_graph import CompactGraph
+from planar_graph_sampler.evaluations_planar_graph import my_evals_100
+from planar_graph_sampler.grammar.one_connected_decomposition import one_connected_graph_grammar
+
+
+def sample_graphs(num_samples):
+    pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(my_evals_100)
+    grammar = one_connected_graph_grammar()
+    grammar.init('G_1_dx_dx_dx', compiled=True)
+    pybo.seed(4)
+    return [grammar.sample_iterative('G_1_dx_dx_dx').underive_all() for _ in range(num_samples)]
+
+
+class TestCompactGraph(object):
+
+    def test_round_trip(self):
+        for graph in sample_graphs(20):
+            compact = pickle.loads(pickle.dumps(graph.to_compact()))
+            nodes = graph.half_edge.node_dict()
+            assert compact.number_of_nodes == len(nodes)
+            assert compact.number_of_edges == graph.number_of_edges
+            G = compact.to_networkx_graph(relabel=False)
+            expected = set()
+            for he in graph.half_edge.get_all_half_edges(include_opp=False, include_unpaired=False):
+                expected.add(frozenset([he.node_nr, he.opposite.node_nr]))
+            assert set(frozenset(e) for e in G.edges) == expected
+            embedding = compact.to_planar_embedding(relabel=False)
+            embedding.check_structure()
+            # The rotation system is kept.
+            for node, half_edges in nodes.items():
+                ccw = [he.opposite.node_nr for he in half_edges if he.opposite is not None]
+                cw = list(embedding.neighbors_cw_order(node))
+                assert cw[::-1] in [ccw[i:] + ccw[:i] for i in range(max(len(ccw), 1))]
+            relabelled = compact.to_networkx_graph()
+            assert sorted(relabelled.nodes) == list(range(compact.number_of_nodes))
+            assert nx.is_isomorphic(relabelled, G)
+
+    def test_disjoint_union(self):
+        graphs = sample_graphs(5)
+        union = CompactGraph.disjoint_union(g.to_compact() for g in graphs)
+        assert union.number_of_nodes == sum(g.number_of_nodes for g in graphs)
+        assert union.number_of_edges == sum(g.number_of_edges for g in graphs)
+        G = union.to_networkx_graph(relabel=False)
+        assert nx.number_connected_components(G) == 5
+        union.to_planar_embedding(relabel=False).check_structure()
+        assert CompactGraph.disjoint_union([]).number_of_nodes == 0
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import pyboltzmann as pybo
+from planar_graph_sampler.evaluations_planar_graph import my_evals_100
+from planar_graph_sampler.grammar.binary_tree_decomposition import binary_tree_grammar
+from planar_graph_sampler.grammar.planar_graph_decomposition import planar_graph_grammar
+from planar_graph_sampler.grammar.three_connected_decomposition import REAL_DISSECTION_RULES
+
+
+def sample_sizes(grammar, alias, n):
+    pybo.seed(2)
+    return [(obj.l_size, obj.u_size) for obj in (grammar.sample_iterative(alias) for _ in range(n))]
+
+
+class TestDummySampling(object):
+
+    def test_binary_trees(self):
+        # Building binary trees does not use random numbers, so the dummies have exactly the sizes of the trees
+        # (including the early rejection).
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(my_evals_100)
+        for compiled in [False, True]:
+            grammar = binary_tree_grammar()
+            grammar.init('K_dx', 'x*G_1_dx(x,y)', 'D(x*G_1_dx(x,y),y)', compiled=compiled)
+            for alias in ['K', 'K_dx']:
+                real = sample_sizes(grammar, alias, 300)
+                grammar.dummy_sampling_mode()
+                assert sample_sizes(grammar, alias, 300) == real
+                grammar.real_sampling_mode()
+
+    def test_planar_graphs(self):
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(my_evals_100)
+        grammar = planar_graph_grammar()
+        grammar.init('G_dx_dx_dx', compiled=True)
+        grammar.dummy_sampling_mode()
+        pybo.seed(2)
+        for _ in range(100):
+            dummy = grammar.sample_iterative('G_dx_dx_dx')
+            assert isinstance(dummy, pybo.DummyClass)
+            assert dummy.l_size >= 0 and dummy.u_size >= 0
+        grammar.real_sampling_mode()
+        assert not isinstance(grammar.sample_iterative('G_dx_dx_dx'), pybo.DummyClass)
+
+    def test_two_phase(self):
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(my_evals_100)
+        grammar = planar_graph_grammar()
+        grammar.init('G_dx_dx_dx', compiled=True)
+
+        def is_acceptable(dummy):
+            return 20 <= dummy.l_size + 3 <= 30
+
+        pybo.seed(4)
+        expected = []
+        while len(expected) < 5:
+            g = grammar.sample_iterative('G_1_dx_dx_dx').underive_all()
+            if 20 <= g.number_of_nodes <= 30:
+                expected.append((g.number_of_nodes, g.number_of_edges))
+        pybo.seed(4)
+        graphs = [grammar.sample_two_phase('G_1_dx_dx_dx', is_acceptable, REAL_DISSECTION_RULES).underive_all()
+                  for _ in range(5)]
+        assert [(g.number_of_nodes, g.number_of_edges) for g in graphs] == expected
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import os
+import shutil
+import tempfile
+
+import pyboltzmann as pybo
+from planar_graph_sampler.evaluation_solver import \
+    compute_planar_graph_evals, planar_graph_evals_for_size, \
+    planar_graph_singularity, planar_graph_x_for_size
+from planar_graph_sampler.evaluations_planar_graph import my_evals_100, \
+    my_evals_1000
+from planar_graph_sampler.grammar.planar_graph_decomposition import \
+    planar_graph_grammar
+
+
+def relative_error(a, b):
+    return abs(a / b - 1)
+
+
+class TestEvaluationSolver(object):
+
+    def test_singularity(self):
+        # From the worksheet, computed with 50 digits.
+        rho = 0.03672841258183822029347661718403540814476271321757
+        assert relative_error(planar_graph_singularity(), rho) < 1e-13
+        assert relative_error(planar_graph_x_for_size(100),
+                              my_evals_100['x']) < 1e-13
+
+    def test_tables(self):
+        for table in [my_evals_100, my_evals_1000]:
+            evals = compute_planar_graph_evals(table['x'], cache=False)
+            for key, value in table.items():
+                assert relative_error(evals[key], value) < 1e-9, key
+
+    def test_grammar_queries(self):
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle(
+            planar_graph_evals_for_size(50, cache=False))
+        grammar = planar_graph_grammar()
+        # Raises if a query is missing.
+        grammar.init('G_dx_dx_dx')
+
+    def test_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            evals = planar_graph_evals_for_size(20, cache_dir=cache_dir)
+            files = os.listdir(cache_dir)
+            assert len(files) == 1
+            assert planar_graph_evals_for_size(
+                20, cache_dir=cache_dir) == evals
+            assert os.listdir(cache_dir) == files
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_beyond_singularity(self):
+        try:
+            compute_planar_graph_evals(0.04, cache=False)
+        except pybo.PyBoltzmannError:
+            pass
+        else:
+            assert False
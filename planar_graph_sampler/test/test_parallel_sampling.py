@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import networkx as nx
+
+import pyboltzmann as pybo
+from planar_graph_sampler.planar_graph_generator import PlanarGraphGenerator
+
+
+class TestParallelSampling(object):
+
+    def test_sample_many(self):
+        pybo.seed(1)
+        with PlanarGraphGenerator(30, with_embedding=False) as generator:
+            graphs = list(generator.sample_many(4, n_jobs=2))
+            # The pool is kept for further calls.
+            pool = generator._pool
+            graphs += list(generator.sample_many(2))
+            assert generator._pool is pool
+        assert generator._pool is None
+        assert len(graphs) == 6
+        for G in graphs:
+            assert 27 <= G.number_of_nodes() <= 33
+            assert nx.is_connected(G)
+            assert nx.check_planarity(G)[0]
+        # The workers use independent random streams.
+        assert len(set(G.number_of_edges() for G in graphs)) > 1
+
+    def test_allow_multiproc(self):
+        generator = PlanarGraphGenerator(30, with_embedding=False,
+                                         allow_multiproc=True)
+        try:
+            assert 27 <= generator.sample().number_of_nodes() <= 33
+        finally:
+            generator.close()
+
+    def test_shared_memory(self):
+        pybo.seed(2)
+        with PlanarGraphGenerator(30, with_embedding=False,
+                                  shared_memory=True) as generator:
+            for G in generator.sample_many(3, n_jobs=2):
+                assert 27 <= G.number_of_nodes() <= 33
+                assert nx.check_planarity(G)[0]
+            # Views into the ring stay valid until n_jobs further graphs
+            # are taken.
+            graphs = []
+            for compact in generator.sample_many(4, compact=True):
+                graphs.append((compact, compact.copy()))
+                if len(graphs) > 1:
+                    view, copy = graphs[-2]
+                    assert (view.neighbours == copy.neighbours).all()
+            for view, copy in graphs[-2:]:
+                assert (view.neighbours == copy.neighbours).all()
+            for _, copy in graphs:
+                G = copy.to_networkx_graph()
+                assert 27 <= G.number_of_nodes() <= 33
+                assert nx.is_connected(G)
+                assert nx.check_planarity(G)[0]
+        assert generator._ring is None
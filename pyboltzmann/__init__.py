@@ -16,12 +16,16 @@
 #            "evaluation_oracle",
 #            "utils"]
 
+from pyboltzmann.analysis import *
 from pyboltzmann.class_builder import *
+from pyboltzmann.compiled_sampler import *
 from pyboltzmann.decomposition_grammar import *
 from pyboltzmann.evaluation_oracle import *
 from pyboltzmann.generic_classes import *
 from pyboltzmann.generic_samplers import *
+from pyboltzmann.instrumentation import *
 from pyboltzmann.iterative_sampler import *
+from pyboltzmann.random_source import *
 from pyboltzmann.utils import *
 
 
@@ -0,0 +1,712 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Static analysis of the Boltzmann distributions of an initialized grammar.
+
+The sizes and the sampling cost are computed from the precomputed evaluations
+and branch probabilities only, nothing is sampled. This allows to predict the
+cost of rejection sampling for a target size before sampling.
+"""
+
+import math
+
+import pyboltzmann as pybo
+from pyboltzmann.compiled_sampler import _ATOM, _SUM, _PROD, _TRANSFORM, \
+    _REJECTION, _U_DER_FROM_L_DER, _L_DER_FROM_U_DER, _SET, _L_SUBS, \
+    _U_SUBS, _CHOICE
+
+__all__ = ['GrammarAnalysis']
+
+# Indices of the moments of the sizes: E[L], E[U], E[L²], E[U²], E[LU].
+_L, _U, _LL, _UU, _LU = range(5)
+# Index of the expected number of visits.
+_V = 5
+
+
+class GrammarAnalysis(object):
+    """
+    Moments of the l-size and u-size and the expected sampling cost of the
+    rules of an initialized grammar.
+
+    The moments follow from the branch probabilities and the parameters of the
+    set and substitution samplers. Some quantities are approximations:
+
+    * A rejection sampler accepts with the probability given by the ratio of
+      its evaluation to the one of the underlying class. The sizes of the
+      accepted objects are assumed to be distributed like the ones of the
+      underlying class.
+    * A change of the derived atom accepts an object with the probability
+      given by its sizes (see `UDerFromLDerSampler`), the acceptance rate is
+      computed from the expected sizes.
+    * Transformations are assumed to shift the sizes by constants. The shifts
+      are found by applying the dummy transformation to `DummyClass` objects,
+      transformations that cannot be probed are assumed to preserve the sizes.
+    * Restarts are not taken into account.
+
+    The evaluations of some grammars leave out factors of the generating
+    functions (e.g. symmetries), which makes the acceptance probabilities of
+    their rejection samplers wrong. Measured probabilities can be given for
+    them instead.
+
+    The cost of sampling is measured in visits, i.e. the number of times the
+    nodes of the `SamplingProgram` of the grammar are entered. The visits of
+    the rules are comparable to the ones counted by `RuleStatistics`.
+
+    Parameters
+    ----------
+    grammar : DecompositionGrammar
+        An initialized grammar.
+    acceptance_probabilities : dict, optional (default=None)
+        Maps the labels of rejection samplers (see
+        `DecompositionGrammar.rejection_statistics`) to their acceptance
+        probabilities.
+    """
+
+    def __init__(self, grammar, acceptance_probabilities=None):
+        if not grammar._initialized:
+            pybo.DecompositionGrammar._grammar_not_initialized_error()
+        self.grammar = grammar
+        if acceptance_probabilities is None:
+            acceptance_probabilities = {}
+        self.acceptance_probabilities = acceptance_probabilities
+        # Compiled with an instrumentation, so each rule is a node.
+        self._program = pybo.SamplingProgram(grammar, pybo.Instrumentation())
+        p = self._program
+        n = len(p)
+        self._children = [self._child_nodes(i) for i in range(n)]
+        self._components = self._strongly_connected_components()
+        self._shifts = [self._shift(i) for i in range(n)]
+        self._weighted = self._weighted_transformations()
+        self._values = [[0.0] * n for _ in range(6)]
+        self._solve((_L, _U, _LL, _UU, _LU), self._components, self._moments)
+        # Expected visits per rule, computed on demand for each root.
+        self._visits = {}
+
+    def _child_nodes(self, i):
+        p = self._program
+        op = p.ops[i]
+        if op == _ATOM:
+            return []
+        if op == _CHOICE:
+            return list(p.first[i])
+        if op in (_SUM, _PROD, _L_SUBS, _U_SUBS):
+            return [p.first[i], p.second[i]]
+        return [p.first[i]]
+
+    def _strongly_connected_components(self):
+        """Tarjan's algorithm (iterative).
+
+        Returns
+        -------
+        list of list of int
+            The components in reverse topological order, i.e. the children
+            of a node come before it.
+        """
+        n = len(self._program)
+        index = [None] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        components = []
+        counter = 0
+        for root in range(n):
+            if index[root] is not None:
+                continue
+            work = [(root, 0)]
+            while work:
+                v, k = work.pop()
+                if k == 0:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = True
+                children = self._children[v]
+                if k < len(children):
+                    work.append((v, k + 1))
+                    w = children[k]
+                    if index[w] is None:
+                        work.append((w, 0))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                    continue
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[v])
+        return components
+
+    def _shift(self, i):
+        """Constant shift (l, u) of the sizes applied by node i."""
+        p = self._program
+        op = p.ops[i]
+        if op == _U_DER_FROM_L_DER:
+            return 1, -1
+        if op == _L_DER_FROM_U_DER:
+            return -1, 1
+        if op != _TRANSFORM:
+            return 0, 0
+        f = p.samplers[i].dummy_transformation
+        if f is None:
+            return 0, 0
+        try:
+            shifts = set()
+            for l_size, u_size in ((20, 30), (21, 30), (20, 31)):
+                obj = f(pybo.DummyClass(l_size, u_size))
+                shifts.add((obj.l_size - l_size, obj.u_size - u_size))
+        except Exception:
+            return 0, 0
+        if len(shifts) != 1:
+            # Not a constant shift.
+            return 0, 0
+        return shifts.pop()
+
+    def _evaluation_points(self):
+        """The arguments (x, y) at which the nodes are evaluated, as oracle
+        query strings, like in the precomputation of the evaluations.
+        """
+        p = self._program
+        points = [None] * len(p)
+        root = p.entry_point(self.grammar._target_rule)
+        points[root] = self.grammar._target_x, self.grammar._target_y
+        stack = [root]
+        while stack:
+            i = stack.pop()
+            x, y = points[i]
+            children = [(j, x, y) for j in self._children[i]]
+            if p.ops[i] == _L_SUBS:
+                children[0] = (p.first[i],
+                               p.samplers[i].rhs.oracle_query_string(x, y), y)
+            elif p.ops[i] == _U_SUBS:
+                children[0] = (p.first[i], x,
+                               p.samplers[i].rhs.oracle_query_string(x, y))
+            for j, x_j, y_j in children:
+                if points[j] is None:
+                    points[j] = x_j, y_j
+                    stack.append(j)
+        return points
+
+    def _weighted_transformations(self):
+        """Finds the nodes that reweight the distribution of the underlying
+        class by the derived size.
+
+        These are the changes of the derived atom and the transformations from
+        a derived class to the underived class, whose evaluation differs from
+        the one of the underlying class because the sampler rejects objects
+        (e.g. by restarts) depending on their size.
+
+        Returns
+        -------
+        dict
+            Maps the nodes to triples (s, e, w). The underlying objects are
+            derived in the size s (_L or _U) and reweighted by t^e / (s + 1)
+            where t is the other size, w is the exact expectation of this
+            weight which follows from the evaluations.
+        """
+        p = self._program
+        oracle = pybo.BoltzmannSamplerBase.oracle
+        weighted = {}
+        points = None
+        for i, op in enumerate(p.ops):
+            if op == _TRANSFORM and self._shifts[i] in ((1, 0), (0, 1)):
+                s = _L if self._shifts[i] == (1, 0) else _U
+                e = 0
+            elif op == _U_DER_FROM_L_DER:
+                s, e = _L, 1
+            elif op == _L_DER_FROM_U_DER:
+                s, e = _U, 1
+            else:
+                continue
+            evl = p.samplers[i]._precomputed_eval
+            evl_child = p.samplers[p.first[i]]._precomputed_eval
+            if e == 0 and abs(evl - evl_child) <= 1e-12 * abs(evl):
+                # A bijection.
+                continue
+            if points is None:
+                points = self._evaluation_points()
+            x, y = (oracle.get(v) for v in points[i])
+            if s == _U:
+                x, y = y, x
+            # Boltzmann identities, x is the variable of the derived size now.
+            # The underlying class is C_dx, for e = 0 the node samples from C
+            # and w = E[1/(s + 1)] = C / (x C_dx). For e = 1 the node samples
+            # from C_dy and w = E[t/(s + 1)] = y C_dy / (x C_dx).
+            if e == 0:
+                weighted[i] = s, e, evl / (x * evl_child)
+            else:
+                weighted[i] = s, e, y * evl / (x * evl_child)
+        return weighted
+
+    def _branches(self, i):
+        """Children of a sum node with their probabilities."""
+        p = self._program
+        if p.ops[i] == _SUM:
+            return [(p.params[i], p.first[i]), (1 - p.params[i], p.second[i])]
+        # Alias table: slot j yields summand j with probability probs[j] and
+        # summand aliases[j] otherwise.
+        summands, aliases, probs = p.first[i], p.second[i], p.params[i]
+        weights = [0.0] * len(summands)
+        for j, prob in enumerate(probs):
+            weights[j] += prob / len(summands)
+            weights[aliases[j]] += (1 - prob) / len(summands)
+        return list(zip(weights, summands))
+
+    def _set_size_moments(self, i):
+        """E[k] and E[k²] of the number of elements of a set node."""
+        p = self._program
+        d = p.second[i]
+        param = p.params[i][0]
+        if param == 0:
+            return float(d), float(d * d)
+        # Poisson distribution conditioned on k >= d.
+        total = mean = square = 0.0
+        prob = math.exp(-param)
+        k = 0
+        while k < d or prob > 1e-17 * max(total, 1e-300) or k < param:
+            if k >= d:
+                total += prob
+                mean += k * prob
+                square += k * k * prob
+            k += 1
+            prob *= param / k
+        return mean / total, square / total
+
+    def _acceptance_probability(self, i):
+        """Acceptance probability of the rejection nodes."""
+        p = self._program
+        op = p.ops[i]
+        child = p.first[i]
+        if op == _REJECTION and p.samplers[i].sampled_class \
+                in self.acceptance_probabilities:
+            prob = self.acceptance_probabilities[p.samplers[i].sampled_class]
+        elif op == _REJECTION:
+            prob = p.samplers[i]._precomputed_eval \
+                   / p.samplers[child]._precomputed_eval
+        elif op == _U_DER_FROM_L_DER or op == _L_DER_FROM_U_DER:
+            # The acceptance probability is params[i] * t/(s + 1).
+            prob = p.params[i] * self._weighted[i][2]
+        else:
+            return 1.0
+        return min(max(prob, 1e-12), 1.0)
+
+    def _moments(self, i):
+        """Equations of the moments of node i.
+
+        Returns
+        -------
+        dict
+            Maps the quantities to pairs (constant, terms), the terms are
+            triples (coefficient, quantity, node).
+        """
+        if i in self._weighted:
+            return self._weighted_moments(i)
+        equations = self._first_moments(i)
+        equations.update(self._second_moments(i))
+        return equations
+
+    def _weighted_moments(self, i):
+        """Moments of a node that reweights the objects of the underlying
+        class, see `_weighted_transformations`.
+
+        With S = s + 1 and T = t for the sizes of the underlying objects, the
+        moments of the reweighted distribution are E[S^j T^k T^e / S] / w.
+        The ones with j >= 1 are moments of the underlying class, for j = 0, T
+        is regressed linearly on S and E[1/S] is obtained from w.
+        """
+        m = self._values
+        a = self._program.first[i]
+        s, e, w = self._weighted[i]
+        if s == _L:
+            t, ss, tt = _U, _LL, _UU
+        else:
+            t, ss, tt = _L, _UU, _LL
+        # Moments of S and T.
+        mean_s, mean_t = m[s][a] + 1, m[t][a]
+        square_s = m[ss][a] + 2 * m[s][a] + 1
+        square_t = m[tt][a]
+        product = m[_LU][a] + mean_t
+        var_s = square_s - mean_s * mean_s
+        var_t = square_t - mean_t * mean_t
+        slope = (product - mean_s * mean_t) / var_s if var_s > 0 else 0.0
+        intercept = mean_t - slope * mean_s
+        residual = max(var_t - slope * slope * var_s, 0.0)
+        if e == 0:
+            inverse_s = w
+        elif abs(intercept) > 1e-9:
+            # w = E[T/S] = intercept * E[1/S] + slope.
+            inverse_s = (w - slope) / intercept
+        else:
+            inverse_s = 1 / mean_s
+        inverse_s = min(max(inverse_s, 0.0), 1.0)
+        # E[T^k / S] for k = 1, 2, 3.
+        t_by_s = intercept * inverse_s + slope
+        t2_by_s = (intercept ** 2 + residual) * inverse_s \
+            + 2 * intercept * slope + slope ** 2 * mean_s
+        t3_by_s = (intercept ** 3 + 3 * intercept * residual) * inverse_s \
+            + 3 * intercept ** 2 * slope \
+            + 3 * intercept * slope ** 2 * mean_s \
+            + slope ** 3 * square_s + 3 * slope * residual
+        if e == 1 and inverse_s > 0:
+            # The regression is poor for small objects. Only objects with
+            # T >= 1 have a weight, which together with the Cauchy-Schwarz
+            # inequality gives lower bounds.
+            t2_by_s = max(t2_by_s, w, w * w / inverse_s)
+            t3_by_s = max(t3_by_s, t2_by_s, t2_by_s * t2_by_s / w)
+        if e == 0:
+            # The underived object has the sizes S and T.
+            moments = {s: 1.0, t: t_by_s, ss: mean_s, tt: t2_by_s,
+                       _LU: mean_t}
+            dt = 0
+        else:
+            # The derived size becomes t, the object has the sizes S, T - 1.
+            moments = {s: mean_t, t: t2_by_s, ss: product, tt: t3_by_s,
+                       _LU: square_t}
+            dt = -1
+        moments = {q: value / w for q, value in moments.items()}
+        moments[tt] += 2 * dt * moments[t] + dt * dt
+        moments[_LU] += dt * moments[s]
+        moments[t] += dt
+        return {q: (value, []) for q, value in moments.items()}
+
+    def _first_moments(self, i):
+        """Equations of E[L] and E[U] of node i, see `_moments`."""
+        p = self._program
+        m = self._values
+        op = p.ops[i]
+        a, b = p.first[i], p.second[i]
+        if op == _ATOM:
+            if isinstance(p.samplers[i], pybo.LAtomSampler):
+                return {_L: (1.0, []), _U: (0.0, [])}
+            if isinstance(p.samplers[i], pybo.UAtomSampler):
+                return {_L: (0.0, []), _U: (1.0, [])}
+            return {_L: (0.0, []), _U: (0.0, [])}
+        if op == _SUM or op == _CHOICE:
+            branches = self._branches(i)
+            return {q: (0.0, [(w, q, j) for w, j in branches])
+                    for q in (_L, _U)}
+        if op == _PROD:
+            return {q: (0.0, [(1.0, q, a), (1.0, q, b)]) for q in (_L, _U)}
+        if op == _SET:
+            mean_k, _ = self._set_size_moments(i)
+            return {q: (0.0, [(mean_k, q, a)]) for q in (_L, _U)}
+        if op == _L_SUBS:
+            # The l-atoms of the core are substituted, the coefficients of
+            # the products are frozen (see _solve).
+            return {_L: (0.0, [(m[_L][b], _L, a)]),
+                    _U: (0.0, [(1.0, _U, a), (m[_L][a], _U, b)])}
+        if op == _U_SUBS:
+            return {_L: (0.0, [(1.0, _L, a), (m[_U][a], _L, b)]),
+                    _U: (0.0, [(m[_U][b], _U, a)])}
+        # Unary nodes.
+        dl, du = self._shifts[i]
+        return {_L: (dl, [(1.0, _L, a)]), _U: (du, [(1.0, _U, a)])}
+
+    def _second_moments(self, i):
+        """Equations of E[L²], E[U²] and E[LU] of node i, see `_moments`."""
+        p = self._program
+        m = self._values
+        op = p.ops[i]
+        a, b = p.first[i], p.second[i]
+        if op == _ATOM:
+            l_size, u_size = m[_L][i], m[_U][i]
+            return {_LL: (l_size * l_size, []), _UU: (u_size * u_size, []),
+                    _LU: (l_size * u_size, [])}
+        if op == _SUM or op == _CHOICE:
+            branches = self._branches(i)
+            return {q: (0.0, [(w, q, j) for w, j in branches])
+                    for q in (_LL, _UU, _LU)}
+        if op == _PROD:
+            return {
+                _LL: (2 * m[_L][a] * m[_L][b], [(1.0, _LL, a), (1.0, _LL, b)]),
+                _UU: (2 * m[_U][a] * m[_U][b], [(1.0, _UU, a), (1.0, _UU, b)]),
+                _LU: (m[_L][a] * m[_U][b] + m[_U][a] * m[_L][b],
+                      [(1.0, _LU, a), (1.0, _LU, b)])}
+        if op == _SET:
+            # Sum of k independent elements.
+            mean_k, square_k = self._set_size_moments(i)
+            l_size, u_size = m[_L][a], m[_U][a]
+            return {
+                _LL: ((square_k - mean_k) * l_size * l_size,
+                      [(mean_k, _LL, a)]),
+                _UU: ((square_k - mean_k) * u_size * u_size,
+                      [(mean_k, _UU, a)]),
+                _LU: ((square_k - mean_k) * l_size * u_size,
+                      [(mean_k, _LU, a)])}
+        if op == _L_SUBS or op == _U_SUBS:
+            # One object of rhs per substituted atom (count N) of the core.
+            # S is the size that is replaced, T the other one.
+            if op == _L_SUBS:
+                s, t, ss, tt, st = _L, _U, _LL, _UU, _LU
+            else:
+                s, t, ss, tt, st = _U, _L, _UU, _LL, _LU
+            n, s_b, t_b = m[s][a], m[s][b], m[t][b]
+            return {
+                ss: (-n * s_b * s_b, [(n, ss, b), (s_b * s_b, ss, a)]),
+                tt: (-n * t_b * t_b,
+                     [(1.0, tt, a), (2 * t_b, st, a), (n, tt, b),
+                      (t_b * t_b, ss, a)]),
+                st: (-n * s_b * t_b,
+                     [(s_b, st, a), (n, st, b), (s_b * t_b, ss, a)])}
+        # Unary nodes.
+        dl, du = self._shifts[i]
+        return {
+            _LL: (dl * dl, [(1.0, _LL, a), (2.0 * dl, _L, a)]),
+            _UU: (du * du, [(1.0, _UU, a), (2.0 * du, _U, a)]),
+            _LU: (dl * du, [(1.0, _LU, a), (du, _L, a), (dl, _U, a)])}
+
+    def _edge_weights(self, i):
+        """Expected number of visits of the children per visit of node i.
+
+        Returns
+        -------
+        list of pairs (child, expected visits)
+        """
+        p = self._program
+        m = self._values
+        op = p.ops[i]
+        a, b = p.first[i], p.second[i]
+        if op == _ATOM:
+            return []
+        if op == _SUM or op == _CHOICE:
+            return [(j, w) for w, j in self._branches(i)]
+        if op == _PROD:
+            return [(a, 1.0), (b, 1.0)]
+        if op == _SET:
+            return [(a, self._set_size_moments(i)[0])]
+        if op == _L_SUBS:
+            return [(a, 1.0), (b, m[_L][a])]
+        if op == _U_SUBS:
+            return [(a, 1.0), (b, m[_U][a])]
+        return [(a, 1.0 / self._acceptance_probability(i))]
+
+    def _solve(self, quantities, components, equations):
+        """Solves the equations of the given quantities component by
+        component.
+
+        The equations of a component are linear in its unknowns once the
+        coefficients depending on the unknowns (e.g. of substitutions) are
+        frozen, they are solved repeatedly until the values converge.
+        """
+        import numpy as np
+        values = self._values
+        for component in components:
+            positions = {}
+            for q in quantities:
+                for j in component:
+                    positions[(q, j)] = len(positions)
+            k = len(positions)
+            previous = None
+            for _ in range(1000):
+                matrix = np.identity(k)
+                rhs = np.zeros(k)
+                for i in component:
+                    for q, (constant, terms) in equations(i).items():
+                        row = positions[(q, i)]
+                        rhs[row] += constant
+                        for coeff, q2, j in terms:
+                            col = positions.get((q2, j))
+                            if col is None:
+                                rhs[row] += coeff * values[q2][j]
+                            else:
+                                matrix[row, col] -= coeff
+                solution = np.linalg.solve(matrix, rhs)
+                for (q, j), pos in positions.items():
+                    values[q][j] = float(solution[pos])
+                if previous is not None and np.allclose(
+                        solution, previous, rtol=1e-12, atol=1e-12):
+                    break
+                previous = solution
+            else:
+                raise pybo.PyBoltzmannError(
+                    "Moments do not converge, the evaluations might be outside"
+                    " of the domain of convergence")
+
+    def _node(self, alias):
+        return self._program.entry_point(alias)
+
+    def expected_size(self, alias):
+        """Expected sizes of the objects sampled from a rule.
+
+        Parameters
+        ----------
+        alias : str
+
+        Returns
+        -------
+        tuple
+            E[l-size], E[u-size]
+        """
+        i = self._node(alias)
+        return self._values[_L][i], self._values[_U][i]
+
+    def size_variance(self, alias):
+        """Variances of the sizes of the objects sampled from a rule.
+
+        Parameters
+        ----------
+        alias : str
+
+        Returns
+        -------
+        tuple
+            Var[l-size], Var[u-size]
+        """
+        i = self._node(alias)
+        v = self._values
+        return (max(v[_LL][i] - v[_L][i] ** 2, 0.0),
+                max(v[_UU][i] - v[_U][i] ** 2, 0.0))
+
+    def _visits_from(self, alias):
+        """Expected number of visits of all nodes per sample of a rule."""
+        try:
+            return self._visits[alias]
+        except KeyError:
+            pass
+        root = self._node(alias)
+        n = len(self._program)
+        parents = [[] for _ in range(n)]
+        for i in range(n):
+            for j, w in self._edge_weights(i):
+                parents[j].append((w, _V, i))
+        values = self._values
+        values[_V] = [0.0] * n
+
+        def equations(j):
+            return {_V: (1.0 if j == root else 0.0, parents[j])}
+
+        # Parents first.
+        self._solve((_V,), reversed(self._components), equations)
+        self._visits[alias] = values[_V]
+        return values[_V]
+
+    def expected_visits(self, alias):
+        """Expected number of visits of the rules while sampling from a rule.
+
+        Parameters
+        ----------
+        alias : str
+
+        Returns
+        -------
+        dict
+            Maps the aliases of the rules to their expected visits.
+        """
+        visits = self._visits_from(alias)
+        p = self._program
+        return {p.samplers[i].sampled_class: visits[i]
+                for i in range(len(p))
+                if isinstance(p.samplers[i], pybo.AliasSampler)
+                and visits[i] > 0}
+
+    def expected_cost(self, alias):
+        """Expected number of visits of the program nodes per sample of a
+        rule, a measure of the sampling time that is proportional to the
+        number of steps of the compiled sampler.
+
+        Parameters
+        ----------
+        alias : str
+
+        Returns
+        -------
+        float
+        """
+        return math.fsum(self._visits_from(alias))
+
+    def _gamma_parameters(self, alias):
+        mean = self.expected_size(alias)[0]
+        var = self.size_variance(alias)[0]
+        if mean <= 0 or var <= 0:
+            raise pybo.PyBoltzmannError(
+                "{}: l-size is not random".format(alias))
+        return mean * mean / var, var / mean
+
+    def size_probability(self, alias, lower, upper):
+        """Probability that the l-size of an object sampled from a rule is in
+        [lower, upper].
+
+        The distribution of the l-size is approximated by the gamma
+        distribution with the same mean and variance, which has the shape of
+        the size distributions of critical Boltzmann samplers.
+
+        Parameters
+        ----------
+        alias : str
+        lower : int
+        upper : int
+
+        Returns
+        -------
+        float
+        """
+        from scipy.special import gammainc
+        shape, scale = self._gamma_parameters(alias)
+        # Continuity correction for the integer sizes.
+        lower = max(lower - 0.5, 0.0)
+        upper = max(upper + 0.5, 0.0)
+        return float(gammainc(shape, upper / scale)
+                     - gammainc(shape, lower / scale))
+
+    def rejection_cost(self, alias, lower, upper, max_l_size=None):
+        """Predicts rejection sampling of objects with l-size in
+        [lower, upper] from a rule.
+
+        Attempts are assumed to cost visits proportional to their l-size, an
+        attempt aborted at `max_l_size` (see
+        `DecompositionGrammar.set_size_limits`) costs as much as an object of
+        this size. The size limits also abort attempts in which an object
+        that would have been rejected (e.g. by a rejection sampler) exceeds
+        them, this is not taken into account and makes the predicted number
+        of attempts too low.
+
+        Parameters
+        ----------
+        alias : str
+        lower : int
+        upper : int
+        max_l_size : int, optional (default=None)
+
+        Returns
+        -------
+        dict
+            'acceptance_probability': probability that an attempt is
+            accepted, 'expected_attempts': expected number of attempts,
+            'expected_cost': expected visits of all attempts.
+        """
+        from scipy.special import gammainc
+        prob = self.size_probability(alias, lower, upper)
+        if prob <= 0:
+            raise pybo.PyBoltzmannError(
+                "{}: sizes in [{}, {}] are too unlikely".format(
+                    alias, lower, upper))
+        cost = self.expected_cost(alias)
+        if max_l_size is not None:
+            # Cost of an attempt truncated at max_l_size: E[min(L, c)] of
+            # the gamma distribution relative to E[L].
+            shape, scale = self._gamma_parameters(alias)
+            c = max_l_size / scale
+            truncated_mean = shape * scale * gammainc(shape + 1, c) \
+                + max_l_size * (1 - gammainc(shape, c))
+            cost *= float(truncated_mean) / (shape * scale)
+        return {'acceptance_probability': prob,
+                'expected_attempts': 1 / prob,
+                'expected_cost': cost / prob}
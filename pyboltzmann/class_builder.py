@@ -88,6 +88,20 @@ class CombinatorialClassBuilder(object):
         """
         raise NotImplementedError
 
+    def dummy_builder(self):
+        """Returns the builder replacing this builder in the dummy sampling
+        mode.
+
+        Builders that do more than assembling objects (e.g. interrupt the
+        sampler) should return a builder with the same behaviour that builds
+        `DummyClass` objects.
+
+        Returns
+        -------
+        CombinatorialClassBuilder
+        """
+        return DummyBuilder()
+
 
 class DefaultBuilder(CombinatorialClassBuilder):
     """
@@ -136,3 +150,6 @@ class DummyBuilder(CombinatorialClassBuilder):
             l_size += dummy.l_size
             u_size += dummy.u_size
         return pybo.DummyClass(l_size, u_size)
+
+    def dummy_builder(self):
+        return self
@@ -0,0 +1,539 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Compilation of a decomposition grammar into a flat sampling program.
+
+The sampler hierarchy of an initialized grammar is lowered into parallel
+arrays (one entry per sampler) which are executed by a small interpreter loop.
+The loop works on an explicit stack of integer frames: a non-negative frame
+`i` means "enter node i", a negative frame `~i` means "leave node i". This
+avoids the virtual `sample_iterative` calls and the `prev.children` scans of
+the `IterativeSampler`. Alias samplers do not exist in the program, references
+to them are resolved to the node of the referenced rule at compile time,
+unless the program is compiled with an instrumentation. Then each rule is a
+HOOK node which reports to the instrumentation when it is entered and left
+(and the transformations report their calls if requested).
+
+The program consumes random numbers in the same order as the
+`IterativeSampler`, so both produce the same objects for the same seed. Like
+there, sets, substitutions and restartable samplers are executed by the same
+loop, no nested samplers are created.
+"""
+
+from __future__ import division
+
+import functools
+
+import pyboltzmann as pybo
+
+__all__ = ['SamplingProgram',
+           'CompiledSampler']
+
+# Opcodes.
+_ATOM = 0
+_SUM = 1
+_PROD = 2
+_TRANSFORM = 3
+_REJECTION = 4
+_U_DER_FROM_L_DER = 5
+_L_DER_FROM_U_DER = 6
+_SET = 7
+_L_SUBS = 8
+_U_SUBS = 9
+_HOOK = 10
+_RESTARTABLE = 11
+_CHOICE = 12
+
+_OP_NAMES = ['ATOM', 'SUM', 'PROD', 'TRANSFORM', 'REJECTION',
+             'U_DER_FROM_L_DER', 'L_DER_FROM_U_DER', 'SET', 'L_SUBS',
+             'U_SUBS', 'HOOK', 'RESTARTABLE', 'CHOICE']
+
+
+class SamplingProgram(object):
+    """
+    Flat instruction program of an initialized decomposition grammar.
+
+    Node `i` of the program is described by `ops[i]` and the operands
+    `first[i]`, `second[i]`, `params[i]`, `funcs[i]` and `extra[i]`, the
+    meaning of which depends on the opcode:
+
+    ========================  =========  =========  ===========  ===========
+    opcode                    first      second     params       funcs
+    ========================  =========  =========  ===========  ===========
+    ATOM                      -          -          -            builder
+    SUM                       lhs        rhs        P(lhs)       -
+    CHOICE                    summands   aliases    alias probs  -
+    PROD                      lhs        rhs        -            builder
+    TRANSFORM                 child      -          -            f
+    REJECTION                 child      -          -            is_acceptable
+    U_DER_FROM_L_DER          child      -          1/alpha      -
+    L_DER_FROM_U_DER          child      -          1/alpha      -
+    SET                       child      d          Poisson CDF  builder
+    L_SUBS / U_SUBS           lhs        rhs        -            -
+    HOOK                      child      on abort   -            before
+    RESTARTABLE               child      -          -            -
+    ========================  =========  =========  ===========  ===========
+
+    `extra[i]` holds the after-hook of a HOOK node, the on abort function
+    is called instead if the node is abandoned.
+
+    Parameters
+    ----------
+    grammar : DecompositionGrammar
+        An initialized grammar, i.e. all evaluations must be precomputed.
+    instrumentation : Instrumentation, optional (default=None)
+        If given, the rules are compiled into HOOK nodes reporting to it and
+        the interpreter reports rejections and restarts.
+    """
+
+    def __init__(self, grammar, instrumentation=None):
+        self.grammar = grammar
+        self.instrumentation = instrumentation
+        self.ops = []
+        self.first = []
+        self.second = []
+        self.params = []
+        self.funcs = []
+        self.extra = []
+        # The sampler object each node has been compiled from.
+        self.samplers = []
+        # Maps rule aliases to the node implementing the rule.
+        self.entry_points = {}
+        self._index = {}
+        self._queue = []
+        if instrumentation is None:
+            self._compile(grammar[grammar._target_rule])
+        else:
+            self._compile(grammar._alias_sampler(grammar._target_rule))
+
+    def __len__(self):
+        """Number of nodes in the program."""
+        return len(self.ops)
+
+    def entry_point(self, alias):
+        """Returns the node of the rule identified by alias.
+
+        Parameters
+        ----------
+        alias : str
+
+        Returns
+        -------
+        int
+        """
+        try:
+            return self.entry_points[alias]
+        except KeyError:
+            raise pybo.PyBoltzmannError(
+                "Rule not compiled into the sampling program: {}".format(
+                    alias))
+
+    def _resolve(self, sampler):
+        """Returns the index of the given sampler, alias samplers are resolved
+        to the sampler they reference. Unseen samplers are queued for
+        compilation.
+        """
+        if self.instrumentation is not None \
+                and isinstance(sampler, pybo.AliasSampler):
+            # One node per rule.
+            return self._node(sampler.sampled_class, sampler)
+        aliases = []
+        while isinstance(sampler, pybo.AliasSampler):
+            aliases.append(sampler.sampled_class)
+            sampler = sampler._referenced_sampler
+            if sampler is None:
+                raise pybo.PyBoltzmannError(
+                    "{}: alias sampler not initialized".format(aliases[-1]))
+        index = self._node(id(sampler), sampler)
+        for alias in aliases:
+            self.entry_points.setdefault(alias, index)
+        return index
+
+    def _node(self, key, sampler):
+        """Returns the index of the node with the given key, a new node is
+        queued for compilation if there is none."""
+        try:
+            index = self._index[key]
+        except KeyError:
+            index = len(self.ops)
+            self._index[key] = index
+            self.ops.append(None)
+            self.first.append(None)
+            self.second.append(None)
+            self.params.append(None)
+            self.funcs.append(None)
+            self.extra.append(None)
+            self.samplers.append(sampler)
+            self._queue.append((index, sampler))
+        return index
+
+    def _compile(self, root):
+        self.entry_points[self.grammar._target_rule] = self._resolve(root)
+        while self._queue:
+            self._compile_node(*self._queue.pop())
+        del self._queue
+
+    def _compile_node(self, i, sampler):
+        if isinstance(sampler, pybo.AliasSampler):
+            # Only compiled with an instrumentation, see _resolve.
+            alias = sampler.sampled_class
+            if sampler._referenced_sampler is None:
+                raise pybo.PyBoltzmannError(
+                    "{}: alias sampler not initialized".format(alias))
+            self.ops[i] = _HOOK
+            self.first[i] = self._resolve(sampler._referenced_sampler)
+            self.second[i] = self.instrumentation.abandon
+            self.funcs[i] = functools.partial(self.instrumentation.enter,
+                                              alias)
+            self.extra[i] = self.instrumentation.leave
+            self.entry_points[alias] = i
+        elif isinstance(sampler, pybo.AtomSampler):
+            self.ops[i] = _ATOM
+            if isinstance(sampler, pybo.LAtomSampler):
+                self.funcs[i] = sampler.builder.l_atom
+            elif isinstance(sampler, pybo.UAtomSampler):
+                self.funcs[i] = sampler.builder.u_atom
+            else:
+                self.funcs[i] = sampler.builder.zero_atom
+        elif isinstance(sampler, pybo.SumSampler) \
+                and sampler.summands is not None:
+            # Flattened n-ary sum.
+            self.ops[i] = _CHOICE
+            self.first[i] = tuple(self._resolve(s) for s in sampler.summands)
+            self.second[i] = sampler._alias_indices
+            self.params[i] = sampler._alias_probs
+        elif isinstance(sampler, pybo.SumSampler):
+            self.ops[i] = _SUM
+            self.first[i] = self._resolve(sampler.lhs)
+            self.second[i] = self._resolve(sampler.rhs)
+            self.params[i] = \
+                sampler.lhs._precomputed_eval / sampler._precomputed_eval
+        elif isinstance(sampler, pybo.ProdSampler):
+            self.ops[i] = _PROD
+            self.first[i] = self._resolve(sampler.lhs)
+            self.second[i] = self._resolve(sampler.rhs)
+            self.funcs[i] = sampler.builder.product
+        elif isinstance(sampler, (pybo.LSubsSampler, pybo.USubsSampler)):
+            if isinstance(sampler, pybo.LSubsSampler):
+                self.ops[i] = _L_SUBS
+            else:
+                self.ops[i] = _U_SUBS
+            self.first[i] = self._resolve(sampler.lhs)
+            self.second[i] = self._resolve(sampler.rhs)
+        elif isinstance(sampler, pybo.SetSampler):
+            self.ops[i] = _SET
+            self.first[i] = self._resolve(sampler._sampler)
+            self.second[i] = sampler._d
+            self.params[i] = sampler._pois_table
+            self.funcs[i] = sampler.builder.set
+        elif isinstance(sampler, pybo.RestartableSampler):
+            self.ops[i] = _RESTARTABLE
+            self.first[i] = self._resolve(sampler._sampler)
+        elif isinstance(sampler, pybo.HookSampler):
+            self.ops[i] = _HOOK
+            self.first[i] = self._resolve(sampler._sampler)
+            self.second[i] = sampler.after
+            self.funcs[i] = sampler.before
+            self.extra[i] = sampler.after
+        elif isinstance(sampler, pybo.RejectionSampler):
+            self.ops[i] = _REJECTION
+            self.first[i] = self._resolve(sampler._sampler)
+            self.funcs[i] = sampler.f
+        elif isinstance(sampler, pybo.UDerFromLDerSampler):
+            self.ops[i] = _U_DER_FROM_L_DER
+            self.first[i] = self._resolve(sampler._sampler)
+            self.params[i] = 1 / sampler._alpha_u_l
+        elif isinstance(sampler, pybo.LDerFromUDerSampler):
+            self.ops[i] = _L_DER_FROM_U_DER
+            self.first[i] = self._resolve(sampler._sampler)
+            self.params[i] = 1 / sampler._alpha_l_u
+        elif isinstance(sampler, pybo.TransformationSampler):
+            self.ops[i] = _TRANSFORM
+            self.first[i] = self._resolve(sampler._sampler)
+            self.funcs[i] = sampler.f
+            if sampler.f is not None and self.instrumentation is not None \
+                    and self.instrumentation.transformations:
+                self.funcs[i] = self.instrumentation.reporting(sampler.f)
+        else:
+            raise pybo.PyBoltzmannError(
+                "Cannot compile sampler of type {}".format(
+                    type(sampler).__name__))
+
+    def __str__(self):
+        """Returns a human readable listing of the program."""
+        lines = []
+        for i, op in enumerate(self.ops):
+            lines.append("{:5d} {:18s} {:>6} {:>6} {}".format(
+                i, _OP_NAMES[op],
+                '' if self.first[i] is None else str(self.first[i]),
+                '' if self.second[i] is None else str(self.second[i]),
+                self.samplers[i].sampled_class))
+        return '\n'.join(lines)
+
+
+class CompiledSampler(object):
+    """
+    Interpreter for a `SamplingProgram`, counterpart of `IterativeSampler`.
+
+    Parameters
+    ----------
+    program : SamplingProgram
+    entry : int
+        The node to be sampled from.
+    is_restartable : bool, optional (default=False)
+        If set, a restart outside of any RESTARTABLE node restarts the whole
+        sampler.
+    """
+
+    def __init__(self, program, entry, is_restartable=False):
+        self.program = program
+        self.entry = entry
+        self.is_restartable = is_restartable
+
+    def sample(self, max_l_size=None, max_u_size=None):
+        """Invokes the sampling program.
+
+        Parameters
+        ----------
+        max_l_size : int, optional (default=None)
+            See `IterativeSampler`.
+        max_u_size : int, optional (default=None)
+            See `IterativeSampler`.
+        """
+        if max_l_size is None and max_u_size is None:
+            result_stack = []
+        else:
+            result_stack = pybo.IterativeSampler._ResultStack(max_l_size,
+                                                              max_u_size)
+        # Restart points (stack height, result stack height, node to resume)
+        # of the active RESTARTABLE nodes.
+        restart_points = []
+        if self.is_restartable:
+            restart_points.append((0, 0, self.entry))
+        self._run([self.entry], result_stack, restart_points)
+        assert len(result_stack) == 1
+        assert result_stack[0] is not None
+        return result_stack[0]
+
+    def sample_batch(self, k):
+        """Samples k independent objects in a single run of the interpreter
+        loop, see `IterativeSampler.sample_batch`.
+
+        A restartable sampler samples the objects one after another.
+
+        Parameters
+        ----------
+        k : int
+
+        Returns
+        -------
+        list
+        """
+        if self.is_restartable:
+            return [self.sample() for _ in range(k)]
+        result_stack = []
+        # The entry frames are popped in order, so the objects are sampled in
+        # the same order as by k calls of `sample`.
+        self._run([self.entry] * k, result_stack, [])
+        return result_stack
+
+    def _run(self, stack, result_stack, restart_points):
+        """The interpreter loop, runs until the given stack is empty."""
+        program = self.program
+        ops = program.ops
+        first = program.first
+        second = program.second
+        params = program.params
+        funcs = program.funcs
+        extra = program.extra
+        samplers = program.samplers
+        instrumentation = program.instrumentation
+        rand = pybo.get_random_source().random
+        pois_from_table = pybo.pois_from_table
+        u_derived_from_l_derived = pybo.u_derived_from_l_derived
+        l_derived_from_u_derived = pybo.l_derived_from_u_derived
+        substitute = pybo.IterativeSampler._substitute
+
+        push = stack.append
+        pop = stack.pop
+        push_result = result_stack.append
+        pop_result = result_stack.pop
+
+        while stack:
+            try:
+                while stack:
+
+                    i = pop()
+
+                    if i >= 0:
+                        # Enter node i.
+                        op = ops[i]
+                        if op == _SUM:
+                            if rand() <= params[i]:
+                                push(first[i])
+                            else:
+                                push(second[i])
+                        elif op == _CHOICE:
+                            probs = params[i]
+                            u = rand() * len(probs)
+                            j = int(u)
+                            if u - j < probs[j]:
+                                push(first[i][j])
+                            else:
+                                push(first[i][second[i][j]])
+                        elif op == _PROD:
+                            push(~i)
+                            push(second[i])
+                            push(first[i])
+                        elif op == _ATOM:
+                            push_result(funcs[i]())
+                        elif op == _SET:
+                            param, cdf, p_last = params[i]
+                            k = pois_from_table(second[i], param, cdf, p_last)
+                            push(k)
+                            push(~i)
+                            child = first[i]
+                            for _ in range(k):
+                                push(child)
+                        elif op == _HOOK:
+                            push(~i)
+                            push(first[i])
+                            funcs[i]()
+                        elif op == _RESTARTABLE:
+                            push(~i)
+                            restart_points.append(
+                                (len(stack), len(result_stack), first[i]))
+                            push(first[i])
+                        elif op == _L_SUBS or op == _U_SUBS:
+                            # The marker None indicates that the core object
+                            # is sampled.
+                            push(None)
+                            push(~i)
+                            push(first[i])
+                        else:
+                            # All other nodes only act when they are left.
+                            push(~i)
+                            push(first[i])
+
+                    else:
+                        # Leave node ~i.
+                        i = ~i
+                        op = ops[i]
+                        if op == _PROD:
+                            arg_rhs = pop_result()
+                            arg_lhs = pop_result()
+                            push_result(funcs[i](arg_lhs, arg_rhs))
+                        elif op == _TRANSFORM:
+                            f = funcs[i]
+                            if f is not None:
+                                push_result(f(pop_result()))
+                        elif op == _SET:
+                            k = pop()
+                            if k:
+                                elems = result_stack[-k:]
+                                del result_stack[-k:]
+                            else:
+                                elems = []
+                            push_result(funcs[i](elems))
+                        elif op == _REJECTION:
+                            obj = pop_result()
+                            if funcs[i](obj):
+                                push_result(obj)
+                            else:
+                                samplers[i]._count_rejection(obj)
+                                if instrumentation is not None:
+                                    instrumentation.reject()
+                                push(~i)
+                                push(first[i])
+                        elif op == _U_DER_FROM_L_DER:
+                            obj = pop_result()
+                            # See Lemma 6.
+                            if rand() <= params[i] * (
+                                    obj.u_size / (obj.l_size + 1)):
+                                push_result(u_derived_from_l_derived(obj))
+                            else:
+                                samplers[i]._count_rejection(obj)
+                                if instrumentation is not None:
+                                    instrumentation.reject()
+                                push(~i)
+                                push(first[i])
+                        elif op == _L_DER_FROM_U_DER:
+                            obj = pop_result()
+                            if rand() <= params[i] * (
+                                    obj.l_size / (obj.u_size + 1)):
+                                push_result(l_derived_from_u_derived(obj))
+                            else:
+                                samplers[i]._count_rejection(obj)
+                                if instrumentation is not None:
+                                    instrumentation.reject()
+                                push(~i)
+                                push(first[i])
+                        elif op == _L_SUBS or op == _U_SUBS:
+                            k = pop()
+                            if k is None:
+                                # The core object has been sampled, it is
+                                # kept on the main stack while one object of
+                                # rhs per atom is sampled.
+                                core = pop_result()
+                                if op == _L_SUBS:
+                                    k = core.l_size
+                                else:
+                                    k = core.u_size
+                                push(core)
+                                push(k)
+                                push(~i)
+                                child = second[i]
+                                for _ in range(k):
+                                    push(child)
+                            else:
+                                if k:
+                                    objs = result_stack[-k:]
+                                    del result_stack[-k:]
+                                else:
+                                    objs = []
+                                push_result(
+                                    substitute(pop(), objs, op == _L_SUBS))
+                        elif op == _HOOK:
+                            after = extra[i]
+                            if after is not None:
+                                after()
+                        elif op == _RESTARTABLE:
+                            restart_points.pop()
+
+            except pybo.IterativeSampler._Restart:
+                if not restart_points:
+                    raise pybo.PyBoltzmannError(
+                        "Trying to restart a non-restartable sampler.")
+                if instrumentation is not None:
+                    instrumentation.restart()
+                height, result_height, node = restart_points[-1]
+                self._unwind(stack[height:])
+                del stack[height:]
+                del result_stack[result_height:]
+                push(node)
+            except pybo.IterativeSampler._SizeLimitExceeded:
+                self._unwind(stack)
+                raise
+
+    def _unwind(self, frames):
+        """Executes the on abort functions of abandoned HOOK nodes, innermost
+        first."""
+        ops = self.program.ops
+        second = self.program.second
+        for i in reversed(frames):
+            # Only the leave frames are negative integers.
+            if isinstance(i, int) and i < 0 and ops[~i] == _HOOK \
+                    and second[~i] is not None:
+                second[~i]()
@@ -44,11 +44,22 @@ class DecompositionGrammar(object):
         self._initialized = False
         self._rules = rules
         self._recursive_rules = None
-        self._restart_flag = False
         self._target_rule = None
         self._target_x = None
         self._target_y = None
         self._needed_oracle_queries = None
+        self._compiled = False
+        self._program = None
+        self._compiled_samplers = {}
+        self._random_source = None
+        # Builders and transformations replaced in the dummy sampling mode.
+        self._real_mode_state = None
+        self._real_rules = None
+        # Compiled programs of the sampling modes that have been used.
+        self._program_cache = {}
+        self._max_l_size = None
+        self._max_u_size = None
+        self._instrumentation = None
 
     @staticmethod
     def _grammar_not_initialized_error():
@@ -60,7 +71,7 @@ class DecompositionGrammar(object):
         msg = "Not a rule in the grammar: {}".format(alias)
         raise pybo.PyBoltzmannError(msg)
 
-    def init(self, target_rule, x='x', y='y'):
+    def init(self, target_rule, x='x', y='y', compiled=False):
         """Initializes the grammar.
 
         A grammar can only be used for sampling after initialization.
@@ -75,6 +86,9 @@ class DecompositionGrammar(object):
             Symbolic x-argument.
         y : str, optional (default='y')
             Symbolic y-argument.
+        compiled : bool, optional (default=False)
+            Whether to compile the grammar into a flat `SamplingProgram`
+            which is then used by `sample_iterative`.
         """
         if target_rule not in self.rules:
             self._missing_rule_error(target_rule)
@@ -82,6 +96,8 @@ class DecompositionGrammar(object):
         # Initialize the alias samplers, i.e. set their referenced grammar to
         # this grammar.
         self._init_alias_samplers()
+        # Collapse nested sums into n-ary choices.
+        self._flatten_sums()
         # Find out which rules are recursive.
         self._find_recursive_rules()
         # Automatically set target class labels of transformation samplers
@@ -97,9 +113,114 @@ class DecompositionGrammar(object):
                     "The following evals are needed: {}".format(
                         self._needed_oracle_queries
                     ))
+        self._compiled = compiled
         # Precompute the evaluations for all intermediate classes.
         self._precompute_evals()
 
+    def _compile_program(self):
+        """(Re-)compiles the sampling program if compilation is enabled."""
+        self._program_cache = {}
+        self._select_program(self._real_rules)
+
+    def _build_program(self):
+        self._compiled_samplers = {}
+        if self._compiled:
+            self._program = pybo.SamplingProgram(self, self._instrumentation)
+        else:
+            self._program = None
+
+    @property
+    @_only_if_initialized
+    def program(self):
+        """Gets the compiled sampling program (None if not compiled).
+
+        Returns
+        -------
+        program : SamplingProgram
+        """
+        return self._program
+
+    @property
+    def random_source(self):
+        """Gets the random source of this grammar.
+
+        Returns
+        -------
+        source : RandomSource
+            The source used while sampling from this grammar, None means that
+            the globally active source is used.
+        """
+        return self._random_source
+
+    @random_source.setter
+    def random_source(self, source):
+        """Sets the random source of this grammar.
+
+        Parameters
+        ----------
+        source : RandomSource
+        """
+        self._random_source = source
+
+    @property
+    def instrumentation(self):
+        """Gets the instrumentation the sampling engines report to.
+
+        Returns
+        -------
+        instrumentation : Instrumentation
+            None if the instrumentation is disabled.
+        """
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation):
+        """Sets the instrumentation the sampling engines report to, e.g. a
+        `RuleStatistics` object.
+
+        Without an instrumentation the sampling has no overhead. With an
+        instrumentation, the compiled program contains a node for each rule.
+
+        Parameters
+        ----------
+        instrumentation : Instrumentation
+            None disables the instrumentation.
+        """
+        self._instrumentation = instrumentation
+        if self._initialized:
+            self._compile_program()
+
+    def set_size_limits(self, max_l_size=None, max_u_size=None):
+        """Limits the sizes of the objects sampled by `sample_iterative`.
+
+        An attempt is aborted as soon as the objects sampled so far have a
+        larger total l-size (u-size) than the limit, and a new attempt is
+        started (anticipated rejection). If the size of an object never
+        decreases while it is built, the result is distributed like a sample
+        conditioned on not exceeding the limits. Otherwise the limits must
+        allow for the possible decrease.
+
+        Parameters
+        ----------
+        max_l_size : int, optional (default=None)
+            None means no limit.
+        max_u_size : int, optional (default=None)
+            None means no limit.
+        """
+        self._max_l_size = max_l_size
+        self._max_u_size = max_u_size
+
+    @property
+    def size_limits(self):
+        """Gets the limits set by `set_size_limits`.
+
+        Returns
+        -------
+        limits : tuple
+            The pair (max_l_size, max_u_size).
+        """
+        return self._max_l_size, self._max_u_size
+
     def _init_alias_samplers(self):
         """Sets the grammar in the alias samplers."""
 
@@ -113,6 +234,17 @@ class DecompositionGrammar(object):
             v = self._DFSVisitor(apply_to_each)
             self[alias].accept(v)
 
+    def _flatten_sums(self):
+        """Collapses chains of nested sum samplers into n-ary choices."""
+
+        def apply_to_each(sampler):
+            if isinstance(sampler, pybo.SumSampler):
+                sampler.flatten()
+
+        for alias in self._rules:
+            v = self._DFSVisitor(apply_to_each)
+            self[alias].accept(v)
+
     def _find_recursive_rules(self):
         """Analyses the grammar to find out which rules are recursive and saves
         them.
@@ -162,10 +294,20 @@ class DecompositionGrammar(object):
         visitor = self._PrecomputeEvaluationsVisitor(self._target_x,
                                                      self._target_y)
         self[self._target_rule].accept(visitor)
+        # The alias tables of the flattened sums depend on the evaluations of
+        # the summands which are only available now.
+        for sampler in visitor.flattened_sums:
+            sampler.precompute_alias_table()
+        # The compiled program holds the precomputed probabilities.
+        self._compile_program()
 
     def restart_sampler(self):
-        """Restarts the iterative sampler."""
-        self._restart_flag = True
+        """Restarts the iterative sampler.
+
+        Sampling resumes at the innermost enclosing `RestartableSampler`, the
+        call does not return.
+        """
+        raise pybo.IterativeSampler._Restart
 
     def set_builder(self, rules=None, builder=pybo.DefaultBuilder()):
         """Sets a builder for a given set of rules.
@@ -188,6 +330,9 @@ class DecompositionGrammar(object):
         v = self._SetBuilderVisitor(builder)
         for alias in rules:
             self[alias].accept(v)
+        if self._initialized:
+            # The compiled program holds references to the builder methods.
+            self._compile_program()
         return v
 
     def add_rule(self, alias, sampler):
@@ -292,31 +437,102 @@ class DecompositionGrammar(object):
         """
         return alias in self._recursive_rules
 
+    def _select_program(self, mode):
+        """Takes the compiled program of the given mode from the cache or
+        compiles it.
+        """
+        try:
+            self._program, self._compiled_samplers = self._program_cache[mode]
+        except KeyError:
+            self._build_program()
+            self._program_cache[mode] = self._program, self._compiled_samplers
+
+    def _reachable_samplers(self, rules):
+        """Returns the ids of all samplers reachable from the given rules."""
+        reachable = set()
+
+        def apply_to_each(sampler):
+            reachable.add(id(sampler))
+
+        v = self._DFSVisitor(apply_to_each)
+        for alias in rules:
+            self[alias].accept(v)
+        return reachable
+
     @_only_if_initialized
-    def dummy_sampling_mode(self, delete_transformations=False):
+    def dummy_sampling_mode(self, real_rules=None):
         """Changes the state of the grammar to the dummy sampling mode.
 
         A dummy object only records its size but otherwise has no internal
-        structure which is useful for testing sizes. This will overwrite
-        existing builder information. After this operation, dummies can be
-        sampled with sample(...).
-        """
-        # TODO Check if it actually works, delete otherwise.
-        raise NotImplementedError
-        v = self.set_builder(builder=pybo.DummyBuilder())
-        if v.overwrites_builder and Settings.debug_mode:
-            warnings.warn(
-                "dummy_sampling_mode has overwritten existing builders")
-
-        if delete_transformations:
-            def apply_to_each(sampler):
-                if isinstance(sampler, pybo.TransformationSampler) \
-                        and not isinstance(sampler, pybo.RejectionSampler):
-                    sampler.transformation = lambda x: x
-
-            for alias in self.rules:
-                v = self._DFSVisitor(apply_to_each)
-                self[alias].accept(v)
+        structure which is useful for experiments about the size distribution
+        of a sampler. In the dummy sampling mode, every builder is replaced by
+        its `dummy_builder()` and every transformation by its
+        `dummy_transformation`. The sizes of a dummy are the sizes of the
+        sampled object as counted by the generating function of its class,
+        i.e. the marked atoms of derived classes do not count.
+        Use `real_sampling_mode` to switch back.
+
+        Parameters
+        ----------
+        real_rules : iterable of str, optional (default=None)
+            Rules that keep sampling real objects together with all rules they
+            depend on. Needed if a rejection depends on the structure of an
+            object, the transformations that consume these objects must then
+            accept real objects in their dummy transformation.
+        """
+        real_rules = frozenset(real_rules or ())
+        if self._real_mode_state is not None:
+            if real_rules == self._real_rules:
+                # Already in this dummy sampling mode.
+                return
+            self.real_sampling_mode()
+        state = []
+        dummy_builders = {}
+        seen = self._reachable_samplers(real_rules)
+
+        def to_dummy_mode(sampler):
+            if id(sampler) in seen:
+                return
+            seen.add(id(sampler))
+            builder = sampler.builder
+            f = None
+            if isinstance(sampler, pybo.TransformationSampler):
+                f = sampler.f
+                sampler.f = sampler.dummy_transformation
+            state.append((sampler, builder, f))
+            if id(builder) not in dummy_builders:
+                dummy_builders[id(builder)] = builder.dummy_builder()
+            sampler.builder = dummy_builders[id(builder)]
+
+        v = self._DFSVisitor(to_dummy_mode)
+        for alias in self.rules:
+            self[alias].accept(v)
+        self._real_mode_state = state
+        self._real_rules = real_rules
+        self._select_program(real_rules)
+
+    @_only_if_initialized
+    def real_sampling_mode(self):
+        """Reverts `dummy_sampling_mode`."""
+        if self._real_mode_state is None:
+            return
+        for sampler, builder, f in self._real_mode_state:
+            sampler.builder = builder
+            if isinstance(sampler, pybo.TransformationSampler):
+                sampler.f = f
+        self._real_mode_state = None
+        self._real_rules = None
+        self._select_program(None)
+
+    @property
+    def is_dummy_sampling_mode(self):
+        """Checks if the grammar is in the dummy sampling mode.
+
+        Returns
+        -------
+        bool
+        """
+        return self._real_mode_state is not None
 
     @_only_if_initialized
     def sample_iterative(self, alias):
@@ -329,12 +545,228 @@ class DecompositionGrammar(object):
 
         Traverses the decomposition tree in post-order.
         The tree may be arbitrarily large and is expanded on the fly.
+        If the grammar has been compiled, rules reachable from the target rule
+        are sampled by the compiled program, all other rules by the
+        `IterativeSampler`.
+        If the grammar has its own random source, it is the active source
+        while sampling.
+        Attempts exceeding the size limits (see `set_size_limits`) are
+        aborted and restarted.
         """
+        return self._sample_with_source(self._sample_iterative, alias)
+
+    def _sample_with_source(self, sample, alias):
+        """Calls sample(alias) with the random source of this grammar."""
+        if self._random_source is not None:
+            previous_source = pybo.set_random_source(self._random_source)
+            try:
+                return sample(alias)
+            finally:
+                pybo.set_random_source(previous_source)
+        return sample(alias)
+
+    @_only_if_initialized
+    def sample_two_phase(self, alias, is_acceptable, real_rules=None):
+        """Samples from the rule identified by `alias` until an object is
+        accepted, only the accepted object is built.
+
+        In the first phase, dummies are sampled until `is_acceptable` accepts
+        one. In the second phase, the random source is set back to its state
+        before the accepted dummy and the real object is sampled, replaying the
+        random decisions of the first phase. The result is distributed like
+        the first object accepted by plain rejection sampling, rejected
+        attempts only cost a dummy run.
+
+        Parameters
+        ----------
+        alias : str
+            The rule to be sampled from.
+        is_acceptable : function
+            Predicate on the sizes of a dummy.
+        real_rules : iterable of str, optional (default=None)
+            See `dummy_sampling_mode`.
+
+        Returns
+        -------
+        CombinatorialClass
+
+        Notes
+        -----
+        The replay requires that the dummy run draws exactly the same random
+        numbers as the real run. Random choices that do not affect the sizes
+        must therefore be drawn from `get_building_random_source()`. A
+        PyBoltzmannError is raised if both runs end at different positions of
+        the random source.
+        """
+        if self._real_mode_state is not None:
+            raise pybo.PyBoltzmannError(
+                "Two-phase sampling starts in the real sampling mode")
+        source = self._random_source
+        if source is None:
+            source = pybo.get_random_source()
+        self.dummy_sampling_mode(real_rules)
         try:
-            sampler = self[alias]
+            while True:
+                state = source.getstate()
+                # Each attempt needs its own checkpoint, so attempts aborted
+                # due to the size limits are not restarted internally.
+                dummy = self._sample_with_source(self._sample_attempt, alias)
+                if dummy is not None and is_acceptable(dummy):
+                    break
+        finally:
+            self.real_sampling_mode()
+        end_state = source.getstate()
+        source.setstate(state)
+        # The real object may be larger than its dummy while it is built, so
+        # the replay must not be aborted.
+        limits = self.size_limits
+        self.set_size_limits()
+        try:
+            obj = self.sample_iterative(alias)
+        finally:
+            self.set_size_limits(*limits)
+        if source.getstate() != end_state:
+            raise pybo.PyBoltzmannError(
+                "The dummy sampling mode of rule {} does not replay the random "
+                "decisions of the real sampling mode".format(alias))
+        return obj
+
+    def _sample_iterative(self, alias):
+        while True:
+            obj = self._sample_attempt(alias)
+            if obj is not None:
+                return obj
+
+    def _sample_attempt(self, alias):
+        """Samples once, returns None if the size limits are exceeded."""
+        max_l_size, max_u_size = self._max_l_size, self._max_u_size
+        try:
+            if self._program is not None \
+                    and alias in self._program.entry_points:
+                return self._compiled_sampler(alias).sample(
+                    max_l_size, max_u_size)
+            return pybo.IterativeSampler(
+                self._rule_sampler(alias), self, max_l_size=max_l_size,
+                max_u_size=max_u_size,
+                instrumentation=self._instrumentation).sample()
+        except pybo.IterativeSampler._SizeLimitExceeded:
+            return None
+
+    def _compiled_sampler(self, alias):
+        try:
+            return self._compiled_samplers[alias]
+        except KeyError:
+            compiled_sampler = pybo.CompiledSampler(
+                self._program, self._program.entry_point(alias))
+            self._compiled_samplers[alias] = compiled_sampler
+            return compiled_sampler
+
+    def _rule_sampler(self, alias):
+        if self._instrumentation is not None:
+            # The rule itself is reported to the instrumentation as well.
+            return self._alias_sampler(alias)
+        try:
+            return self[alias]
         except KeyError:
             DecompositionGrammar._missing_rule_error(alias)
-        return pybo.IterativeSampler(sampler, self).sample()
+
+    def _alias_sampler(self, alias):
+        """Returns an initialized alias sampler referencing the given rule."""
+        sampler = pybo.AliasSampler(alias)
+        sampler.grammar = self
+        try:
+            sampler._referenced_sampler = self[alias]
+        except KeyError:
+            DecompositionGrammar._missing_rule_error(alias)
+        sampler.children = sampler._referenced_sampler,  # 1-tuple.
+        return sampler
+
+    @_only_if_initialized
+    def sample_batch(self, alias, k):
+        """Samples k independent objects from the rule identified by `alias`.
+
+        The objects are sampled in a single run of the driver loop and are
+        the same as the ones returned by k calls of `sample_iterative`. If
+        size limits are set, the objects are sampled one after another.
+
+        Parameters
+        ----------
+        alias : str
+        k : int
+
+        Returns
+        -------
+        list
+        """
+        return self._sample_with_source(
+            lambda a: self._sample_batch(a, k), alias)
+
+    def _sample_batch(self, alias, k):
+        if self.size_limits != (None, None):
+            return [self._sample_iterative(alias) for _ in range(k)]
+        if self._program is not None and alias in self._program.entry_points:
+            return self._compiled_sampler(alias).sample_batch(k)
+        return pybo.IterativeSampler(
+            self._rule_sampler(alias), self,
+            instrumentation=self._instrumentation).sample_batch(k)
+
+    def _rejection_samplers(self):
+        """Returns the samplers of all rules that count rejections."""
+        samplers = {}
+
+        def apply_to_each(sampler):
+            if isinstance(sampler, (pybo.RejectionSampler,
+                                    pybo.UDerFromLDerSampler,
+                                    pybo.LDerFromUDerSampler)):
+                samplers[id(sampler)] = sampler
+
+        v = self._DFSVisitor(apply_to_each)
+        for alias in self.rules:
+            self[alias].accept(v)
+        return list(samplers.values())
+
+    def rejection_statistics(self):
+        """Collects the rejection counters of all rejection sites, i.e. the
+        rejection samplers and the changes of the derived atom.
+
+        The counters include rejections in the dummy sampling mode, e.g. in
+        the first phase of `sample_two_phase`.
+
+        Returns
+        -------
+        dict
+            Maps the labels of the classes sampled by the rejection sites to
+            pairs (rejections_count, wasted_l_size), the counters of sites
+            with the same label are added up.
+        """
+        stats = {}
+        for sampler in self._rejection_samplers():
+            count, wasted = stats.get(sampler.sampled_class, (0, 0))
+            stats[sampler.sampled_class] = (
+                count + sampler.rejections_count,
+                wasted + sampler.wasted_l_size)
+        return stats
+
+    def reset_rejection_counts(self):
+        """Sets the rejection counters of all rejection sites to zero."""
+        for sampler in self._rejection_samplers():
+            sampler.reset_rejection_counts()
+
+    @_only_if_initialized
+    def analyze(self, acceptance_probabilities=None):
+        """Computes the expected sizes, their variances and the expected
+        sampling costs of the rules without sampling.
+
+        Parameters
+        ----------
+        acceptance_probabilities : dict, optional (default=None)
+            See `GrammarAnalysis`.
+
+        Returns
+        -------
+        GrammarAnalysis
+        """
+        return pybo.GrammarAnalysis(self, acceptance_probabilities)
 
     class _DFSVisitor:
         """
@@ -407,6 +839,7 @@ class DecompositionGrammar(object):
             self._y = y
             self._stack_x = []
             self._stack_y = []
+            self.flattened_sums = []
 
         def visit(self, sampler):
             if self._stack_x and self._stack_x[-1][0] == sampler:
@@ -416,6 +849,9 @@ class DecompositionGrammar(object):
                 _, y = self._stack_y.pop()
                 self._y = y
             sampler.precompute_eval(self._x, self._y)
+            if isinstance(sampler, pybo.SumSampler) \
+                    and sampler.summands is not None:
+                self.flattened_sums.append(sampler)
             if isinstance(sampler, pybo.LSubsSampler):
                 self._stack_x.append((sampler.rhs, self._x))
                 self._x = sampler.rhs.oracle_query_string(self._x, self._y)
@@ -13,10 +13,18 @@
 #           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
 
 from __future__ import division
+
+import collections.abc
 import math
+import struct
+import sys
+from array import array
 
 import pyboltzmann as pybo
 
+__all__ = ['EvaluationOracle',
+           'OracleBank']
+
 
 class EvaluationOracle(object):
     """Maintains a table of evaluations used by the samplers.
@@ -71,32 +79,31 @@ class EvaluationOracle(object):
             raise pybo.PyBoltzmannError(
                 'Oracle key missing: {}'.format(query_string))
             
-    @staticmethod            
-    def get_best_oracle_for_size(self, size, graph_evals):
+    @staticmethod
+    def get_best_oracle_for_size(size, graph_evals):
         """Returns the best fitting oracle.
-        
+
         This is chosen based on the sampling size.
-        The next bigger evaluations are chosen to sample more bigger graphs.
-        
+        The next bigger evaluations are chosen to sample more bigger graphs,
+        the biggest ones if no evaluations are big enough.
+
         Parameters
         ----------
-        node_number: int
+        size: int
             The number of nodes the final graph should have.
-        graph_evals: dict-of-dicts
-            The evaluation of the generating function. 
+        graph_evals: dict-of-dicts or OracleBank
+            The evaluation of the generating function.
             The size of the evaluation is used as key for the topmost dict.
-        
+
         Returns
         -------
-        orcale: EvaluationOracle
+        oracle: EvaluationOracle
         """
-        # TODO.
-        for eval_size in graph_evals.keys():
-            if size <= eval_size:
-                best_evals = graph_evals[eval_size]
-                break
-        
-        return EvaluationOracle(best_evals)
+        sizes = sorted(graph_evals.keys())
+        if not sizes:
+            raise pybo.PyBoltzmannError('No evaluations to choose from')
+        best_size = next((s for s in sizes if size <= s), sizes[-1])
+        return EvaluationOracle(dict(graph_evals[best_size]))
 
     def __getitem__(self, query_string):
         """Same as EvaluationOracle.get(query_string).
@@ -208,3 +215,119 @@ class EvaluationOracle(object):
             query_string_dx = '{}({},{})'.format(
                 class_label_dx, symbolic_x, symbolic_y)
         return self[symbolic_x] * self[query_string_dx] / self[query_string]
+
+
+class OracleBank(collections.abc.Mapping):
+    """Evaluation tables indexed by size, stored in a binary file.
+
+    Maps each size to its table of evaluations (a dict like the ones passed
+    to `EvaluationOracle`). The file is only opened on first access and the
+    tables are read one at a time when they are requested.
+
+    Parameters
+    ----------
+    path: str
+        A file written by `OracleBank.write`.
+
+    Notes
+    -----
+    The file consists of, in little endian byte order:
+
+    - the magic bytes b'PYBOBANK' and the format version (uint32),
+    - the number of keys k and of tables m (uint32),
+    - the byte length (uint32) of the keys as utf-8 text, one per line,
+    - the m sizes (int64) in increasing order,
+    - the m x k values (float64) row by row, NaN for missing evaluations.
+    """
+
+    MAGIC = b'PYBOBANK'
+    VERSION = 1
+
+    def __init__(self, path):
+        self._path = path
+        self._keys = None
+        self._sizes = None
+        self._offset = None
+        self._tables = {}
+
+    def _load_header(self):
+        if self._sizes is not None:
+            return
+        with open(self._path, 'rb') as f:
+            magic, version, num_keys, num_tables, keys_length = \
+                struct.unpack('<8s4I', f.read(24))
+            if magic != self.MAGIC or version != self.VERSION:
+                raise pybo.PyBoltzmannError(
+                    'Not an oracle bank: {}'.format(self._path))
+            keys = f.read(keys_length).decode('utf-8')
+            self._keys = keys.split('\n') if num_keys else []
+            sizes = array('q')
+            sizes.fromfile(f, num_tables)
+            if sys.byteorder != 'little':
+                sizes.byteswap()
+            self._sizes = list(sizes)
+            self._offset = f.tell()
+
+    @property
+    def sizes(self):
+        """The sizes of the tables in increasing order."""
+        self._load_header()
+        return self._sizes
+
+    def __getitem__(self, size):
+        if size in self._tables:
+            return self._tables[size]
+        self._load_header()
+        try:
+            row = self._sizes.index(size)
+        except ValueError:
+            raise KeyError(size)
+        values = array('d')
+        with open(self._path, 'rb') as f:
+            f.seek(self._offset + 8 * row * len(self._keys))
+            values.fromfile(f, len(self._keys))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        # NaN is the only value that is not equal to itself.
+        table = dict((key, value) for key, value in zip(self._keys, values)
+                     if value == value)
+        self._tables[size] = table
+        return table
+
+    def __iter__(self):
+        return iter(self.sizes)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def oracle(self, size):
+        """Returns an EvaluationOracle with the table for the given size."""
+        return EvaluationOracle(dict(self[size]))
+
+    @staticmethod
+    def write(path, tables):
+        """Writes a file for OracleBank.
+
+        Parameters
+        ----------
+        path: str
+        tables: dict
+            Maps integer sizes to dicts of evaluations.
+        """
+        sizes = sorted(tables)
+        keys = sorted(set(key for size in sizes for key in tables[size]))
+        if any('\n' in key for key in keys):
+            raise pybo.PyBoltzmannError('Keys must not contain line breaks')
+        encoded_keys = '\n'.join(keys).encode('utf-8')
+        size_array = array('q', sizes)
+        values = array('d', [tables[size].get(key, float('nan'))
+                             for size in sizes for key in keys])
+        if sys.byteorder != 'little':
+            size_array.byteswap()
+            values.byteswap()
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<8s4I', OracleBank.MAGIC, OracleBank.VERSION,
+                                len(keys), len(sizes), len(encoded_keys)))
+            f.write(encoded_keys)
+            size_array.tofile(f)
+            values.tofile(f)
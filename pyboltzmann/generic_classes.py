@@ -60,12 +60,12 @@ class CombinatorialClass(object):
 
     def random_l_atom(self):
         """Returns a random l-atom within this object or the object itself."""
-        rand_index = pybo.boltzmann_framework_random_gen.randrange(self.l_size)
+        rand_index = pybo.get_building_random_source().randrange(self.l_size)
         return pybo.nth(self.l_atoms(), rand_index)
 
     def random_u_atom(self):
         """Returns a random l-atom within this object or the object itself."""
-        rand_index = pybo.boltzmann_framework_random_gen.randrange(self.u_size)
+        rand_index = pybo.get_building_random_source().randrange(self.u_size)
         return pybo.nth(self.u_atoms(), rand_index)
 
     def replace_l_atoms(self, sampler, exceptions=None):
@@ -91,7 +91,7 @@ class CombinatorialClass(object):
         """Assigns labels from [0, l-size) to all l-atoms in this object
         (including itself if it is an l-atom).
         """
-        labels = pybo.boltzmann_framework_random_gen.sample(
+        labels = pybo.get_building_random_source().sample(
             range(self.l_size), self.l_size)
         for atom in self.l_atoms():
             atom.label = labels.pop()
@@ -161,8 +161,7 @@ class DummyClass(CombinatorialClass):
             raise pybo.PyBoltzmannError("Too many exceptions for substitution")
         l_growth = -(self.l_size - len(exceptions))
         u_growth = 0
-        for _ in range(self.l_size - len(exceptions)):
-            gamma = sampler.sample(x, y)
+        for gamma in sampler.sample_batch(self.l_size - len(exceptions)):
             if gamma.l_size <= 0:
                 raise pybo.PyBoltzmannError(
                     "You may not use l-substitution when class contains \
@@ -180,8 +179,7 @@ class DummyClass(CombinatorialClass):
             raise pybo.PyBoltzmannError("Too many exceptions for substitution")
         l_growth = 0
         u_growth = -(self.u_size - len(exceptions))
-        for _ in range(self.u_size - len(exceptions)):
-            gamma = sampler.sample(x, y)
+        for gamma in sampler.sample_batch(self.u_size - len(exceptions)):
             if gamma.u_size <= 0:
                 raise pybo.PyBoltzmannError(
                     "You may not use u-substitution when class contains \
@@ -571,3 +569,38 @@ class UDerivedClass(DerivedClass):
 
     def __str__(self):
         return "{}_dy".format(str(self.base_class_object))
+
+
+def u_derived_from_l_derived(obj):
+    """Turns an l-derived object into the corresponding u-derived object.
+
+    Dummy objects only change their sizes: the marked l-atom counts again and
+    one u-atom gets marked instead.
+
+    Parameters
+    ----------
+    obj : LDerivedClass or DummyClass
+
+    Returns
+    -------
+    UDerivedClass or DummyClass
+    """
+    if isinstance(obj, DummyClass):
+        return DummyClass(obj.l_size + 1, obj.u_size - 1)
+    return UDerivedClass(obj.base_class_object)
+
+
+def l_derived_from_u_derived(obj):
+    """Turns a u-derived object into the corresponding l-derived object.
+
+    Parameters
+    ----------
+    obj : UDerivedClass or DummyClass
+
+    Returns
+    -------
+    LDerivedClass or DummyClass
+    """
+    if isinstance(obj, DummyClass):
+        return DummyClass(obj.l_size - 1, obj.u_size + 1)
+    return LDerivedClass(obj.base_class_object)
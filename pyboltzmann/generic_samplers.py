@@ -401,12 +401,20 @@ class BinarySampler(BoltzmannSamplerBase):
 
 
 class SumSampler(BinarySampler):
-    """Samples from the disjoint union of the two underlying classes."""
+    """Samples from the disjoint union of the two underlying classes.
 
-    __slots__ = 'prob_pick_lhs'
+    Nested sums like A + B + C are collapsed into a single n-ary choice by
+    `flatten`. The summands are then drawn from a Walker alias table which
+    needs one random number per choice instead of one per nesting level.
+    """
+
+    __slots__ = 'prob_pick_lhs', '_summands', '_alias_probs', '_alias_indices'
 
     def __init__(self, lhs, rhs):
         super(SumSampler, self).__init__(lhs, rhs, '+')
+        self._summands = None
+        self._alias_probs = None
+        self._alias_indices = None
 
     @_return_precomp
     def eval(self, x, y):
@@ -414,9 +422,59 @@ class SumSampler(BinarySampler):
         # of the two generating functions.
         return self.lhs.eval(x, y) + self.rhs.eval(x, y)
 
+    @property
+    def summands(self):
+        """Gets the summands of the flattened sum (None if not flattened).
+
+        Returns
+        -------
+        tuple of BoltzmannSamplerBase
+        """
+        return self._summands
+
+    def flatten(self):
+        """Collapses the nested sums below this sampler into an n-ary choice
+        between the summands.
+
+        Only sum samplers are collapsed, in particular the recursion stops at
+        alias samplers. The structure returned by `get_children` is not
+        changed.
+        """
+        summands = []
+        stack = [self.rhs, self.lhs]
+        while stack:
+            sampler = stack.pop()
+            if isinstance(sampler, SumSampler):
+                stack.append(sampler.rhs)
+                stack.append(sampler.lhs)
+            else:
+                summands.append(sampler)
+        if len(summands) > 2:
+            self._summands = tuple(summands)
+            self.children = self._summands
+        else:
+            self._summands = None
+            self.children = self.lhs, self.rhs
+        self._alias_probs = None
+        self._alias_indices = None
+
+    def precompute_alias_table(self):
+        """Precomputes the alias table of a flattened sum.
+
+        The evaluations of all summands must have been precomputed.
+        """
+        if self._summands is None:
+            return
+        self._alias_probs, self._alias_indices = pybo.alias_table(
+            [s._precomputed_eval for s in self._summands])
+
     def sample_iterative(self, stack, result_stack, prev, grammar):
         if prev is None or self in prev.children:
-            if pybo.bern(self.lhs._precomputed_eval / self._precomputed_eval):
+            if self._summands is not None:
+                stack.append(self._summands[pybo.alias_draw(
+                    self._alias_probs, self._alias_indices)])
+            elif pybo.bern(
+                    self.lhs._precomputed_eval / self._precomputed_eval):
                 stack.append(self.lhs)
             else:
                 stack.append(self.rhs)
@@ -477,7 +535,7 @@ class LSubsSampler(BinarySampler):
             self.rhs.oracle_query_string(x, y), y)
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
-        if prev is None or self in prev.get_children():
+        if prev is None or self in prev.children:
             # Sample from lhs with substituted x.
             stack.append(self.lhs)
         else:
@@ -485,10 +543,12 @@ class LSubsSampler(BinarySampler):
             # Get the object in which the l-atoms have to be replaced from the
             # result stack.
             core_object = result_stack.pop()
-            # Replace the atoms and push result.
-            sampler = pybo.IterativeSampler(self.rhs, grammar)
-            res = core_object.replace_l_atoms(sampler)  # Recursion for now.
-            result_stack.append(res)
+            # Sample one object from rhs per l-atom on the same stack, then
+            # replace the atoms and push the result.
+            stack.append(pybo.IterativeSampler._Repeat(
+                self.rhs, core_object.l_size,
+                lambda objs: pybo.IterativeSampler._substitute(
+                    core_object, objs, True)))
 
 
 class USubsSampler(BinarySampler):
@@ -515,12 +575,12 @@ class USubsSampler(BinarySampler):
             # Get the object in which the u-atoms have to be replaced from the
             # result stack.
             core_object = result_stack.pop()
-            # Recover the old y from the stack.
-            # y = result_stack.pop()
-            # Replace the atoms and push result.
-            sampler = pybo.IterativeSampler(self.rhs, grammar)
-            res = core_object.replace_u_atoms(sampler)  # Recursion for now.
-            result_stack.append(res)
+            # Sample one object from rhs per u-atom on the same stack, then
+            # replace the atoms and push the result.
+            stack.append(pybo.IterativeSampler._Repeat(
+                self.rhs, core_object.u_size,
+                lambda objs: pybo.IterativeSampler._substitute(
+                    core_object, objs, False)))
 
 
 class UnarySampler(BoltzmannSamplerBase):
@@ -578,11 +638,12 @@ class SetSampler(UnarySampler):
     class do not have l-size 0.
     """
 
-    __slots__ = '_d'
+    __slots__ = '_d', '_pois_table'
 
     def __init__(self, d, sampler):
         super(SetSampler, self).__init__(sampler)
         self._d = d
+        self._pois_table = None
 
     @property
     def sampled_class(self):
@@ -599,20 +660,22 @@ class SetSampler(UnarySampler):
         return "exp_{}({})".format(
             self._d, self._sampler.oracle_query_string(x, y))
 
-    def _draw_k(self, x, y):
-        return pois(self._d, self._sampler.eval(x, y))
+    def precompute_eval(self, x, y):
+        super(SetSampler, self).precompute_eval(x, y)
+        # Precompute the distribution of the set size for the fixed parameter.
+        param = self._sampler.eval(x, y)
+        cdf, p_last = pybo.pois_table(self._d, param)
+        self._pois_table = param, cdf, p_last
+
+    def _draw_k(self):
+        param, cdf, p_last = self._pois_table
+        return pybo.pois_from_table(self._d, param, cdf, p_last)
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
-        # We use recursion here for now.
         stack.pop()
-        set_elems_sampler = self._sampler
-        k = pybo.pois(self._d, self._sampler._precomputed_eval)
-        sampler = pybo.IterativeSampler(set_elems_sampler, grammar)
-        set_elems = []
-        for _ in range(k):
-            obj = sampler.sample()
-            set_elems.append(obj)
-        result_stack.append(self.builder.set(set_elems))
+        # The elements are sampled on the same stack.
+        stack.append(pybo.IterativeSampler._Repeat(
+            self._sampler, self._draw_k(), self.builder.set))
 
 
 class TransformationSampler(UnarySampler):
@@ -628,13 +691,17 @@ class TransformationSampler(UnarySampler):
     f : transformation function, optional (default=id)
     eval_transform : generating function transformation, optional (default=id)
     target_class_label : str, optional (default=None)
+    dummy_f : transformation function, optional (default=None)
+        Counterpart of f acting on `DummyClass` objects in the dummy sampling
+        mode. If not given, f itself is applied to the dummies.
     """
 
     def __init__(self, sampler, f=None, eval_transform=None,
-                 target_class_label=None):
+                 target_class_label=None, dummy_f=None):
         super(TransformationSampler, self).__init__(sampler)
         self.f = f
         self._eval_transform = eval_transform
+        self.dummy_f = dummy_f
         if target_class_label is None:
             # Set a default label for the target class based on the name of the
             # transformation function.
@@ -666,6 +733,19 @@ class TransformationSampler(UnarySampler):
     def oracle_query_string(self, x, y):
         return "{}({},{})".format(self.sampled_class, x, y)
 
+    @property
+    def dummy_transformation(self):
+        """Returns the transformation to be used in the dummy sampling mode.
+
+        Returns
+        -------
+        function or None
+            None stands for the identity.
+        """
+        if self.dummy_f is not None:
+            return self.dummy_f
+        return self.f
+
     def sample_iterative(self, stack, result_stack, prev, grammar):
         if prev is None or self in prev.children:
             stack.append(self._sampler)
@@ -688,11 +768,15 @@ class BijectionSampler(TransformationSampler):
     sampler : BoltzmannSamplerBase
     f : transformation function
     target_class_label : str, optional (default=None)
+    dummy_f : transformation function, optional (default=None)
+        Counterpart of f acting on `DummyClass` objects in the dummy sampling
+        mode. If not given, the bijection is assumed to preserve sizes and is
+        skipped in the dummy sampling mode.
     """
 
-    def __init__(self, sampler, f, target_class_label=None):
+    def __init__(self, sampler, f, target_class_label=None, dummy_f=None):
         super(BijectionSampler, self).__init__(sampler, f, None,
-                                               target_class_label)
+                                               target_class_label, dummy_f)
 
     @_return_precomp
     def eval(self, x, y):
@@ -703,6 +787,10 @@ class BijectionSampler(TransformationSampler):
     def oracle_query_string(self, x, y):
         return self._sampler.oracle_query_string(x, y)
 
+    @property
+    def dummy_transformation(self):
+        return self.dummy_f
+
 
 class HookSampler(BijectionSampler):
     """
@@ -743,14 +831,52 @@ class RestartableSampler(BijectionSampler):
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
         stack.pop()
-        wrapped_sampler = self._sampler
-        restartable_sampler = pybo.IterativeSampler(wrapped_sampler, grammar,
-                                               is_restartable=True)
-        obj = restartable_sampler.sample()
-        result_stack.append(obj)
+        # A restart resets the stacks to this point.
+        stack.append(pybo.IterativeSampler._RestartPoint(self._sampler))
+
 
+class _RejectionCounters(object):
+    """Counters of the objects rejected by a sampler.
 
-class RejectionSampler(TransformationSampler):
+    They count since the creation of the sampler or the last call of
+    `reset_rejection_counts`, for all sampling engines and modes.
+    """
+
+    def _init_rejection_counters(self):
+        self._rejections_count = 0
+        self._wasted_l_size = 0
+
+    @property
+    def rejections_count(self):
+        """Counts the number of unsuccessful sampling operations.
+
+        Returns
+        -------
+        rejections_count : int
+            Number of rejected objects.
+        """
+        return self._rejections_count
+
+    @property
+    def wasted_l_size(self):
+        """Total l-size of the rejected objects, i.e. the work thrown away.
+
+        Returns
+        -------
+        wasted_l_size : int
+        """
+        return self._wasted_l_size
+
+    def reset_rejection_counts(self):
+        """Sets the rejection counters to zero."""
+        self._init_rejection_counters()
+
+    def _count_rejection(self, obj):
+        self._rejections_count += 1
+        self._wasted_l_size += obj.l_size
+
+
+class RejectionSampler(_RejectionCounters, TransformationSampler):
     """
     Generic rejection sampler, special case of transformation.
 
@@ -764,24 +890,17 @@ class RejectionSampler(TransformationSampler):
         Optional transformation of the evaluation function.
     target_class_label : str, optional (default=None)
         Optional label of the sampled class.
+    dummy_f : function, optional (default=None)
+        Criterion for accepting a `DummyClass` object in the dummy sampling
+        mode. If not given, is_acceptable itself is applied to the dummies.
     """
 
     def __init__(self, sampler, is_acceptable, eval_transform=None,
-                 target_class_label=None):
+                 target_class_label=None, dummy_f=None):
         super(RejectionSampler, self).__init__(
-            sampler, is_acceptable, eval_transform, target_class_label)
-        self._rejections_count = 0
-
-    @property
-    def rejections_count(self):
-        """Counts the number of unsuccessful sampling operations.
-
-        Returns
-        -------
-        rejections_count : int
-            Number of rejections in the last sampling operation.
-        """
-        raise NotImplementedError
+            sampler, is_acceptable, eval_transform, target_class_label,
+            dummy_f)
+        self._init_rejection_counters()
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
         if prev is None or self in prev.children:
@@ -793,10 +912,11 @@ class RejectionSampler(TransformationSampler):
                 stack.pop()
                 result_stack.append(obj_to_check)
             else:
+                self._count_rejection(obj_to_check)
                 stack.append(self._sampler)
 
 
-class UDerFromLDerSampler(TransformationSampler):
+class UDerFromLDerSampler(_RejectionCounters, TransformationSampler):
     """
     Samples the u-derived (dy) class of the given l-derived (dx) class sampler.
 
@@ -816,6 +936,7 @@ class UDerFromLDerSampler(TransformationSampler):
             label = "{}_dy_from_dx".format(sampler.sampled_class)
         super(UDerFromLDerSampler, self).__init__(sampler, None, None, label)
         self._alpha_u_l = alpha_u_l
+        self._init_rejection_counters()
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
         if prev is None or self in prev.children:
@@ -831,13 +952,13 @@ class UDerFromLDerSampler(TransformationSampler):
 
             if is_acceptable(obj_to_check):
                 stack.pop()
-                result_stack.append(
-                    pybo.UDerivedClass(obj_to_check.base_class_object))
+                result_stack.append(pybo.u_derived_from_l_derived(obj_to_check))
             else:
+                self._count_rejection(obj_to_check)
                 stack.append(self._sampler)
 
 
-class LDerFromUDerSampler(TransformationSampler):
+class LDerFromUDerSampler(_RejectionCounters, TransformationSampler):
     """
     Samples the l-derived (dx) class of the given u-derived (dy) class.
 
@@ -857,6 +978,7 @@ class LDerFromUDerSampler(TransformationSampler):
             label = "{}_dx_from_dy".format(sampler.sampled_class)
         super(LDerFromUDerSampler, self).__init__(sampler, None, None, label)
         self._alpha_l_u = alpha_l_u
+        self._init_rejection_counters()
 
     def sample_iterative(self, stack, result_stack, prev, grammar):
         if prev is None or self in prev.children:
@@ -871,9 +993,9 @@ class LDerFromUDerSampler(TransformationSampler):
 
             if is_acceptable(obj_to_check):
                 stack.pop()
-                result_stack.append(
-                    pybo.LDerivedClass(obj_to_check.base_class_object))
+                result_stack.append(pybo.l_derived_from_u_derived(obj_to_check))
             else:
+                self._count_rejection(obj_to_check)
                 stack.append(self._sampler)
 
 
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Opt-in instrumentation of the sampling engines.
+
+An instrumentation is attached to a grammar via
+`DecompositionGrammar.instrumentation`. The engines then report each entered
+and left grammar rule (alias) and each rejection and restart to it. Without
+an instrumentation the engines run their plain loops, there is no overhead.
+
+An instrumentation implements the methods `enter(alias)`, `leave()`,
+`abandon()`, `reject()` and `restart()` of `Instrumentation`.
+"""
+
+import json
+from timeit import default_timer as timer
+
+__all__ = ['Instrumentation',
+           'RuleStats',
+           'RuleStatistics',
+           'SamplingTrace']
+
+
+class Instrumentation(object):
+    """
+    Base class for the receivers of the events of the sampling engines.
+
+    The rules are properly nested, `leave` and `abandon` refer to the
+    innermost rule that is still active.
+
+    Attributes
+    ----------
+    transformations : bool
+        If set, the calls of the transformation functions (e.g. bijections)
+        are reported like rules, see `transformation_label`.
+    """
+
+    transformations = False
+
+    @staticmethod
+    def transformation_label(f):
+        """Name under which calls of the transformation f are reported.
+
+        Parameters
+        ----------
+        f : function
+
+        Returns
+        -------
+        str
+        """
+        return "{}()".format(getattr(f, '__name__', type(f).__name__))
+
+    def reporting(self, f):
+        """Returns a function that calls the transformation f and reports the
+        call.
+
+        Parameters
+        ----------
+        f : function
+
+        Returns
+        -------
+        function
+        """
+        label = self.transformation_label(f)
+
+        def reporting_f(obj):
+            self.enter(label)
+            try:
+                res = f(obj)
+            except BaseException:
+                # E.g. a restart.
+                self.abandon()
+                raise
+            self.leave()
+            return res
+
+        return reporting_f
+
+    def enter(self, alias):
+        """A rule is entered.
+
+        Parameters
+        ----------
+        alias : str
+        """
+
+    def leave(self):
+        """The innermost rule has returned an object."""
+
+    def abandon(self):
+        """The innermost rule is left without an object due to a restart or
+        an exceeded size limit."""
+
+    def reject(self):
+        """A rejection sampler or a change of the derived atom has rejected
+        an object."""
+
+    def restart(self):
+        """A restart (see `DecompositionGrammar.restart_sampler`) happens."""
+
+
+class RuleStats(object):
+    """
+    Counters of a single grammar rule.
+
+    Attributes
+    ----------
+    visits : int
+        Number of times the rule has been entered.
+    objects : int
+        Number of objects returned by the rule, the other visits were
+        abandoned.
+    rejections : int
+        Rejections while the rule was the innermost active rule.
+    restarts : int
+        Restarts while the rule was the innermost active rule.
+    time : float
+        Time in seconds spent in the rule including the rules it calls.
+        Recursive calls of the rule are not counted twice.
+    self_time : float
+        Time in seconds spent in the rule excluding the rules it calls.
+    """
+
+    __slots__ = 'visits', 'objects', 'rejections', 'restarts', 'time', \
+                'self_time', '_depth'
+
+    def __init__(self):
+        self.visits = 0
+        self.objects = 0
+        self.rejections = 0
+        self.restarts = 0
+        self.time = 0.0
+        self.self_time = 0.0
+        # Number of active calls of the rule.
+        self._depth = 0
+
+    def __repr__(self):
+        return "RuleStats(visits={}, objects={}, rejections={}, " \
+               "restarts={}, time={:.6f}, self_time={:.6f})".format(
+                self.visits, self.objects, self.rejections, self.restarts,
+                self.time, self.self_time)
+
+
+class RuleStatistics(Instrumentation):
+    """
+    Instrumentation counting the events per grammar rule.
+
+    Attributes
+    ----------
+    rules : dict
+        Maps the aliases of the visited rules to their `RuleStats`.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        # The active rules as lists [stats, start time, time of the nested
+        # rules].
+        self._active = []
+
+    def reset(self):
+        """Sets all counters to zero."""
+        self.rules = {}
+        self._active = []
+
+    def enter(self, alias):
+        try:
+            stats = self.rules[alias]
+        except KeyError:
+            stats = self.rules[alias] = RuleStats()
+        stats.visits += 1
+        stats._depth += 1
+        self._active.append([stats, timer(), 0.0])
+
+    def _exit(self):
+        stats, start, nested_time = self._active.pop()
+        elapsed = timer() - start
+        stats.self_time += elapsed - nested_time
+        stats._depth -= 1
+        if not stats._depth:
+            stats.time += elapsed
+        if self._active:
+            self._active[-1][2] += elapsed
+        return stats
+
+    def leave(self):
+        self._exit().objects += 1
+
+    def abandon(self):
+        self._exit()
+
+    def reject(self):
+        if self._active:
+            self._active[-1][0].rejections += 1
+
+    def restart(self):
+        if self._active:
+            self._active[-1][0].restarts += 1
+
+    def __str__(self):
+        """Returns a table of the counters, most expensive rules first."""
+        lines = ["{:24s} {:>9s} {:>9s} {:>10s} {:>9s} {:>10s} {:>10s}".format(
+            'rule', 'visits', 'objects', 'rejections', 'restarts', 'time',
+            'self time')]
+        for alias, stats in sorted(self.rules.items(),
+                                   key=lambda item: -item[1].time):
+            lines.append(
+                "{:24s} {:9d} {:9d} {:10d} {:9d} {:10.4f} {:10.4f}".format(
+                    alias, stats.visits, stats.objects, stats.rejections,
+                    stats.restarts, stats.time, stats.self_time))
+        return '\n'.join(lines)
+
+
+class SamplingTrace(Instrumentation):
+    """
+    Instrumentation recording the call tree of the rules and transformations.
+
+    The trace can be exported as collapsed stacks for flamegraph tools and as
+    Chrome trace events (chrome://tracing, Perfetto). Recording is expensive,
+    only use it for profiling.
+
+    Attributes
+    ----------
+    events : list
+        The events in chronological order, tuples (kind, time in seconds,
+        label) where kind is 'enter', 'leave', 'abandon', 'reject' or
+        'restart'. The label of the last three kinds is None.
+    """
+
+    transformations = True
+
+    def __init__(self):
+        self.events = []
+
+    def reset(self):
+        """Deletes all events."""
+        self.events = []
+
+    def enter(self, alias):
+        self.events.append(('enter', timer(), alias))
+
+    def leave(self):
+        self.events.append(('leave', timer(), None))
+
+    def abandon(self):
+        self.events.append(('abandon', timer(), None))
+
+    def reject(self):
+        self.events.append(('reject', timer(), None))
+
+    def restart(self):
+        self.events.append(('restart', timer(), None))
+
+    def collapsed_stacks(self):
+        """Computes the self time of each call stack.
+
+        Returns
+        -------
+        dict
+            Maps the call stacks, given as the labels from the outermost call
+            separated by ';', to their self time in seconds.
+        """
+        stacks = {}
+        # The active calls as lists [stack, start time, time of the nested
+        # calls].
+        active = []
+        for kind, time, label in self.events:
+            if kind == 'enter':
+                if active:
+                    stack = active[-1][0] + ';' + label
+                else:
+                    stack = label
+                active.append([stack, time, 0.0])
+            elif kind == 'leave' or kind == 'abandon':
+                stack, start, nested_time = active.pop()
+                elapsed = time - start
+                stacks[stack] = stacks.get(stack, 0.0) + elapsed - nested_time
+                if active:
+                    active[-1][2] += elapsed
+        return stacks
+
+    def write_collapsed_stacks(self, path):
+        """Writes the collapsed stacks in the input format of flamegraph.pl,
+        inferno and speedscope, the counts are microseconds.
+
+        Parameters
+        ----------
+        path : str
+        """
+        with open(path, 'w') as f:
+            for stack, self_time in sorted(self.collapsed_stacks().items()):
+                count = int(round(self_time * 1e6))
+                if count > 0:
+                    f.write("{} {}\n".format(stack, count))
+
+    def chrome_trace_events(self):
+        """Converts the events to the Chrome trace event format.
+
+        Returns
+        -------
+        list of dict
+        """
+        if not self.events:
+            return []
+        origin = self.events[0][1]
+        trace_events = []
+        for kind, time, label in self.events:
+            event = {'pid': 0, 'tid': 0, 'ts': (time - origin) * 1e6}
+            if kind == 'enter':
+                event.update(name=label, ph='B')
+            elif kind == 'leave':
+                event.update(ph='E')
+            elif kind == 'abandon':
+                event.update(ph='E', args={'abandoned': True})
+            else:
+                event.update(name=kind, ph='i', s='t')
+            trace_events.append(event)
+        return trace_events
+
+    def write_chrome_trace(self, path):
+        """Writes the events as a Chrome trace JSON file.
+
+        Parameters
+        ----------
+        path : str
+        """
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.chrome_trace_events(),
+                       'displayTimeUnit': 'ms'}, f)
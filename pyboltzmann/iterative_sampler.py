@@ -16,105 +16,345 @@ class IterativeSampler(object):
     """
     Implements the iterative sampling mechanism.
 
+    All constructions, including sets, substitutions and restartable
+    samplers, are processed by the single driver loop in `sample`, so the
+    Python call stack does not grow with the size of the sampled object.
+
     Parameters
     ----------
     sampler : BoltzmannSamplerBase
     grammar : DecompositionGrammar
     is_restartable : bool
+        If set, a restart started outside of any `RestartableSampler`
+        restarts the whole sampler.
+    max_l_size : int, optional (default=None)
+        If given, the attempt is aborted by raising `_SizeLimitExceeded` as
+        soon as the objects sampled so far have a larger total l-size.
+    max_u_size : int, optional (default=None)
+        Same for the u-size.
+    instrumentation : Instrumentation, optional (default=None)
+        If given, the alias samplers, rejections and restarts are reported to
+        it.
     """
 
-    def __init__(self, sampler, grammar, is_restartable=False):
+    def __init__(self, sampler, grammar, is_restartable=False,
+                 max_l_size=None, max_u_size=None, instrumentation=None):
         self.sampler = sampler
         self.grammar = grammar
-
-        # self.is_restartable = True
-        # self.sample = self.sample_with_restart_check
         self.is_restartable = is_restartable
-        if is_restartable:
-            self.sample = self.sample_with_restart_check
+        self.max_l_size = max_l_size
+        self.max_u_size = max_u_size
+        self.instrumentation = instrumentation
+
+    class _SizeLimitExceeded(Exception):
+        """Raised when a partial object exceeds the size limits."""
+
+    class _Restart(Exception):
+        """Raised by `DecompositionGrammar.restart_sampler`."""
 
     class _ResultStack(list):
-        """Modified stack that keeps track of the total l-size it contains."""
+        """Modified stack that keeps track of the total l-size and u-size it
+        contains and raises `_SizeLimitExceeded` if they exceed the limits.
 
-        def __init__(self, grammar):
+        Parameters
+        ----------
+        max_l_size : int or None
+        max_u_size : int or None
+        """
+
+        def __init__(self, max_l_size, max_u_size):
+            list.__init__(self)
             self.l_size = 0
-            self.grammar = grammar
-            # print()
+            self.u_size = 0
+            self.max_l_size = max_l_size
+            self.max_u_size = max_u_size
 
         def append(self, obj):
             list.append(self, obj)
-            self.l_size += obj.l_size
-            # print(self.l_size)
-            if self.l_size > 1000:
-                # self.grammar.restart_sampler()
-                pass
+            if self.max_l_size is not None:
+                self.l_size += obj.l_size
+                if self.l_size > self.max_l_size:
+                    raise IterativeSampler._SizeLimitExceeded
+            if self.max_u_size is not None:
+                self.u_size += obj.u_size
+                if self.u_size > self.max_u_size:
+                    raise IterativeSampler._SizeLimitExceeded
 
         def pop(self, **kwargs):
             obj = list.pop(self)
-            self.l_size -= obj.l_size
+            self._remove(obj)
             return obj
 
-    def sample_with_restart_check(self):
-        """Invokes the iterative sampler for the given symbolic parameters.
+        def __delitem__(self, key):
+            removed = self[key] if isinstance(key, slice) else [self[key]]
+            list.__delitem__(self, key)
+            for obj in removed:
+                self._remove(obj)
+
+        def _remove(self, obj):
+            if self.max_l_size is not None:
+                self.l_size -= obj.l_size
+            if self.max_u_size is not None:
+                self.u_size -= obj.u_size
+
+    class _Repeat(object):
+        """Stack frame that samples k times from a sampler and pushes
+        finish(list of the k results).
 
-        In each iteration, check if the sampler should be restarted.
-        This can notable decrease performance.
+        Parameters
+        ----------
+        sampler : BoltzmannSamplerBase
+        k : int
+        finish : function
         """
 
-        # Main stack.
-        stack = [self.sampler]
-        # Stack that holds the intermediate sampling results.
-        # result_stack = self._ResultStack(self.grammar)
-        result_stack = []
-        # The previously visited node in the decomposition tree.
-        prev = None
+        __slots__ = 'children', '_k', '_remaining', '_finish'
 
-        while stack:
+        def __init__(self, sampler, k, finish):
+            self.children = sampler,  # 1-tuple.
+            self._k = k
+            self._remaining = k
+            self._finish = finish
 
-            # Check if the sampler should be restarted.
-            if self.grammar._restart_flag:
-                if not self.is_restartable:
-                    raise PyBoltzmannError(
-                        "Trying to restart a non-restartable sampler.")
-                # print("Restarting ...")
-                self.grammar._restart_flag = False
-                stack = [self.sampler]
-                # result_stack = self._ResultStack(self.grammar)
-                result_stack = []
-                prev = None
-                continue
+        def get_children(self):
+            return self.children
+
+        def sample_iterative(self, stack, result_stack, prev, grammar):
+            if self._remaining:
+                self._remaining -= 1
+                stack.append(self.children[0])
+            else:
+                stack.pop()
+                k = self._k
+                if k:
+                    objs = result_stack[-k:]
+                    del result_stack[-k:]
+                else:
+                    objs = []
+                result_stack.append(self._finish(objs))
+
+    class _RestartPoint(object):
+        """Stack frame of a restartable sampler, a restart resumes here.
+
+        The frame may be executed several times (e.g. within a `_Repeat`),
+        the height of the result stack is recorded each time it is entered.
+
+        Parameters
+        ----------
+        sampler : BoltzmannSamplerBase
+        """
+
+        __slots__ = 'children', 'result_height'
+
+        def __init__(self, sampler):
+            self.children = sampler,  # 1-tuple.
+            self.result_height = None
+
+        def get_children(self):
+            return self.children
+
+        def sample_iterative(self, stack, result_stack, prev, grammar):
+            if prev is self.children[0]:
+                # The result of the sampler stays on the result stack.
+                stack.pop()
+                self.result_height = None
+            else:
+                if self.result_height is None:
+                    self.result_height = len(result_stack)
+                stack.append(self.children[0])
+
+    class _SampledObjects(object):
+        """Hands out already sampled objects in the order of sampling via the
+        `sample` method expected by `replace_l_atoms` and `replace_u_atoms`.
+        """
+
+        __slots__ = '_objs', '_next'
+
+        def __init__(self, objs):
+            self._objs = objs
+            self._next = 0
+
+        def sample(self):
+            try:
+                obj = self._objs[self._next]
+            except IndexError:
+                raise pybo.PyBoltzmannError(
+                    "More atoms substituted than the size of the object")
+            self._next += 1
+            return obj
 
-            # Get top of stack.
-            curr = stack[-1]
+        def sample_batch(self, k):
+            start = self._next
+            if start + k > len(self._objs):
+                raise pybo.PyBoltzmannError(
+                    "More atoms substituted than the size of the object")
+            self._next += k
+            return self._objs[start:start + k]
 
-            curr.sample_iterative(stack, result_stack, prev, self.grammar)
+        def all_used(self):
+            return self._next == len(self._objs)
 
-            prev = curr
+    @staticmethod
+    def _substitute(core_object, objs, l_atoms):
+        """Substitutes the l-atoms (u-atoms) of core_object by the given
+        objects.
 
+        One object has been sampled for each atom, i.e. len(objs) must be the
+        l-size (u-size) of core_object.
+        """
+        sampled = IterativeSampler._SampledObjects(objs)
+        if l_atoms:
+            res = core_object.replace_l_atoms(sampled)
+        else:
+            res = core_object.replace_u_atoms(sampled)
+        if not sampled.all_used():
+            raise pybo.PyBoltzmannError(
+                "Fewer atoms substituted than the size of the object")
+        return res
+
+    @staticmethod
+    def _unwind(frames, instrumentation=None):
+        """Executes the after-hooks of abandoned hook samplers, innermost
+        first, and reports the abandoned alias samplers.
+
+        All frames below the top of the stack have been entered, so frames
+        must not contain the top of the stack.
+        """
+        for frame in reversed(frames):
+            if isinstance(frame, pybo.HookSampler) and frame.after is not None:
+                frame.after()
+            elif instrumentation is not None \
+                    and isinstance(frame, pybo.AliasSampler):
+                instrumentation.abandon()
+
+    @staticmethod
+    def _restart(stack, result_stack, instrumentation=None):
+        """Resets the stacks to the innermost restart point."""
+        for index in range(len(stack) - 1, -1, -1):
+            point = stack[index]
+            if isinstance(point, IterativeSampler._RestartPoint):
+                if instrumentation is not None:
+                    instrumentation.restart()
+                IterativeSampler._unwind(stack[index + 1:-1], instrumentation)
+                del stack[index + 1:]
+                del result_stack[point.result_height:]
+                return
+        raise pybo.PyBoltzmannError(
+            "Trying to restart a non-restartable sampler.")
+
+    def _root(self):
+        """Returns the frame an object is sampled from."""
+        if self.is_restartable:
+            return self._RestartPoint(self.sampler)
+        return self.sampler
+
+    def sample(self):
+        """Invokes the iterative sampler for the given symbolic parameters."""
+        # Stack that holds the intermediate sampling results.
+        if self.max_l_size is None and self.max_u_size is None:
+            result_stack = []
+        else:
+            result_stack = self._ResultStack(self.max_l_size, self.max_u_size)
+        self._run([self._root()], result_stack)
         assert len(result_stack) == 1
         assert result_stack[0] is not None
         return result_stack[0]
 
-    def sample(self):
-        """Invokes the iterative sampler for the given symbolic parameters."""
+    def sample_batch(self, k):
+        """Samples k independent objects in a single run of the driver loop.
 
-        # Main stack.
-        stack = [self.sampler]
-        # Stack that holds the intermediate sampling results.
-        # result_stack = self._ResultStack()
+        The objects are the same as the ones returned by k calls of `sample`,
+        the size limits are ignored.
+
+        Parameters
+        ----------
+        k : int
+
+        Returns
+        -------
+        list
+        """
         result_stack = []
+        self._run([self._Repeat(self._root(), k, list)], result_stack)
+        return result_stack.pop()
+
+    def _run(self, stack, result_stack):
+        """The driver loop, runs until the given stack is empty."""
+        if self.instrumentation is not None:
+            self._run_instrumented(stack, result_stack)
+            return
         # The previously visited node in the decomposition tree.
         prev = None
 
         while stack:
+            try:
+                while stack:
 
-            # Get top of stack.
-            curr = stack[-1]
+                    # Get top of stack.
+                    curr = stack[-1]
 
-            curr.sample_iterative(stack, result_stack, prev, self.grammar)
+                    curr.sample_iterative(
+                        stack, result_stack, prev, self.grammar)
 
-            prev = curr
+                    prev = curr
 
-        assert len(result_stack) == 1
-        assert result_stack[0] is not None
-        return result_stack[0]
+            except self._Restart:
+                self._restart(stack, result_stack)
+                prev = None
+            except self._SizeLimitExceeded:
+                self._unwind(stack[:-1])
+                raise
+
+    def _run_instrumented(self, stack, result_stack):
+        """Variant of the driver loop reporting to the instrumentation."""
+        instrumentation = self.instrumentation
+        rejecting = (pybo.RejectionSampler, pybo.UDerFromLDerSampler,
+                     pybo.LDerFromUDerSampler)
+        transformations = instrumentation.transformations
+        prev = None
+
+        while stack:
+            try:
+                while stack:
+                    curr = stack[-1]
+                    entered = prev is None or curr in prev.children
+
+                    if isinstance(curr, pybo.AliasSampler):
+                        if entered:
+                            instrumentation.enter(curr.sampled_class)
+                        else:
+                            instrumentation.leave()
+                        curr.sample_iterative(
+                            stack, result_stack, prev, self.grammar)
+                    elif not entered and isinstance(curr, rejecting):
+                        height = len(stack)
+                        curr.sample_iterative(
+                            stack, result_stack, prev, self.grammar)
+                        # A rejected object is sampled again.
+                        if len(stack) > height:
+                            instrumentation.reject()
+                    elif not entered and transformations \
+                            and isinstance(curr, pybo.TransformationSampler) \
+                            and curr.f is not None:
+                        # The transformation is applied now.
+                        instrumentation.enter(
+                            instrumentation.transformation_label(curr.f))
+                        try:
+                            curr.sample_iterative(
+                                stack, result_stack, prev, self.grammar)
+                        except BaseException:
+                            instrumentation.abandon()
+                            raise
+                        instrumentation.leave()
+                    else:
+                        curr.sample_iterative(
+                            stack, result_stack, prev, self.grammar)
+
+                    prev = curr
+
+            except self._Restart:
+                self._restart(stack, result_stack, instrumentation)
+                prev = None
+            except self._SizeLimitExceeded:
+                self._unwind(stack[:-1], instrumentation)
+                raise
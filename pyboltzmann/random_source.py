@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Sources of random numbers for the sampling framework.
+
+All random decisions of the framework (and of the planar graph sampler) are
+drawn from the active random source, see `get_random_source` and
+`set_random_source` in `pyboltzmann.utils`. Random choices which only affect
+the structure but not the sizes of the sampled objects are drawn from the
+building random source, see `get_building_random_source`.
+"""
+
+import itertools
+import operator
+import random
+
+__all__ = ['RandomSource',
+           'PythonRandomSource',
+           'BufferedRandomSource']
+
+
+class RandomSource(object):
+    """
+    Abstract base class for random sources.
+
+    Subclasses have to provide the attribute `random`, a function without
+    arguments returning a uniform float from [0, 1), and implement `seed`,
+    `getstate` and `setstate`. For speed, `random` is an attribute and not a
+    method so that it can be a builtin function.
+    """
+
+    random = None
+
+    def seed(self, seed=None):
+        """Re-initializes the source.
+
+        Parameters
+        ----------
+        seed : int, optional (default=None)
+            Seed, uses system entropy if None.
+        """
+        raise NotImplementedError
+
+    def getstate(self):
+        """Returns an object capturing the current state of the source."""
+        raise NotImplementedError
+
+    def setstate(self, state):
+        """Restores a state obtained from `getstate`."""
+        raise NotImplementedError
+
+    def randrange(self, n):
+        """Returns a random integer from [0, n).
+
+        Parameters
+        ----------
+        n : int
+
+        Returns
+        -------
+        int
+        """
+        if n <= 0:
+            raise ValueError("empty range for randrange()")
+        return int(self.random() * n)
+
+    def choice(self, seq):
+        """Returns a random element of the non-empty sequence seq."""
+        return seq[self.randrange(len(seq))]
+
+    def shuffle(self, x):
+        """Shuffles the list x in place."""
+        randrange = self.randrange
+        for i in reversed(range(1, len(x))):
+            j = randrange(i + 1)
+            x[i], x[j] = x[j], x[i]
+
+    def sample(self, population, k):
+        """Returns a list of k unique elements chosen from population."""
+        result = list(population)
+        if not 0 <= k <= len(result):
+            raise ValueError("sample larger than population")
+        randrange = self.randrange
+        n = len(result)
+        # Partial Fisher-Yates shuffle.
+        for i in range(k):
+            j = i + randrange(n - i)
+            result[i], result[j] = result[j], result[i]
+        return result[:k]
+
+
+class PythonRandomSource(RandomSource):
+    """
+    Random source backed by Python's Mersenne Twister.
+
+    Parameters
+    ----------
+    generator : random.Random, optional (default=new instance)
+    """
+
+    def __init__(self, generator=None):
+        if generator is None:
+            generator = random.Random()
+        self.generator = generator
+        self.random = generator.random
+        self.randrange = generator.randrange
+        self.choice = generator.choice
+        self.shuffle = generator.shuffle
+        self.sample = generator.sample
+
+    def seed(self, seed=None):
+        self.generator.seed(seed)
+
+    def getstate(self):
+        return self.generator.getstate()
+
+    def setstate(self, state):
+        self.generator.setstate(state)
+
+
+class BufferedRandomSource(RandomSource):
+    """
+    Random source drawing uniforms in blocks from a NumPy PCG64 generator.
+
+    The uniforms are served from a buffer so that a single draw is a call of
+    a builtin function instead of a Python level call into `random.Random`.
+
+    Parameters
+    ----------
+    seed : int, optional (default=None)
+    block_size : int, optional (default=4096)
+        Number of uniforms drawn at once.
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        import numpy as np
+        self._np = np
+        self.block_size = block_size
+        self._bit_generator = None
+        self._generator = None
+        # State of the bit generator before the current block was drawn.
+        self._block_state = None
+        self._block = None
+        self._pending_state = None
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        self._bit_generator = self._np.random.PCG64(seed)
+        self._generator = self._np.random.Generator(self._bit_generator)
+        self._reset(self._bit_generator.state, 0)
+
+    def _blocks(self, offset):
+        while True:
+            self._block_state = self._bit_generator.state
+            block = self._generator.random(self.block_size).tolist()
+            if offset:
+                block = block[offset:]
+                offset = 0
+            self._block = iter(block)
+            yield self._block
+
+    def _reset(self, bit_generator_state, offset):
+        self._bit_generator.state = bit_generator_state
+        self._pending_state = bit_generator_state, offset
+        self._block = None
+        self.random = \
+            itertools.chain.from_iterable(self._blocks(offset)).__next__
+
+    def getstate(self):
+        if self._block is None:
+            # Nothing has been drawn since the last reset.
+            return self._pending_state
+        consumed = self.block_size - operator.length_hint(self._block)
+        return self._block_state, consumed
+
+    def setstate(self, state):
+        bit_generator_state, offset = state
+        self._reset(bit_generator_state, offset)
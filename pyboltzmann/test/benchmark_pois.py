@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+"""
+Microbenchmark of the Poisson generator: per-draw cost of `pois` compared to
+drawing from a table precomputed with `pois_table`.
+"""
+
+from __future__ import division, print_function
+
+import timeit
+
+import pyboltzmann as pybo
+
+
+def main(number=100000):
+    print("{:>3s} {:>8s} {:>12s} {:>12s} {:>8s}".format(
+        'd', 'lambda', 'pois', 'table', 'speedup'))
+    for d, l in [(0, 0.05), (0, 1.0), (1, 1.0), (2, 3.0), (0, 20.0)]:
+        cdf, p_last = pybo.pois_table(d, l)
+        time_pois = min(timeit.repeat(
+            lambda: pybo.pois(d, l), number=number, repeat=3))
+        time_table = min(timeit.repeat(
+            lambda: pybo.pois_from_table(d, l, cdf, p_last),
+            number=number, repeat=3))
+        print("{:>3d} {:>8.2f} {:>10.3f}us {:>10.3f}us {:>7.2f}x".format(
+            d, l, time_pois / number * 1e6, time_table / number * 1e6,
+            time_pois / time_table))
+
+
+if __name__ == "__main__":
+    main()
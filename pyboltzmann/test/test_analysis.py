@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import math
+
+import pyboltzmann as pybo
+from pyboltzmann.test.test_compiled_sampler import eval_T, set_grammar, \
+    sum_grammar
+
+
+def eval_T_dx(x, y):
+    # T_dx = T^2 + 2xT * T_dx.
+    T = eval_T(x, y)
+    return T ** 2 / (1 - 2 * x * T)
+
+
+def eval_T_dy(x, y):
+    # T_dy = 1 + 2xT * T_dy.
+    return 1 / (1 - 2 * x * eval_T(x, y))
+
+
+def derived_tree_grammar():
+    """Trees with a change of the derived atom, the evaluations are
+    consistent."""
+    L = pybo.LAtomSampler
+    Z = pybo.ZeroAtomSampler
+    U = pybo.UAtomSampler
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'T': U() + L() * Rule('T') ** 2,
+        'T_dy': Z() + L() * Rule('T') * Rule('T_dy')
+                + L() * Rule('T_dy') * Rule('T'),
+        'T_dx': pybo.LDerFromUDerSampler(Rule('T_dy'), 1.0),
+    })
+    x, y = 0.2, 1.0
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'T(x,y)': eval_T(x, y),
+        'T_dy(x,y)': eval_T_dy(x, y),
+        'T_dx(x,y)': eval_T_dx(x, y),
+    })
+    return grammar, oracle
+
+
+def log_derivative(f, x, y, h=1e-6):
+    """Expected l-size x * f_x / f of the Boltzmann distribution with the
+    generating function f."""
+    return x * (math.log(f(x + h, y)) - math.log(f(x - h, y))) / (2 * h)
+
+
+def analysis(make_grammar, alias):
+    grammar, oracle = make_grammar()
+    pybo.BoltzmannSamplerBase.oracle = oracle
+    grammar.init(alias)
+    return grammar, grammar.analyze()
+
+
+def empirical_moments(grammar, alias, num_samples=20000):
+    pybo.seed(4)
+    sizes = [grammar.sample_iterative(alias).l_size
+             for _ in range(num_samples)]
+    mean = sum(sizes) / num_samples
+    return mean, sum((s - mean) ** 2 for s in sizes) / num_samples
+
+
+class TestGrammarAnalysis(object):
+
+    def test_expected_size(self):
+        _, a = analysis(derived_tree_grammar, 'T_dx')
+        x, y = 0.2, 1.0
+        l_size, u_size = a.expected_size('T')
+        assert abs(l_size - log_derivative(eval_T, x, y)) < 1e-6
+        # Trees have one more leaf than inner nodes.
+        assert abs(u_size - l_size - 1) < 1e-9
+        # The derived atom is not counted.
+        expected = log_derivative(eval_T_dx, x, y)
+        assert abs(a.expected_size('T_dx')[0] - expected) < 1e-6
+
+    def test_variance(self):
+        _, a = analysis(derived_tree_grammar, 'T_dx')
+        x, y = 0.2, 1.0
+        h = 1e-4
+        # Var[L] = x * d/dx E[L].
+        expected = x * (log_derivative(eval_T, x + h, y)
+                        - log_derivative(eval_T, x - h, y)) / (2 * h)
+        assert abs(a.size_variance('T')[0] / expected - 1) < 1e-4
+
+    def test_empirical_moments(self):
+        for make_grammar, alias in [(set_grammar, 'Q'), (sum_grammar, 'C')]:
+            grammar, a = analysis(make_grammar, alias)
+            mean, var = empirical_moments(grammar, alias)
+            assert abs(a.expected_size(alias)[0] / mean - 1) < 0.05
+            assert abs(a.size_variance(alias)[0] / var - 1) < 0.15
+
+    def test_expected_visits(self):
+        _, a = analysis(derived_tree_grammar, 'T_dx')
+        visits = a.expected_visits('T')
+        # Each inner node calls T twice.
+        assert abs(visits['T'] - 1 - 2 * a.expected_size('T')[0]) < 1e-9
+        assert 'T_dy' not in visits
+        # The change of the derived atom rejects some objects of T_dy.
+        assert a.expected_visits('T_dx')['T_dy'] > 1
+        assert a.expected_cost('T_dx') > a.expected_cost('T')
+
+    def test_rejection_cost(self):
+        _, a = analysis(derived_tree_grammar, 'T_dx')
+        mean = a.expected_size('T')[0]
+        prob = a.size_probability('T', 0, 10 ** 6)
+        assert abs(prob - 1) < 1e-9
+        res = a.rejection_cost('T', mean, 2 * mean)
+        assert 0 < res['acceptance_probability'] < 1
+        assert res['expected_attempts'] == 1 / res['acceptance_probability']
+        truncated = a.rejection_cost('T', mean, 2 * mean, max_l_size=2 * mean)
+        assert truncated['expected_cost'] < res['expected_cost']
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import math
+
+import pyboltzmann as pybo
+
+
+def eval_T(x, y):
+    # T = y + x * T^2 (leaves are u-atoms, inner nodes are l-atoms).
+    return (1 - math.sqrt(1 - 4 * x * y)) / (2 * x)
+
+
+def tree_grammar():
+    """Trees with derived classes, all atoms and a zero atom."""
+    L = pybo.LAtomSampler
+    U = pybo.UAtomSampler
+    Z = pybo.ZeroAtomSampler
+    Bij = pybo.BijectionSampler
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'T': U() + L() * Rule('T') ** 2,
+        'T_dx': Bij(L() * Rule('T'), pybo.LDerivedClass),
+        'T_dy': Bij(U() * Rule('T'), pybo.UDerivedClass),
+        'T_dx_from_dy': pybo.LDerFromUDerSampler(Rule('T_dy'), 1.0),
+        'T_dy_from_dx': pybo.UDerFromLDerSampler(Rule('T_dx'), 1.0),
+        'A': Rule('T_dx_from_dy') * Z() + Rule('T_dy_from_dx'),
+    })
+    x, y = 0.2, 1.0
+    T = eval_T(x, y)
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'T(x,y)': T,
+        # Only needed to be consistent with each other.
+        'T_dx_from_dy(x,y)': 1.0,
+        'T_dy_from_dx(x,y)': 1.0,
+    })
+    return grammar, oracle
+
+
+def set_grammar():
+    """Sets, substitutions and rejection."""
+    L = pybo.LAtomSampler
+    U = pybo.UAtomSampler
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'N': U() + U() * Rule('N'),
+        'S': pybo.SetSampler(0, pybo.SetSampler(1, L())),
+        'P': pybo.LSubsSampler(Rule('S'), U() * L() + L()),
+        'Q': pybo.USubsSampler(Rule('P') * U(), Rule('N')),
+        'R': pybo.RejectionSampler(Rule('Q'), lambda obj: obj.l_size < 8,
+                                   eval_transform=lambda e, x, y: e),
+    })
+    x, y = 0.6, 0.4
+    N = y / (1 - y)
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'N(x,y)': N,
+        '(N(x,y)*x+x)': N * x + x,
+    })
+    return grammar, oracle
+
+
+def sum_grammar():
+    """Nested sums which are flattened into n-ary choices."""
+    L = pybo.LAtomSampler
+    U = pybo.UAtomSampler
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'C': U() + L() * U() + L() * L() + U() * U() * L()
+             + L() * Rule('C') ** 2,
+    })
+    x, y = 0.1, 0.5
+    # C = a + b * C^2 with a = y + xy + x^2 + xy^2 and b = x.
+    a = y + x * y + x ** 2 + x * y ** 2
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'C(x,y)': (1 - math.sqrt(1 - 4 * a * x)) / (2 * x),
+    })
+    return grammar, oracle
+
+
+class RestartingBuilder(pybo.DefaultBuilder):
+    """Restarts the sampler with some probability when a u-atom is built."""
+
+    def __init__(self):
+        self.grammar = None
+
+    def u_atom(self):
+        if pybo.bern(0.05):
+            self.grammar.restart_sampler()
+        return pybo.UAtomClass()
+
+
+def restart_grammar(calls):
+    """Restartable sampler containing hooks and sets."""
+    Rule = pybo.AliasSampler
+
+    def before():
+        calls.append('before')
+
+    def after():
+        calls.append('after')
+
+    grammar = pybo.DecompositionGrammar({
+        'T': pybo.UAtomSampler() + pybo.LAtomSampler() * Rule('T') ** 2,
+        'F': pybo.RestartableSampler(
+            pybo.HookSampler(pybo.SetSampler(0, Rule('T')), before, after)
+            * pybo.LAtomSampler()),
+    })
+    builder = RestartingBuilder()
+    builder.grammar = grammar
+    grammar.set_builder(['T'], builder)
+    x, y = 0.2, 1.0
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'T(x,y)': eval_T(x, y),
+    })
+    return grammar, oracle
+
+
+def sizes(grammar, alias, seed, num_samples=200):
+    pybo.seed(seed)
+    return [(obj.l_size, obj.u_size)
+            for obj in (grammar.sample_iterative(alias)
+                        for _ in range(num_samples))]
+
+
+class TestCompiledSampler(object):
+    """Checks that the compiled program samples the same objects as the
+    iterative sampler given the same random seed."""
+
+    def check_equivalence(self, grammar, oracle, alias, x='x', y='y'):
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init(alias, x, y)
+        assert grammar.program is None
+        expected = sizes(grammar, alias, 42)
+        grammar.init(alias, x, y, compiled=True)
+        assert len(grammar.program) > 0
+        assert sizes(grammar, alias, 42) == expected
+        return expected
+
+    def test_trees(self):
+        grammar, oracle = tree_grammar()
+        self.check_equivalence(grammar, oracle, 'T')
+
+    def test_derived_classes(self):
+        grammar, oracle = tree_grammar()
+        self.check_equivalence(grammar, oracle, 'A')
+
+    def test_sets_substitutions_and_rejection(self):
+        grammar, oracle = set_grammar()
+        result = self.check_equivalence(grammar, oracle, 'R')
+        assert all(l_size < 8 for l_size, _ in result)
+
+    def test_restarts_and_hooks(self):
+        calls_iterative = []
+        grammar, oracle = restart_grammar(calls_iterative)
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('F')
+        expected = sizes(grammar, 'F', 7)
+        calls_compiled = []
+        grammar, oracle = restart_grammar(calls_compiled)
+        grammar.init('F', compiled=True)
+        assert sizes(grammar, 'F', 7) == expected
+        assert calls_compiled == calls_iterative
+        # Restarts have actually happened.
+        assert len(calls_compiled) > 2 * len(expected)
+
+    def test_aliases_are_resolved(self):
+        grammar, oracle = tree_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('T', compiled=True)
+        program = grammar.program
+        assert not any(isinstance(s, pybo.AliasSampler)
+                       for s in program.samplers)
+        assert program.entry_point('T') == 0
+
+    def test_only_reachable_rules_are_compiled(self):
+        grammar, oracle = set_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('N', compiled=True)
+        assert 'S' not in grammar.program.entry_points
+        assert grammar.sample_iterative('N').u_size > 0
+
+    def test_set_builder_recompiles(self):
+        grammar, oracle = tree_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('T', compiled=True)
+        grammar.set_builder(builder=pybo.DummyBuilder())
+        obj = grammar.sample_iterative('T')
+        assert isinstance(obj, pybo.DummyClass)
+
+    def test_flattened_sums(self):
+        grammar, oracle = sum_grammar()
+        self.check_equivalence(grammar, oracle, 'C')
+        assert 'CHOICE' in str(grammar.program)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import pyboltzmann as pybo
+from pyboltzmann.test.test_compiled_sampler import eval_T, set_grammar, \
+    sum_grammar
+
+
+def derived_grammar():
+    """Derived classes with a transformation that changes the sizes."""
+    L = pybo.LAtomSampler
+    U = pybo.UAtomSampler
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'T': U() + L() * Rule('T') ** 2,
+        # The u-atom in front is the marked one.
+        'T_dy': pybo.TransformationSampler(
+            U() * Rule('T'),
+            pybo.UDerivedClass,
+            dummy_f=lambda dummy: pybo.DummyClass(dummy.l_size,
+                                                  dummy.u_size - 1)),
+        'T_dx': pybo.LDerFromUDerSampler(Rule('T_dy'), 1.0),
+    })
+    x, y = 0.2, 1.0
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'T(x,y)': eval_T(x, y),
+        'T_dy(x,y)': 1.0,
+        'T_dx(x,y)': 1.0,
+    })
+    return grammar, oracle
+
+
+def random_transformation_grammar():
+    """The transformation draws random numbers but its dummy counterpart
+    does not."""
+    grammar = pybo.DecompositionGrammar({
+        'T': pybo.UAtomSampler()
+             + pybo.LAtomSampler() * pybo.AliasSampler('T') ** 2,
+        'S': pybo.TransformationSampler(
+            pybo.AliasSampler('T'),
+            lambda obj: obj if pybo.bern(0.5) else obj,
+            dummy_f=lambda dummy: dummy),
+    })
+    x, y = 0.2, 1.0
+    oracle = pybo.EvaluationOracle({
+        'x': x,
+        'y': y,
+        'T(x,y)': eval_T(x, y),
+        'S(x,y)': eval_T(x, y),
+    })
+    return grammar, oracle
+
+
+def is_large(obj):
+    return obj.l_size + obj.u_size >= 4
+
+
+def sample_sizes(grammar, alias, n=200):
+    pybo.seed(5)
+    return [(obj.l_size, obj.u_size, isinstance(obj, pybo.DummyClass))
+            for obj in (grammar.sample_iterative(alias) for _ in range(n))]
+
+
+class TestDummySampling(object):
+
+    def test_sizes(self):
+        for make_grammar, alias in [(set_grammar, 'R'), (sum_grammar, 'C'),
+                                    (derived_grammar, 'T_dx')]:
+            for compiled in [False, True]:
+                grammar, oracle = make_grammar()
+                pybo.BoltzmannSamplerBase.oracle = oracle
+                grammar.init(alias, compiled=compiled)
+                real = sample_sizes(grammar, alias)
+                grammar.dummy_sampling_mode()
+                assert grammar.is_dummy_sampling_mode
+                dummies = sample_sizes(grammar, alias)
+                # The same random decisions are made, so the sizes agree.
+                assert [(l, u) for l, u, _ in dummies] \
+                    == [(l, u) for l, u, _ in real]
+                assert all(is_dummy for _, _, is_dummy in dummies)
+                assert not any(is_dummy for _, _, is_dummy in real)
+
+    def test_real_sampling_mode(self):
+        grammar, oracle = derived_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('T_dx', compiled=True)
+        real = sample_sizes(grammar, 'T_dx')
+        grammar.dummy_sampling_mode()
+        # Switching twice has no effect.
+        grammar.dummy_sampling_mode()
+        sample_sizes(grammar, 'T_dx')
+        grammar.real_sampling_mode()
+        assert not grammar.is_dummy_sampling_mode
+        assert sample_sizes(grammar, 'T_dx') == real
+
+    def test_two_phase(self):
+        for make_grammar, alias in [(set_grammar, 'R'), (sum_grammar, 'C'),
+                                    (derived_grammar, 'T_dx')]:
+            for compiled in [False, True]:
+                grammar, oracle = make_grammar()
+                pybo.BoltzmannSamplerBase.oracle = oracle
+                grammar.init(alias, compiled=compiled)
+                pybo.seed(3)
+                expected = []
+                for _ in range(30):
+                    obj = grammar.sample_iterative(alias)
+                    while not is_large(obj):
+                        obj = grammar.sample_iterative(alias)
+                    expected.append((obj.l_size, obj.u_size))
+                pybo.seed(3)
+                objs = [grammar.sample_two_phase(alias, is_large)
+                        for _ in range(30)]
+                # Same objects as with plain rejection sampling.
+                assert [(obj.l_size, obj.u_size) for obj in objs] == expected
+                assert not any(isinstance(obj, pybo.DummyClass)
+                               for obj in objs)
+                assert not grammar.is_dummy_sampling_mode
+
+    def test_two_phase_replay_error(self):
+        grammar, oracle = random_transformation_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('S')
+        try:
+            grammar.sample_two_phase('S', is_large)
+            assert False
+        except pybo.PyBoltzmannError:
+            pass
+        assert not grammar.is_dummy_sampling_mode
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import json
+import os
+
+import pyboltzmann as pybo
+from pyboltzmann.test.test_compiled_sampler import restart_grammar, \
+    set_grammar, tree_grammar
+
+
+def rule_statistics(make_grammar, alias, compiled, seed, num_samples=100):
+    grammar, oracle = make_grammar()
+    pybo.BoltzmannSamplerBase.oracle = oracle
+    grammar.init(alias, compiled=compiled)
+    grammar.instrumentation = pybo.RuleStatistics()
+    pybo.seed(seed)
+    sizes = [grammar.sample_iterative(alias).l_size
+             for _ in range(num_samples)]
+    counters = {a: (s.visits, s.objects, s.rejections, s.restarts)
+                for a, s in grammar.instrumentation.rules.items()}
+    return counters, sizes
+
+
+class TestInstrumentation(object):
+
+    def test_restarts(self):
+        counters, _ = rule_statistics(lambda: restart_grammar([]), 'F',
+                                      False, 1)
+        assert counters['F'][:2] == (100, 100)
+        visits, objects, _, restarts = counters['T']
+        assert restarts > 0
+        # Restarts abandon the active calls of T.
+        assert objects < visits
+        assert rule_statistics(lambda: restart_grammar([]), 'F', True, 1)[0] \
+            == counters
+
+    def test_rejections(self):
+        for make_grammar, alias in [(set_grammar, 'R'), (tree_grammar, 'A')]:
+            counters, _ = rule_statistics(make_grammar, alias, False, 2)
+            assert counters[alias][:2] == (100, 100)
+            assert sum(c[2] for c in counters.values()) > 0
+            assert rule_statistics(make_grammar, alias, True, 2)[0] \
+                == counters
+
+    def test_time(self):
+        grammar, oracle = tree_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('A', compiled=True)
+        statistics = pybo.RuleStatistics()
+        grammar.instrumentation = statistics
+        for _ in range(50):
+            grammar.sample_iterative('A')
+        rules = statistics.rules
+        # Recursive calls of T are only counted once.
+        assert rules['A'].time >= rules['T_dx'].time + rules['T_dy'].time
+        assert rules['T'].time >= rules['T'].self_time
+        assert abs(sum(s.self_time for s in rules.values())
+                   - rules['A'].time) < 1e-6
+        assert 'T_dx_from_dy' in str(statistics)
+
+    def test_disabled(self):
+        # The instrumentation does not change the sampled objects.
+        for compiled in [False, True]:
+            _, sizes = rule_statistics(set_grammar, 'R', compiled, 3)
+            grammar, oracle = set_grammar()
+            pybo.BoltzmannSamplerBase.oracle = oracle
+            grammar.init('R', compiled=compiled)
+            grammar.instrumentation = pybo.RuleStatistics()
+            grammar.instrumentation = None
+            pybo.seed(3)
+            assert [grammar.sample_iterative('R').l_size
+                    for _ in range(100)] == sizes
+
+    def test_sampling_trace(self, tmpdir):
+        traces = []
+        for compiled in [False, True]:
+            grammar, oracle = restart_grammar([])
+            grammar.rules['G'] = pybo.BijectionSampler(
+                pybo.AliasSampler('F'), lambda obj: obj)
+            pybo.BoltzmannSamplerBase.oracle = oracle
+            grammar.init('G', compiled=compiled)
+            trace = pybo.SamplingTrace()
+            grammar.instrumentation = trace
+            pybo.seed(4)
+            for _ in range(100):
+                grammar.sample_iterative('G')
+            traces.append(trace)
+        # Both engines report the same events.
+        assert [e[::2] for e in traces[0].events] \
+            == [e[::2] for e in traces[1].events]
+        trace = traces[1]
+        kinds = [e[0] for e in trace.events]
+        assert 'restart' in kinds and 'abandon' in kinds
+        stacks = trace.collapsed_stacks()
+        assert 'G;<lambda>()' in stacks
+        assert 'G;F;T;T' in stacks
+        # The self times add up to the time of the outermost calls.
+        total = 0.0
+        depth = 0
+        for kind, time, _ in trace.events:
+            if kind == 'enter':
+                depth += 1
+                if depth == 1:
+                    start = time
+            elif kind == 'leave' or kind == 'abandon':
+                depth -= 1
+                if depth == 0:
+                    total += time - start
+        assert abs(sum(stacks.values()) - total) < 1e-6
+
+        path = os.path.join(str(tmpdir), 'sampling.folded')
+        trace.write_collapsed_stacks(path)
+        with open(path) as f:
+            for line in f:
+                stack, count = line.rsplit(' ', 1)
+                assert stack in stacks and int(count) > 0
+
+        path = os.path.join(str(tmpdir), 'trace.json')
+        trace.write_chrome_trace(path)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        phases = [e['ph'] for e in events]
+        assert phases.count('B') == phases.count('E')
+        assert events[0]['name'] == 'G' and events[0]['ts'] == 0
+
+    def test_rejection_counts(self):
+        for make_grammar, alias in [(set_grammar, 'R'), (tree_grammar, 'A')]:
+            stats = []
+            for compiled in [False, True]:
+                counters, _ = rule_statistics(make_grammar, alias, compiled, 2)
+                grammar, oracle = make_grammar()
+                pybo.BoltzmannSamplerBase.oracle = oracle
+                grammar.init(alias, compiled=compiled)
+                pybo.seed(2)
+                for _ in range(100):
+                    grammar.sample_iterative(alias)
+                stats.append(grammar.rejection_statistics())
+                # Same rejections as reported to the instrumentation.
+                assert sum(c for c, _ in stats[-1].values()) \
+                    == sum(c[2] for c in counters.values())
+                grammar.reset_rejection_counts()
+                assert all(c == (0, 0)
+                           for c in grammar.rejection_statistics().values())
+            assert stats[0] == stats[1]
+            assert sum(c for c, _ in stats[0].values()) > 0
+
+    def test_wasted_l_size(self):
+        grammar, oracle = set_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('R', compiled=True)
+        pybo.seed(6)
+        for _ in range(100):
+            grammar.sample_iterative('R')
+        count, wasted = grammar.rejection_statistics()['R']
+        sampler = grammar.rules['R']
+        assert (sampler.rejections_count, sampler.wasted_l_size) \
+            == (count, wasted)
+        # Objects with an l-size of at least 8 are rejected.
+        assert count > 0 and wasted >= 8 * count
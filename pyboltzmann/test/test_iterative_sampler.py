@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import inspect
+import sys
+
+import pytest
+
+import pyboltzmann as pybo
+from pyboltzmann.test.test_compiled_sampler import restart_grammar, \
+    set_grammar
+
+
+def chain_grammar():
+    """Chains of nested sets and substitutions, the expected length of a
+    chain is about 1000."""
+    Rule = pybo.AliasSampler
+    grammar = pybo.DecompositionGrammar({
+        'C': pybo.UAtomSampler()
+             + pybo.LAtomSampler() * pybo.SetSampler(1, Rule('C')),
+        'S': pybo.USubsSampler(pybo.UAtomSampler(), Rule('C')),
+    })
+    oracle = pybo.EvaluationOracle({
+        'x': 0.01,
+        'y': 1e-9,
+        'C(x,y)': 0.0001,
+    })
+    return grammar, oracle
+
+
+class TestIterativeSampler(object):
+
+    def test_constant_stack_depth(self):
+        depth = len(inspect.stack())
+        limit = sys.getrecursionlimit()
+        for compiled in [False, True]:
+            grammar, oracle = chain_grammar()
+            pybo.BoltzmannSamplerBase.oracle = oracle
+            grammar.init('S', compiled=compiled)
+            # Dummies do not recurse when their size is computed.
+            grammar.dummy_sampling_mode()
+            pybo.seed(1)
+            sys.setrecursionlimit(depth + 100)
+            try:
+                sizes = [grammar.sample_iterative('S').l_size
+                         for _ in range(20)]
+            finally:
+                sys.setrecursionlimit(limit)
+            # The chains are much longer than the allowed stack depth.
+            assert max(sizes) > 500
+
+    def test_restart_outside_restartable_sampler(self):
+        grammar = pybo.DecompositionGrammar({
+            'R': pybo.HookSampler(pybo.UAtomSampler(), lambda: None,
+                                  lambda: grammar.restart_sampler()),
+        })
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle({'y': 0.5})
+        for compiled in [False, True]:
+            grammar.init('R', compiled=compiled)
+            with pytest.raises(pybo.PyBoltzmannError):
+                grammar.sample_iterative('R')
+
+    def test_after_hooks_of_aborted_attempts(self):
+        for compiled in [False, True]:
+            calls = []
+            grammar = pybo.DecompositionGrammar({
+                'T': pybo.UAtomSampler()
+                     + pybo.LAtomSampler() * pybo.AliasSampler('T') ** 2,
+                'H': pybo.HookSampler(pybo.AliasSampler('T'),
+                                      lambda: calls.append('before'),
+                                      lambda: calls.append('after')),
+            })
+            pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle({
+                'x': 0.2,
+                'y': 1.0,
+                'T(x,y)': (1 - (1 - 4 * 0.2) ** 0.5) / (2 * 0.2),
+            })
+            grammar.init('H', compiled=compiled)
+            grammar.set_size_limits(max_l_size=1)
+            pybo.seed(2)
+            for _ in range(100):
+                grammar.sample_iterative('H')
+            # Each aborted attempt has left the hook.
+            assert calls.count('before') > 100
+            assert calls == ['before', 'after'] * (len(calls) // 2)
+
+    def test_substitution_count_mismatch(self):
+        core = pybo.ProdClass(pybo.LAtomClass(), pybo.LAtomClass())
+        with pytest.raises(pybo.PyBoltzmannError):
+            pybo.IterativeSampler._substitute(
+                core, [pybo.UAtomClass()], True)
+        with pytest.raises(pybo.PyBoltzmannError):
+            pybo.IterativeSampler._substitute(
+                core, [pybo.UAtomClass()] * 3, True)
+
+    def test_sample_batch(self):
+        for compiled in [False, True]:
+            for alias in ['R', 'F']:
+                calls = []
+                if alias == 'R':
+                    grammar, oracle = set_grammar()
+                else:
+                    grammar, oracle = restart_grammar(calls)
+                pybo.BoltzmannSamplerBase.oracle = oracle
+                grammar.init(alias, compiled=compiled)
+                pybo.seed(5)
+                expected = [grammar.sample_iterative(alias)
+                            for _ in range(100)]
+                expected_calls = calls[:]
+                del calls[:]
+                pybo.seed(5)
+                batch = grammar.sample_batch(alias, 100)
+                assert [(obj.l_size, obj.u_size) for obj in batch] \
+                    == [(obj.l_size, obj.u_size) for obj in expected]
+                assert calls == expected_calls
+                assert grammar.sample_batch(alias, 0) == []
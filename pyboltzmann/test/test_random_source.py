@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+import pyboltzmann as pybo
+
+
+def draw(source, n):
+    return [source.random() for _ in range(n)]
+
+
+class TestRandomSource(object):
+
+    def test_seed(self):
+        for source in [pybo.BufferedRandomSource(block_size=7),
+                       pybo.PythonRandomSource()]:
+            source.seed(3)
+            first = draw(source, 20)
+            source.seed(3)
+            assert draw(source, 20) == first
+            assert all(0 <= u < 1 for u in first)
+
+    def test_state_across_blocks(self):
+        source = pybo.BufferedRandomSource(seed=1, block_size=5)
+        for n in [0, 3, 5, 12]:
+            state = source.getstate()
+            expected = draw(source, n + 9)
+            source.setstate(state)
+            assert draw(source, n + 9) == expected
+            # Restoring a state without drawing keeps the position.
+            source.setstate(state)
+            assert source.getstate() == state
+
+    def test_helpers(self):
+        source = pybo.BufferedRandomSource(seed=5)
+        population = list(range(10))
+        assert all(0 <= source.randrange(4) < 4 for _ in range(100))
+        assert source.choice(population) in population
+        shuffled = population[:]
+        source.shuffle(shuffled)
+        assert sorted(shuffled) == population
+        sample = source.sample(population, 4)
+        assert len(set(sample)) == 4
+
+    def test_active_source(self):
+        source = pybo.BufferedRandomSource(seed=11)
+        previous = pybo.set_random_source(source)
+        try:
+            assert pybo.get_random_source() is source
+            pybo.seed(2)
+            bits = [pybo.bern(0.5) for _ in range(50)]
+            pybo.seed(2)
+            assert [pybo.bern(0.5) for _ in range(50)] == bits
+        finally:
+            pybo.set_random_source(previous)
+
+    def test_grammar_source(self):
+        grammar = pybo.DecompositionGrammar({
+            'N': pybo.UAtomSampler()
+                 + pybo.UAtomSampler() * pybo.AliasSampler('N'),
+        })
+        pybo.BoltzmannSamplerBase.oracle = pybo.EvaluationOracle({
+            'y': 0.5,
+            'N(x,y)': 1.0,
+        })
+        grammar.init('N')
+        grammar.random_source = pybo.BufferedRandomSource(seed=4)
+        global_source = pybo.get_random_source()
+        first = [grammar.sample_iterative('N').u_size for _ in range(30)]
+        assert pybo.get_random_source() is global_source
+        grammar.random_source.seed(4)
+        assert [grammar.sample_iterative('N').u_size
+                for _ in range(30)] == first
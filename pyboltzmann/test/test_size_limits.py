@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+from collections import Counter
+
+import pyboltzmann as pybo
+from pyboltzmann.test.test_compiled_sampler import tree_grammar
+
+
+def catalan(n):
+    c = 1
+    for k in range(n):
+        c = c * 2 * (2 * k + 1) // (k + 2)
+    return c
+
+
+def conditional_distribution(max_l_size, x=0.2, y=1.0):
+    # A tree with k inner nodes (l-atoms) has k + 1 leaves (u-atoms).
+    weights = [catalan(k) * x ** k * y ** (k + 1)
+               for k in range(max_l_size + 1)]
+    return [w / sum(weights) for w in weights]
+
+
+class TestSizeLimits(object):
+
+    def test_distribution(self):
+        n = 4000
+        for compiled in [False, True]:
+            for limits, max_l_size in [((5, None), 5), ((None, 4), 3)]:
+                grammar, oracle = tree_grammar()
+                pybo.BoltzmannSamplerBase.oracle = oracle
+                grammar.init('T', compiled=compiled)
+                grammar.set_size_limits(*limits)
+                assert grammar.size_limits == limits
+                pybo.seed(7)
+                counts = Counter(grammar.sample_iterative('T').l_size
+                                 for _ in range(n))
+                assert max(counts) <= max_l_size
+                # Same distribution as rejecting the oversized trees.
+                for k, p in enumerate(conditional_distribution(max_l_size)):
+                    assert abs(counts[k] / n - p) < 0.02
+
+    def test_two_phase(self):
+        grammar, oracle = tree_grammar()
+        pybo.BoltzmannSamplerBase.oracle = oracle
+        grammar.init('T', compiled=True)
+        grammar.set_size_limits(6)
+        pybo.seed(3)
+        for _ in range(50):
+            obj = grammar.sample_two_phase('T', lambda d: d.l_size >= 4)
+            assert 4 <= obj.l_size <= 6
+        assert grammar.size_limits == (6, None)
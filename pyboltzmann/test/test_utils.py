@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#    Copyright (C) 2018 by
+#    Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#    Petre Petrov <petrepp4@gmail.com>
+#    Rudi Floren <rudi.floren@gmail.com>
+#    Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+#    All rights reserved.
+#    BSD license.
+#
+# Authors:  Marta Grobelna <marta.grobelna@rwth-aachen.de>
+#           Petre Petrov <petrepp4@gmail.com>
+#           Rudi Floren <rudi.floren@gmail.com>
+#           Tobias Winkler <tobias.winkler1@rwth-aachen.de>
+
+from __future__ import division
+
+import pyboltzmann as pybo
+
+
+class TestUtils(object):
+
+    def test_alias_table(self):
+        weights = [0.5, 3.0, 0.01, 1.49, 2.0]
+        probs, indices = pybo.alias_table(weights)
+        # Reconstruct the distribution from the table.
+        n = len(weights)
+        reconstructed = [0] * n
+        for i in range(n):
+            reconstructed[i] += probs[i] / n
+            reconstructed[indices[i]] += (1 - probs[i]) / n
+        total = sum(weights)
+        for w, p in zip(weights, reconstructed):
+            assert abs(w / total - p) < 1e-12
+
+    def test_alias_draw(self):
+        weights = [1.0, 0.0, 3.0]
+        probs, indices = pybo.alias_table(weights)
+        pybo.seed(1)
+        counts = [0, 0, 0]
+        for _ in range(10000):
+            counts[pybo.alias_draw(probs, indices)] += 1
+        assert counts[1] == 0
+        assert 2300 < counts[0] < 2700
+
+    def test_pois_table(self):
+        for d, l in [(0, 0.3), (1, 2.5), (2, 0.01), (0, 40.0)]:
+            for max_length in [1, 3, 10000]:
+                cdf, p_last = pybo.pois_table(d, l, max_length)
+                assert len(cdf) <= max_length
+                pybo.seed(d + max_length)
+                expected = [pybo.pois(d, l) for _ in range(500)]
+                pybo.seed(d + max_length)
+                assert [pybo.pois_from_table(d, l, cdf, p_last)
+                        for _ in range(500)] == expected
+                assert min(expected) >= d
@@ -16,9 +16,96 @@ import random
 
 from math import exp, pow, factorial
 import itertools
+from bisect import bisect_left
 
+from pyboltzmann.random_source import PythonRandomSource, \
+    BufferedRandomSource
+
+# Kept for backwards compatibility, use the random sources instead.
 boltzmann_framework_random_gen = random.Random()
 
+try:
+    _random_source = BufferedRandomSource()
+except ImportError:
+    # NumPy is not available.
+    _random_source = PythonRandomSource(boltzmann_framework_random_gen)
+
+# Source for the random choices which are only made while building objects
+# (e.g. marking or relabelling atoms) and do not influence the sizes of the
+# sampled objects. Keeping them apart from the active source makes a size-only
+# (dummy) run consume exactly the same random numbers as the real run.
+try:
+    _building_random_source = BufferedRandomSource()
+except ImportError:
+    _building_random_source = PythonRandomSource()
+
+
+def get_random_source():
+    """Returns the active random source.
+
+    Returns
+    -------
+    RandomSource
+    """
+    return _random_source
+
+
+def set_random_source(source):
+    """Sets the random source used for all random decisions.
+
+    Parameters
+    ----------
+    source: RandomSource
+
+    Returns
+    -------
+    RandomSource
+        The previously active source.
+    """
+    global _random_source
+    previous = _random_source
+    _random_source = source
+    return previous
+
+
+def get_building_random_source():
+    """Returns the source for random choices that do not affect sizes.
+
+    Returns
+    -------
+    RandomSource
+    """
+    return _building_random_source
+
+
+def set_building_random_source(source):
+    """Sets the source for random choices that do not affect sizes.
+
+    Parameters
+    ----------
+    source: RandomSource
+
+    Returns
+    -------
+    RandomSource
+        The previously active source.
+    """
+    global _building_random_source
+    previous = _building_random_source
+    _building_random_source = source
+    return previous
+
+
+def seed(s=None):
+    """Seeds the active random source and the building random source.
+
+    Parameters
+    ----------
+    s: int, optional (default=None)
+    """
+    _random_source.seed(s)
+    _building_random_source.seed(None if s is None else s + 1)
+
 
 def nth(iterable, n, default=None):
     """Returns the nth item or a default value, also works for a generator."""
@@ -37,7 +124,60 @@ def bern(p):
     bool
     """
     # assert 0 <= p <= 1
-    return boltzmann_framework_random_gen.uniform(0, 1) <= p
+    return _random_source.random() <= p
+
+
+def alias_table(weights):
+    """Builds a Walker alias table for the discrete distribution given by the
+    (not necessarily normalized) weights.
+
+    Parameters
+    ----------
+    weights: list of float
+
+    Returns
+    -------
+    probs: list of float
+    indices: list of int
+    """
+    n = len(weights)
+    total = sum(weights)
+    probs = [w * n / total for w in weights]
+    indices = list(range(n))
+    small = [i for i in range(n) if probs[i] < 1]
+    large = [i for i in range(n) if probs[i] >= 1]
+    while small and large:
+        i = small.pop()
+        j = large.pop()
+        indices[i] = j
+        probs[j] -= 1 - probs[i]
+        if probs[j] < 1:
+            small.append(j)
+        else:
+            large.append(j)
+    # Remaining entries are (up to rounding errors) exactly 1.
+    for i in small + large:
+        probs[i] = 1
+    return probs, indices
+
+
+def alias_draw(probs, indices):
+    """Draws from a Walker alias table using a single uniform random number.
+
+    Parameters
+    ----------
+    probs: list of float
+    indices: list of int
+
+    Returns
+    -------
+    int
+    """
+    u = _random_source.random() * len(probs)
+    i = int(u)
+    if u - i < probs[i]:
+        return i
+    return indices[i]
 
 
 def exp_tail(d, x):
@@ -76,6 +216,72 @@ def pois_prob(d, k, l):
     return 1 / exp_tail(d, l) * pow(l, k) / factorial(k)
 
 
+def pois_table(d, l, max_length=10000, eps=1e-15):
+    """Precomputes a truncated table of the cumulative distribution function
+    of the Poisson distribution conditioned on values >= d.
+
+    Parameters
+    ----------
+    d: int
+    l: float
+    max_length: int, optional (default=10000)
+        Maximum number of entries in the table.
+    eps: float, optional (default=1e-15)
+        The table ends once the remaining tail probability is below eps.
+
+    Returns
+    -------
+    cdf: list of float
+        cdf[i] is the probability of a value <= d + i.
+    p_last: float
+        The probability of the value d + len(cdf) - 1, needed to continue the
+        distribution beyond the table.
+    """
+    cdf = []
+    s = 0
+    k = d
+    p = pois_prob(d, k, l)
+    while True:
+        s += p
+        cdf.append(s)
+        if s >= 1 - eps or len(cdf) >= max_length or (p == 0 and k > l):
+            return cdf, p
+        k += 1
+        p *= l / k
+
+
+def pois_from_table(d, l, cdf, p_last):
+    """Poisson generator using a table from `pois_table`.
+
+    Draws the same values as `pois` for the same random numbers.
+
+    Parameters
+    ----------
+    d: int
+    l: float
+    cdf: list of float
+    p_last: float
+
+    Returns
+    -------
+    int
+    """
+    u = _random_source.random()
+    i = bisect_left(cdf, u)
+    if i < len(cdf):
+        return d + i
+    # The tail is not covered by the table, continue the linear search.
+    s = cdf[-1]
+    k = d + len(cdf) - 1
+    p = p_last
+    while True:
+        k += 1
+        p *= l / k
+        s += p
+        if s >= u or p == 0:
+            return k
+
+
 def pois(d, l):
     """
     Poisson generator.
@@ -89,7 +295,7 @@ def pois(d, l):
     -------
     int
     """
-    u = boltzmann_framework_random_gen.uniform(0, 1)
+    u = _random_source.random()
     s = 0
     k = d
     p = pois_prob(d, k, l)